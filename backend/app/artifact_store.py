@@ -0,0 +1,244 @@
+"""
+Artifact Store - Managed home for generated files (videos, PDFs, decks)
+(Images have their own content-addressed LRU in app/utils/image_cache.py.)
+Endpoints used to write uuid-named files straight into /tmp and never delete
+them, so the disk slowly filled and directory lookups slowed down.
+
+Artifacts live under ARTIFACT_DIR/<kind>/. Each kind has a byte quota (oldest
+files go first when it's exceeded) and a max age; a background thread sweeps
+both. Writes are atomic: producers write to a hidden ".part" file that is
+renamed into place only once complete. Documents small enough to be served
+from memory (ARTIFACT_INLINE_MAX_BYTES) never touch the disk at all.
+"""
+import os
+import time
+import uuid
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+ARTIFACT_DIR = os.environ.get("ARTIFACT_DIR", os.path.join(tempfile.gettempdir(), "sahayak_artifacts"))
+ARTIFACT_MAX_AGE_S = float(os.environ.get("ARTIFACT_MAX_AGE_S", "3600"))
+ARTIFACT_GC_INTERVAL_S = float(os.environ.get("ARTIFACT_GC_INTERVAL_S", "300"))
+ARTIFACT_INLINE_MAX_BYTES = int(os.environ.get("ARTIFACT_INLINE_MAX_BYTES", str(2 * 1024 * 1024)))
+
+_MB = 1024 * 1024
+# Per-kind byte quotas; override with e.g. ARTIFACT_QUOTA_VIDEO_MB=4096
+DEFAULT_QUOTAS = {"video": 2048 * _MB, "pdf": 256 * _MB, "ppt": 256 * _MB}
+ARTIFACT_QUOTAS = {
+    kind: int(float(os.environ.get(f"ARTIFACT_QUOTA_{kind.upper()}_MB", quota / _MB)) * _MB)
+    for kind, quota in DEFAULT_QUOTAS.items()
+}
+PART_PREFIX = "."  # In-progress writes are hidden and ignored by the index
+
+
+class Artifact:
+    __slots__ = ("kind", "path", "size", "created")
+
+    def __init__(self, kind: str, path: str, size: int, created: float):
+        self.kind = kind
+        self.path = path
+        self.size = size
+        self.created = created
+
+
+class ArtifactStore:
+    def __init__(self, root: str = ARTIFACT_DIR, quotas: Dict[str, int] = None,
+                 max_age_s: float = ARTIFACT_MAX_AGE_S, gc_interval_s: float = ARTIFACT_GC_INTERVAL_S):
+        """
+        Args:
+            root: Directory holding one subdirectory per artifact kind
+            quotas: kind -> max bytes; kinds not listed are unbounded by size
+            max_age_s: Artifacts (and abandoned .part files) older than this are deleted
+            gc_interval_s: Background sweep period; 0 disables the thread (tests)
+        """
+        self.root = root
+        self.quotas = dict(ARTIFACT_QUOTAS if quotas is None else quotas)
+        self.max_age_s = max_age_s
+        self.gc_interval_s = gc_interval_s
+        self._index: Dict[str, "OrderedDict[str, Artifact]"] = {}  # kind -> path -> artifact, oldest first
+        self._bytes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._gc_thread = None
+        self.stats = {"written": 0, "expired": 0, "evicted": 0, "deleted": 0, "inline_served": 0}
+        os.makedirs(root, exist_ok=True)
+        self._load_index()
+
+    def _dir(self, kind: str) -> str:
+        path = os.path.join(self.root, kind)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def _load_index(self):
+        """Adopt artifacts left by a previous process so they stay under quota/GC."""
+        for kind in os.listdir(self.root):
+            directory = os.path.join(self.root, kind)
+            if not os.path.isdir(directory):
+                continue
+            entries = []
+            for name in os.listdir(directory):
+                if name.startswith(PART_PREFIX):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append(Artifact(kind, path, st.st_size, st.st_mtime))
+            for artifact in sorted(entries, key=lambda a: a.created):
+                self._add(artifact)
+
+    def _add(self, artifact: Artifact):
+        index = self._index.setdefault(artifact.kind, OrderedDict())
+        old = index.pop(artifact.path, None)
+        index[artifact.path] = artifact
+        self._bytes[artifact.kind] = self._bytes.get(artifact.kind, 0) + artifact.size - (old.size if old else 0)
+
+    # --- Writing ---
+
+    def reserve(self, kind: str, ext: str) -> str:
+        """A hidden temp path for producers that must write to a file (MoviePy, ffmpeg). Pass it to commit()."""
+        return os.path.join(self._dir(kind), f"{PART_PREFIX}{uuid.uuid4().hex}.part.{ext}")
+
+    def commit(self, kind: str, part_path: str) -> str:
+        """Atomically publish a reserved file; returns its final path."""
+        ext = part_path.rsplit(".", 1)[-1]
+        final = os.path.join(self._dir(kind), f"{uuid.uuid4().hex}.{ext}")
+        os.replace(part_path, final)
+        size = os.path.getsize(final)
+        with self._lock:
+            self._add(Artifact(kind, final, size, time.time()))
+            self.stats["written"] += 1
+        self._enforce_quota(kind, keep=final)
+        self.start_gc()
+        return final
+
+    def discard(self, part_path: str):
+        """Drop a reserved file whose producer failed."""
+        try:
+            os.remove(part_path)
+        except OSError:
+            pass
+
+    def put_bytes(self, kind: str, data: bytes, ext: str) -> str:
+        part = self.reserve(kind, ext)
+        try:
+            with open(part, "wb") as f:
+                f.write(data)
+        except Exception:
+            self.discard(part)
+            raise
+        return self.commit(kind, part)
+
+    def serve_inline(self, data: bytes) -> bool:
+        """True if a finished document is small enough to send straight from memory."""
+        if len(data) <= ARTIFACT_INLINE_MAX_BYTES:
+            self.stats["inline_served"] += 1
+            return True
+        return False
+
+    def delete(self, path: str):
+        with self._lock:
+            for kind, index in self._index.items():
+                artifact = index.pop(path, None)
+                if artifact is not None:
+                    self._bytes[kind] -= artifact.size
+                    self.stats["deleted"] += 1
+                    break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    # --- Garbage collection ---
+
+    def _enforce_quota(self, kind: str, keep: Optional[str] = None):
+        quota = self.quotas.get(kind)
+        if quota is None:
+            return
+        victims = []
+        with self._lock:
+            index = self._index.get(kind, OrderedDict())
+            while self._bytes.get(kind, 0) > quota and index:
+                path, artifact = next(iter(index.items()))
+                if path == keep:
+                    break  # Never evict what we just wrote, even if it alone busts the quota
+                index.popitem(last=False)
+                self._bytes[kind] -= artifact.size
+                victims.append(path)
+            self.stats["evicted"] += len(victims)
+        self._remove_files(victims)
+
+    def gc(self, now: float = None) -> int:
+        """One sweep: expire old artifacts and stale .part files, then re-apply quotas. Returns files removed."""
+        now = time.time() if now is None else now
+        victims = []
+        with self._lock:
+            for kind, index in self._index.items():
+                while index:
+                    path, artifact = next(iter(index.items()))
+                    if now - artifact.created <= self.max_age_s:
+                        break
+                    index.popitem(last=False)
+                    self._bytes[kind] -= artifact.size
+                    victims.append(path)
+            self.stats["expired"] += len(victims)
+            kinds = list(self._index)
+        for kind in kinds:
+            directory = os.path.join(self.root, kind)
+            try:
+                names = os.listdir(directory)
+            except OSError:
+                continue
+            for name in names:
+                if name.startswith(PART_PREFIX):
+                    path = os.path.join(directory, name)
+                    try:
+                        if now - os.path.getmtime(path) > self.max_age_s:
+                            victims.append(path)  # Producer crashed mid-write
+                    except OSError:
+                        pass
+        self._remove_files(victims)
+        for kind in kinds:
+            self._enforce_quota(kind)
+        return len(victims)
+
+    def _remove_files(self, paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def start_gc(self):
+        """Start the background sweeper once (daemon thread, so it never blocks shutdown)."""
+        if self.gc_interval_s <= 0 or self._gc_thread is not None:
+            return
+        with self._lock:
+            if self._gc_thread is not None:
+                return
+            self._gc_thread = threading.Thread(target=self._gc_loop, name="artifact-gc", daemon=True)
+            self._gc_thread.start()
+
+    def _gc_loop(self):
+        while True:
+            time.sleep(self.gc_interval_s)
+            try:
+                removed = self.gc()
+                if removed:
+                    print(f"Artifact GC removed {removed} files")
+            except Exception as e:
+                print(f"Artifact GC Error: {e}")
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            kinds = {
+                kind: {"files": len(index), "bytes": self._bytes.get(kind, 0), "quota_bytes": self.quotas.get(kind)}
+                for kind, index in self._index.items()
+            }
+        return {"root": self.root, "bytes": sum(k["bytes"] for k in kinds.values()),
+                "kinds": kinds, "max_age_s": self.max_age_s, **self.stats}
+
+
+artifact_store = ArtifactStore()
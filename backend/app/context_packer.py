@@ -0,0 +1,135 @@
+"""
+Context Packer - Token-budgeted history with rolling summaries
+Replaces the fixed "last 10 messages" window. Turns are added newest -> oldest
+until the token budget is full; turns that fall out of the window are folded
+into a running summary, refreshed in the background by the cheap 8B tier.
+That includes turns the session ring dropped before they ever left the window.
+This keeps input tokens roughly constant per request.
+"""
+import os
+import asyncio
+from typing import Callable, Dict, List, Optional
+
+from app.session_store import SessionStore, Turn, session_store
+
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "3000"))
+# Re-summarize once this many un-summarized turns have left the window
+SUMMARY_REFRESH_TURNS = int(os.environ.get("SUMMARY_REFRESH_TURNS", "4"))
+SUMMARY_MODEL = os.environ.get("SUMMARY_MODEL", "groq/llama-3.1-8b-instant")
+SUMMARY_MAX_WORDS = 120
+SUMMARY_TURN_CHARS = 1500  # Long lesson plans are clipped before summarizing
+
+SUMMARY_PROMPT = f"""You maintain a running summary of a conversation between a school teacher and Sahayak (an AI teaching assistant).
+Merge the previous summary with the new turns. Keep the teacher's name, grade, subject, language preference,
+classroom situation and any unfinished requests. Drop greetings and small talk.
+Reply with the updated summary only, in under {SUMMARY_MAX_WORDS} words."""
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap, tokenizer-free estimate (~4 UTF-8 bytes per token).
+    Slightly pessimistic for English and about right for Indic scripts, which is
+    the safe direction for a budget.
+    """
+    return max(1, (len(text.encode("utf-8")) + 3) // 4)
+
+
+class ContextPacker:
+    """Builds the LLM message list for a user from the session store."""
+
+    def __init__(self, store: SessionStore = session_store, budget_tokens: int = CONTEXT_TOKEN_BUDGET,
+                 refresh_turns: int = SUMMARY_REFRESH_TURNS,
+                 count_tokens: Callable[[str], int] = estimate_tokens):
+        self.store = store
+        self.budget_tokens = budget_tokens
+        self.refresh_turns = refresh_turns
+        self.count_tokens = count_tokens
+        self._refreshing = set()   # user_ids with a summary refresh in flight
+        self._tasks = set()        # Strong refs so background tasks aren't GC'd
+        self.stats = {"summaries_started": 0, "summaries_failed": 0}
+
+    def tokens(self, turn: Turn) -> int:
+        """Token count for a stored turn, computed once and cached on the turn."""
+        if turn.tokens is None:
+            turn.tokens = self.count_tokens(turn.content)
+        return turn.tokens
+
+    def pack(self, user_id: str) -> List[Dict]:
+        """
+        Newest turns that fit the budget, preceded by the running summary (if any).
+        The newest turn is always included, even if it alone exceeds the budget.
+        """
+        turns = self.store.turns(user_id)
+        summary, summary_upto = self.store.summary(user_id)
+        summary_message = self._summary_message(summary)
+
+        budget = self.budget_tokens - (self.count_tokens(summary_message["content"]) if summary_message else 0)
+        window: List[Turn] = []
+        used = 0
+        for turn in reversed(turns):
+            cost = self.tokens(turn)
+            if window and used + cost > budget:
+                break
+            window.append(turn)
+            used += cost
+        window.reverse()
+
+        # Providers (e.g. Anthropic) want the conversation to open with a user turn
+        while len(window) > 1 and window[0].role != "user":
+            window.pop(0)
+
+        evicted = [t for t in self.store.dropped(user_id) if t.seq > summary_upto]
+        evicted += [t for t in turns[:len(turns) - len(window)] if t.seq > summary_upto]
+        if len(evicted) >= self.refresh_turns:
+            self._schedule_refresh(user_id, summary, evicted)
+
+        messages = [summary_message] if summary_message else []
+        messages.extend(turn.to_message() for turn in window)
+        return messages
+
+    @staticmethod
+    def _summary_message(summary: str) -> Optional[Dict]:
+        if not summary:
+            return None
+        return {"role": "system", "content": f"Summary of the earlier conversation with this teacher:\n{summary}"}
+
+    def _schedule_refresh(self, user_id: str, previous: str, evicted: List[Turn]):
+        if user_id in self._refreshing:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Called outside the event loop; the next async request will pick it up
+        self._refreshing.add(user_id)
+        self.stats["summaries_started"] += 1
+        task = loop.create_task(self._refresh(user_id, previous, evicted))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(self, user_id: str, previous: str, evicted: List[Turn]):
+        try:
+            from app.llm_factory import llm_factory
+
+            transcript = "\n".join(f"{t.role.upper()}: {t.content[:SUMMARY_TURN_CHARS]}" for t in evicted)
+            request = f"PREVIOUS SUMMARY:\n{previous or '(none)'}\n\nNEW TURNS:\n{transcript}"
+            response = await llm_factory.achat(
+                messages=[{"role": "user", "content": request}],
+                system_prompt=SUMMARY_PROMPT,
+                temperature=0.2,
+                cache=False,
+                prefer=SUMMARY_MODEL,
+                force_json=False,
+            )
+            if response.get("success"):
+                self.store.set_summary(user_id, response["content"].strip(), evicted[-1].seq)
+            else:
+                self.stats["summaries_failed"] += 1
+        except Exception as e:
+            print(f"Context Summary Error: {e}")
+            self.stats["summaries_failed"] += 1
+        finally:
+            self._refreshing.discard(user_id)
+
+
+# Singleton
+context_packer = ContextPacker()
@@ -0,0 +1,229 @@
+"""
+Job Queue - Background execution for slow media generation (/generate/video)
+A video takes 30s+ (remote ModelScope predict, then a MoviePy encode), which used
+to run inline in the async route and pin the worker. Jobs are now submitted,
+polled and downloaded:
+
+    POST /jobs/video           -> {"job_id": ..., "status": "queued"}
+    GET  /jobs/{job_id}        -> status, progress, position in queue
+    GET  /jobs/{job_id}/result -> the finished file
+
+Work runs on a bounded process pool so encodes never contend with request
+handling for the GIL. The queue refuses new work past a depth limit, and
+finished jobs (and their files) are dropped after a TTL. Outputs are written
+through the artifact store, so they count against its quota and GC.
+"""
+import os
+import time
+import uuid
+import threading
+import multiprocessing
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional
+from app.artifact_store import ArtifactStore, artifact_store
+
+JOB_MAX_WORKERS = int(os.environ.get("JOB_MAX_WORKERS", "2"))
+JOB_MAX_PENDING = int(os.environ.get("JOB_MAX_PENDING", "16"))   # queued + running
+JOB_TTL_S = float(os.environ.get("JOB_TTL_S", "3600"))           # Finished jobs kept 1h
+JOB_DEFAULT_DURATION_S = 45.0  # Progress estimate until we've timed a real job
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class QueueFull(Exception):
+    """Raised by submit() when JOB_MAX_PENDING jobs are already queued or running."""
+
+
+class Job:
+    __slots__ = ("id", "kind", "prompt", "output_path", "status", "error",
+                 "created", "started", "finished", "future")
+
+    def __init__(self, kind: str, prompt: str, output_path: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.prompt = prompt
+        self.output_path = output_path
+        self.status = QUEUED
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.future = None
+
+
+def _render_video(prompt: str, output_path: str) -> float:
+    """
+    Runs inside a pool process: the generator (and its ModelScope client) is loaded
+    once per worker. Returns the start time so queue wait isn't counted as encode time.
+    """
+    from app.subsystems import subsystems
+    video_gen = subsystems.get("video_gen")
+    started = time.time()
+    result = video_gen.generate(prompt, output_path)
+    if not result or not os.path.exists(output_path):
+        raise RuntimeError("Video generation produced no file")
+    return started
+
+
+class JobQueue:
+    def __init__(self, workers: Dict[str, Callable] = None, max_workers: int = JOB_MAX_WORKERS,
+                 max_pending: int = JOB_MAX_PENDING, ttl_s: float = JOB_TTL_S,
+                 store: Optional[ArtifactStore] = None, executor: Optional[Executor] = None):
+        """
+        Args:
+            workers: kind -> fn(prompt, output_path); must be picklable (module-level) for the process pool
+            max_workers: Pool size (concurrent encodes)
+            max_pending: Queued + running jobs allowed before submit() raises QueueFull
+            ttl_s: Seconds a finished job (and its file) is kept for download
+            store: Where outputs are written (default: the shared artifact store)
+            executor: Injected executor (tests); default is a spawn-context process pool
+        """
+        self.workers = workers if workers is not None else {"video": _render_video}
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl_s = ttl_s
+        self.store = store or artifact_store
+        self._executor = executor
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._pending = deque()          # Job ids in submission order, for queue position
+        self._durations = deque(maxlen=20)
+        self._lock = threading.Lock()
+        self.stats = {"submitted": 0, "rejected": 0, "done": 0, "failed": 0, "expired": 0}
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            # spawn, not fork: the API process has threads (uvicorn, tool pool) that fork would copy mid-flight
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def submit(self, kind: str, prompt: str) -> Job:
+        worker = self.workers.get(kind)
+        if worker is None:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        self.cleanup()
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                self.stats["rejected"] += 1
+                raise QueueFull(f"{len(self._pending)} jobs pending")
+            ext = "mp4" if kind == "video" else "bin"
+            # Workers write to a hidden .part file; it's published on success
+            job = Job(kind, prompt, self.store.reserve(kind, ext))
+            self._jobs[job.id] = job
+            self._pending.append(job.id)
+            self.stats["submitted"] += 1
+
+        job.future = self._get_executor().submit(worker, prompt, job.output_path)
+        job.future.add_done_callback(lambda f, job=job: self._on_done(job, f))
+        print(f"Job {job.id[:8]} queued ({kind}, {len(self._pending)} pending)")
+        return job
+
+    def _on_done(self, job: Job, future):
+        published = None
+        if future.exception() is None:
+            try:
+                published = self.store.commit(job.kind, job.output_path)
+            except OSError as e:
+                print(f"Job {job.id[:8]} output missing: {e}")
+        else:
+            self.store.discard(job.output_path)
+
+        with self._lock:
+            job.finished = time.time()
+            try:
+                started = future.result()
+                if published is None:
+                    raise RuntimeError("Job produced no output file")
+                job.output_path = published
+                job.started = started if isinstance(started, (int, float)) else job.created
+                job.status = DONE
+                self._durations.append(job.finished - job.started)
+                self.stats["done"] += 1
+            except Exception as e:
+                job.status = FAILED
+                job.error = str(e) or type(e).__name__
+                self.stats["failed"] += 1
+                print(f"Job {job.id[:8]} failed: {job.error}")
+                if isinstance(e, BrokenProcessPool):
+                    # A worker died (OOM in the encoder): the pool is unusable, build a fresh one next submit
+                    self._executor = None
+            try:
+                self._pending.remove(job.id)
+            except ValueError:
+                pass
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self.cleanup()
+        return self._jobs.get(job_id)
+
+    def _expected_duration(self) -> float:
+        if not self._durations:
+            return JOB_DEFAULT_DURATION_S
+        return sum(self._durations) / len(self._durations)
+
+    def status(self, job: Job) -> Dict:
+        """Poll payload. Progress is an estimate from recent job durations (the pool can't report mid-encode)."""
+        now = time.time()
+        with self._lock:
+            status = job.status
+            if status == QUEUED and job.future is not None and not job.future.cancelled() \
+                    and (job.future.running() or job.future.done()):  # done() = publishing the output
+                status = RUNNING
+            position = None
+            if status in (QUEUED, RUNNING):
+                position = list(self._pending).index(job.id) if job.id in self._pending else 0
+            expected = self._expected_duration()
+
+        if status == DONE:
+            progress = 1.0
+        elif status == FAILED:
+            progress = 0.0
+        else:
+            # Jobs ahead of us in the pool's backlog push the estimate out
+            waves = position // max(1, self.max_workers) if position is not None else 0
+            elapsed = now - job.created
+            progress = round(min(0.95, elapsed / (expected * (waves + 1))), 2)
+
+        payload = {
+            "job_id": job.id,
+            "kind": job.kind,
+            "status": status,
+            "progress": progress,
+            "queue_position": position,
+            "elapsed_s": round((job.finished or now) - job.created, 1),
+        }
+        if status == DONE:
+            payload["result_url"] = f"/jobs/{job.id}/result"
+        if job.error:
+            payload["error"] = job.error
+        return payload
+
+    def cleanup(self, now: float = None):
+        """Drop finished jobs older than the TTL, deleting their output files."""
+        now = time.time() if now is None else now
+        expired = []
+        with self._lock:
+            for job_id, job in list(self._jobs.items()):
+                if job.finished is not None and now - job.finished > self.ttl_s:
+                    expired.append(self._jobs.pop(job_id))
+            self.stats["expired"] += len(expired)
+        for job in expired:
+            if job.status == DONE:
+                self.store.delete(job.output_path)
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {
+                "jobs": len(self._jobs),
+                "pending": len(self._pending),
+                "max_pending": self.max_pending,
+                "workers": self.max_workers,
+                "avg_duration_s": round(self._expected_duration(), 1),
+                **self.stats,
+            }
+
+
+job_queue = JobQueue()
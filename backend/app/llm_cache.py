@@ -0,0 +1,200 @@
+"""
+LLM Response Cache - Exact + Semantic tiers in front of LLMFactory
+Teachers ask the same things all day ("how to teach fractions", the SOS noise
+prompt). Serving those from memory saves a paid provider call and seconds of latency.
+
+Tiers:
+    exact     -> sha256 of normalized system prompt + trimmed history + temperature
+    semantic  -> (optional) MiniLM embedding of a first-turn question; a cached
+                 answer is reused when cosine similarity >= threshold
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+LLM_CACHE_TTL_S = float(os.environ.get("LLM_CACHE_TTL_S", "21600"))  # 6h
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "2000"))
+LLM_CACHE_MAX_BYTES = int(os.environ.get("LLM_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+LLM_SEMANTIC_CACHE = os.environ.get("LLM_SEMANTIC_CACHE", "0") == "1"
+LLM_SEMANTIC_THRESHOLD = float(os.environ.get("LLM_SEMANTIC_THRESHOLD", "0.92"))
+# Semantic lookups scan linearly; keep the index small enough for a few ms per lookup
+LLM_SEMANTIC_MAX_ENTRIES = int(os.environ.get("LLM_SEMANTIC_MAX_ENTRIES", "512"))
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE.sub(" ", str(text)).strip().lower()
+
+
+def cache_key(messages: List[Dict], system_prompt: str, temperature: float) -> str:
+    payload = {
+        "system": _normalize(system_prompt),
+        "history": [(m.get("role"), _normalize(m.get("content", ""))) for m in messages],
+        "temperature": round(float(temperature), 2),
+    }
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _default_embedder() -> Callable[[str], List[float]]:
+    """The RAG store's MiniLM instance (loaded once per process, on first use by either)."""
+    from app.rag.embeddings import get_embedder
+    return get_embedder().embed_query
+
+
+class LLMResponseCache:
+    """Thread-safe LRU + TTL cache with a byte budget and hit/miss counters."""
+
+    def __init__(self, ttl_s: float = LLM_CACHE_TTL_S, max_entries: int = LLM_CACHE_MAX_ENTRIES,
+                 max_bytes: int = LLM_CACHE_MAX_BYTES, semantic: bool = LLM_SEMANTIC_CACHE,
+                 threshold: float = LLM_SEMANTIC_THRESHOLD, embedder: Optional[Callable[[str], List[float]]] = None):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.semantic_enabled = semantic
+        self.threshold = threshold
+        self._embedder = embedder
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        # Semantic index: exact key -> (unit vector, system/temperature scope)
+        self._vectors: Dict[str, tuple] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    # --- Semantic helpers ---
+    @staticmethod
+    def _first_turn_question(messages: List[Dict]) -> Optional[str]:
+        if len(messages) == 1 and messages[0].get("role") == "user":
+            return _normalize(messages[0].get("content", ""))
+        return None
+
+    @staticmethod
+    def _scope(system_prompt: str, temperature: float) -> str:
+        return cache_key([], system_prompt, temperature)
+
+    def _embed(self, text: str) -> Optional[List[float]]:
+        try:
+            if self._embedder is None:
+                self._embedder = _default_embedder()
+            vector = list(self._embedder(text))
+        except Exception as e:
+            print(f"LLM Cache: semantic tier disabled ({e})")
+            self.semantic_enabled = False
+            return None
+        norm = sum(v * v for v in vector) ** 0.5 or 1.0
+        return [v / norm for v in vector]
+
+    # --- Internal bookkeeping (caller holds the lock) ---
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry["size"]
+        self._vectors.pop(key, None)
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.stats["evictions"] += 1
+
+    def _live(self, key: str, now: float) -> Optional[Dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry["expires_at"] <= now:
+            self._drop(key)
+            self.stats["expired"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    # --- Public API ---
+    def lookup(self, messages: List[Dict], system_prompt: str, temperature: float) -> Optional[Dict]:
+        """Return a cached response dict (with a 'cached' tier marker) or None."""
+        key = cache_key(messages, system_prompt, temperature)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._live(key, now)
+            if entry is not None:
+                self.stats["exact_hits"] += 1
+                return dict(entry["response"], cached="exact")
+
+        question = self._first_turn_question(messages) if self.semantic_enabled else None
+        if question:
+            vector = self._embed(question)
+            if vector is not None:
+                scope = self._scope(system_prompt, temperature)
+                with self._lock:
+                    best_key, best_score = None, self.threshold
+                    for candidate_key, (candidate, candidate_scope) in self._vectors.items():
+                        if candidate_scope != scope:
+                            continue
+                        score = sum(a * b for a, b in zip(vector, candidate))
+                        if score >= best_score:
+                            best_key, best_score = candidate_key, score
+                    entry = self._live(best_key, now) if best_key else None
+                    if entry is not None:
+                        self.stats["semantic_hits"] += 1
+                        return dict(entry["response"], cached="semantic")
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def store(self, messages: List[Dict], system_prompt: str, temperature: float, response: Dict):
+        """Cache a successful response."""
+        if not response.get("success", False):
+            return
+        key = cache_key(messages, system_prompt, temperature)
+        cached = {k: v for k, v in response.items() if k != "cached"}
+        size = len(str(cached.get("content", "")).encode("utf-8")) + 256  # + dict overhead estimate
+
+        vector = None
+        question = self._first_turn_question(messages) if self.semantic_enabled else None
+        if question:
+            vector = self._embed(question)
+            if vector is not None:
+                size += len(vector) * 8
+
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = {"response": cached, "expires_at": time.monotonic() + self.ttl_s, "size": size}
+            self._bytes += size
+            if vector is not None:
+                self._vectors[key] = (vector, self._scope(system_prompt, temperature))
+                while len(self._vectors) > LLM_SEMANTIC_MAX_ENTRIES:
+                    self._vectors.pop(next(iter(self._vectors)))
+            self._evict()
+
+    def warm(self) -> bool:
+        """Load the embedding model now (startup warm-up). False if the semantic tier is off or failed."""
+        return self.semantic_enabled and self._embed("warm-up") is not None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._vectors.clear()
+            self._bytes = 0
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            lookups = self.stats["exact_hits"] + self.stats["semantic_hits"] + self.stats["misses"]
+            hits = lookups - self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "semantic_entries": len(self._vectors),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "semantic_enabled": self.semantic_enabled,
+            }
+
+
+# Singleton
+response_cache = LLMResponseCache()
@@ -4,15 +4,30 @@ Uses LiteLLM for unified API access to 100+ LLMs
 Never runs out of quota - automatically falls back between providers
 """
 import os
-from typing import Optional, List, Dict
+import time
+import asyncio
+from typing import Optional, List, Dict, AsyncIterator
 import litellm
-from litellm import completion
+from litellm import completion, acompletion
+from app.provider_health import provider_health
+from app.llm_cache import response_cache
 
 # Suppress verbose logging
 litellm.set_verbose = False
 
+# Max in-flight async LLM calls per worker (keeps us under provider RPM limits)
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "32"))
+
+# Hedged requests: if a provider is slower than its budget (default: its p90),
+# race it against the next healthy provider. Off unless LLM_HEDGING=1.
+LLM_HEDGING = os.environ.get("LLM_HEDGING", "0") == "1"
+LLM_HEDGE_DEFAULT_S = float(os.environ.get("LLM_HEDGE_DEFAULT_S", "3.0"))  # Until p90 is known
+LLM_HEDGE_MIN_S = float(os.environ.get("LLM_HEDGE_MIN_S", "0.5"))
+LLM_HEDGE_MAX_S = float(os.environ.get("LLM_HEDGE_MAX_S", "8.0"))
+
 # --- PROVIDER CONFIGURATION ---
 # Order matters: First available provider with quota wins
+# Optional "hedge_after_s" pins a provider's hedge budget instead of using its p90
 
 FALLBACK_MODELS = [
     # Tier 1: Groq (Fastest, Free tier has daily limits)
@@ -57,6 +72,7 @@ class LLMFactory:
     
     def __init__(self):
         self.available_models = []
+        self._semaphore = None  # Created lazily inside the running event loop
         self._setup_models()
     
     def _setup_models(self):
@@ -67,14 +83,138 @@ class LLMFactory:
                 self.available_models.append({
                     "model": model_config["model"],
                     "name": model_config["name"],
-                    "api_key": api_key
+                    "api_key": api_key,
+                    "hedge_after_s": model_config.get("hedge_after_s")
                 })
                 print(f"✅ LLM Provider Ready: {model_config['name']}")
         
         if not self.available_models:
             print("⚠️ WARNING: No LLM API keys found. Set GROQ_API_KEY, TOGETHER_API_KEY, or HF_TOKEN.")
     
-    def chat(self, messages: List[Dict], system_prompt: str = "", temperature: float = 0.7) -> Dict:
+    @staticmethod
+    def _build_messages(messages: List[Dict], system_prompt: str = "") -> List[Dict]:
+        """Prepend the system prompt to the conversation."""
+        full_messages = []
+        if system_prompt:
+            full_messages.append({"role": "system", "content": system_prompt})
+        full_messages.extend(messages)
+        return full_messages
+
+    @staticmethod
+    def _request_kwargs(model_info: Dict, full_messages: List[Dict], temperature: float,
+                        force_json: bool = True, json_mode: bool = False) -> Dict:
+        """Build the litellm call arguments for one provider."""
+        # FORCE JSON for fallback models (smaller models need explicit instruction)
+        is_fallback = force_json and "groq/llama-3.3-70b" not in model_info["model"] and "claude" not in model_info["model"]
+        
+        final_messages = list(full_messages) # Copy
+        if is_fallback:
+            force_json_msg = {
+                "role": "system", 
+                "content": "CRITICAL INSTRUCTION: You are a JSON-only API. You must return strictly valid JSON matching the defined tool schema. Do not ANY conversational text. Output ONLY the JSON object."
+            }
+            final_messages.append(force_json_msg)
+
+        kwargs = {
+            "model": model_info["model"],
+            "messages": final_messages,
+            "temperature": temperature if not is_fallback else 0.1, # Lower temp for JSON
+            "max_tokens": 2048,
+            "api_key": model_info["api_key"]
+        }
+        if json_mode:
+            # Provider-enforced JSON object; providers without it just drop the parameter
+            kwargs["response_format"] = {"type": "json_object"}
+            kwargs["drop_params"] = True
+        return kwargs
+
+    def _candidates(self, prefer: Optional[str] = None):
+        """
+        Providers to try for one request: open circuits skipped, fastest healthy first.
+        `prefer` (a litellm model id) moves that provider to the front if it is healthy.
+        """
+        ranked = provider_health.rank(self.available_models)
+        if prefer:
+            ranked.sort(key=lambda m: m["model"] != prefer)
+        for model_info in ranked:
+            if provider_health.acquire(model_info["name"]):
+                yield model_info
+
+    @staticmethod
+    def _record_success(model_info: Dict, started: float):
+        provider_health.record_success(model_info["name"], time.perf_counter() - started)
+
+    def _record_failure(self, model_info: Dict, error_msg: str) -> str:
+        print(f"❌ Failed: {model_info['name']} - {error_msg[:100]}")
+        kind = provider_health.record_failure(model_info["name"], error_msg)
+        if kind == "rate_limit":
+            print("   ↳ Rate limited, circuit opened, trying next provider...")
+        elif kind == "auth":
+            print("   ↳ Auth error, trying next provider...")
+            # A bad key is bad for every model that shares it (e.g. both Groq tiers)
+            for sibling in self.available_models:
+                if sibling is not model_info and sibling["api_key"] == model_info["api_key"]:
+                    provider_health.record_failure(sibling["name"], error_msg)
+        return kind
+
+    def health_snapshot(self) -> List[Dict]:
+        """Circuit state and latency stats per configured provider, in current ranking order."""
+        ranked = [m["name"] for m in provider_health.rank(self.available_models, allow_probe=False)]
+        stats = {s["name"]: s for s in provider_health.snapshot()}
+        snapshot = []
+        for model_info in self.available_models:
+            entry = stats.get(model_info["name"], {"name": model_info["name"]})
+            entry["model"] = model_info["model"]
+            entry["rank"] = ranked.index(model_info["name"]) + 1 if model_info["name"] in ranked else None
+            entry["hedge_budget_s"] = round(self._hedge_budget(model_info), 2)
+            snapshot.append(entry)
+        return snapshot
+
+    def validate_keys(self) -> Dict[str, str]:
+        """
+        Warm-up check: one 1-token completion per distinct API key (its first model).
+        Failures go through the circuit breaker, so a bad or exhausted key is skipped
+        by the first real request instead of being discovered by it.
+
+        Returns:
+            provider name -> "ok" or the failure kind ("rate_limit", "auth", "error");
+            providers sharing a key share the result
+        """
+        by_key: Dict[str, List[Dict]] = {}
+        for model_info in self.available_models:
+            by_key.setdefault(model_info["api_key"], []).append(model_info)
+
+        results = {}
+        for models in by_key.values():
+            model_info = models[0]
+            try:
+                started = time.perf_counter()
+                completion(model=model_info["model"], messages=[{"role": "user", "content": "ping"}],
+                           max_tokens=1, api_key=model_info["api_key"], timeout=10)
+                self._record_success(model_info, started)
+                outcome = "ok"
+            except Exception as e:
+                outcome = self._record_failure(model_info, str(e))
+            for sibling in models:
+                results[sibling["name"]] = outcome
+        return results
+
+    @staticmethod
+    def _exhausted(last_error: Optional[str]) -> Dict:
+        # All providers failed
+        return {
+            "content": f"⚠️ All LLM providers exhausted. Last error: {last_error}",
+            "model_used": "none",
+            "success": False
+        }
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+        return self._semaphore
+
+    def chat(self, messages: List[Dict], system_prompt: str = "", temperature: float = 0.7,
+             cache: bool = True) -> Dict:
         """
         Send chat completion request with automatic fallback.
         
@@ -82,72 +222,249 @@ class LLMFactory:
             messages: List of message dicts [{"role": "user", "content": "..."}]
             system_prompt: System instruction to prepend
             temperature: Creativity level (0-1)
+            cache: Serve/store through the response cache
         
         Returns:
             Response dict with 'content' and 'model_used' keys
         """
-        full_messages = []
-        if system_prompt:
-            full_messages.append({"role": "system", "content": system_prompt})
-        full_messages.extend(messages)
-        
+        if cache:
+            cached = response_cache.lookup(messages, system_prompt, temperature)
+            if cached:
+                print(f"⚡ Cache hit ({cached['cached']}): {cached['model_used']}")
+                return cached
+
+        full_messages = self._build_messages(messages, system_prompt)
         last_error = None
         
-        for model_info in self.available_models:
+        for model_info in self._candidates():
             try:
                 print(f"🔄 Trying: {model_info['name']}...")
-                
-                # FORCE JSON for fallback models (smaller models need explicit instruction)
-                is_fallback = "groq/llama-3.3-70b" not in model_info["model"] and "claude" not in model_info["model"]
-                
-                final_messages = list(full_messages) # Copy
-                if is_fallback:
-                    force_json_msg = {
-                        "role": "system", 
-                        "content": "CRITICAL INSTRUCTION: You are a JSON-only API. You must return strictly valid JSON matching the defined tool schema. Do not ANY conversational text. Output ONLY the JSON object."
-                    }
-                    final_messages.append(force_json_msg)
-
-                # Set API key for this provider
-                response = completion(
-                    model=model_info["model"],
-                    messages=final_messages,
-                    temperature=temperature if not is_fallback else 0.1, # Lower temp for JSON
-                    max_tokens=2048,
-                    api_key=model_info["api_key"]
-                )
+                started = time.perf_counter()
+                response = completion(**self._request_kwargs(model_info, full_messages, temperature))
                 
                 content = response.choices[0].message.content
+                self._record_success(model_info, started)
                 print(f"✅ Success: {model_info['name']}")
                 
-                return {
+                result = {
                     "content": content,
                     "model_used": model_info["name"],
                     "success": True
                 }
+                if cache:
+                    response_cache.store(messages, system_prompt, temperature, result)
+                return result
                 
             except Exception as e:
-                error_msg = str(e)
-                print(f"❌ Failed: {model_info['name']} - {error_msg[:100]}")
-                last_error = error_msg
-                
-                # Check for rate limit specifically
-                if "rate" in error_msg.lower() or "429" in error_msg:
-                    print("   ↳ Rate limited, trying next provider...")
-                    continue
-                elif "api_key" in error_msg.lower() or "unauthorized" in error_msg.lower():
-                    print("   ↳ Auth error, trying next provider...")
+                last_error = str(e)
+                self._record_failure(model_info, last_error)
+                continue
+        
+        return self._exhausted(last_error)
+
+    @staticmethod
+    async def _acache_lookup(messages: List[Dict], system_prompt: str, temperature: float) -> Optional[Dict]:
+        # The semantic tier runs an embedding model; keep it off the event loop
+        if response_cache.semantic_enabled:
+            return await asyncio.to_thread(response_cache.lookup, messages, system_prompt, temperature)
+        return response_cache.lookup(messages, system_prompt, temperature)
+
+    @staticmethod
+    async def _acache_store(messages: List[Dict], system_prompt: str, temperature: float, result: Dict):
+        if response_cache.semantic_enabled:
+            await asyncio.to_thread(response_cache.store, messages, system_prompt, temperature, result)
+        else:
+            response_cache.store(messages, system_prompt, temperature, result)
+
+    async def _attempt(self, model_info: Dict, full_messages: List[Dict], temperature: float,
+                       force_json: bool = True, json_mode: bool = False) -> Dict:
+        """One async provider call, with health bookkeeping. Raises on failure."""
+        try:
+            print(f"🔄 Trying (async): {model_info['name']}...")
+            started = time.perf_counter()
+            response = await acompletion(**self._request_kwargs(model_info, full_messages, temperature, force_json,
+                                                                json_mode))
+            
+            content = response.choices[0].message.content
+            self._record_success(model_info, started)
+            print(f"✅ Success: {model_info['name']}")
+            
+            return {
+                "content": content,
+                "model_used": model_info["name"],
+                "success": True
+            }
+        except asyncio.CancelledError:
+            # Lost a hedge race: not a failure, but free the half-open probe slot
+            provider_health.release(model_info["name"])
+            raise
+        except Exception as e:
+            self._record_failure(model_info, str(e))
+            raise
+
+    def _hedge_budget(self, model_info: Dict) -> float:
+        """Seconds to wait on a provider before hedging: explicit override, else its observed p90."""
+        if model_info.get("hedge_after_s") is not None:
+            return float(model_info["hedge_after_s"])
+        return provider_health.hedge_budget(
+            model_info["name"], LLM_HEDGE_DEFAULT_S, LLM_HEDGE_MIN_S, LLM_HEDGE_MAX_S
+        )
+
+    async def _hedged_attempt(self, primary: Dict, candidates, full_messages: List[Dict], temperature: float,
+                              force_json: bool = True, json_mode: bool = False) -> Dict:
+        """
+        Call `primary`; if it hasn't answered within its hedge budget, also call the
+        next healthy candidate. First success wins and the loser is cancelled.
+        """
+        primary_task = asyncio.create_task(self._attempt(primary, full_messages, temperature, force_json, json_mode))
+        done, _ = await asyncio.wait({primary_task}, timeout=self._hedge_budget(primary))
+        if done:
+            return primary_task.result()
+
+        backup = next(candidates, None)
+        if backup is None:
+            return await primary_task
+
+        print(f"⏱️ Hedging: {primary['name']} is slow, also trying {backup['name']}...")
+        provider_health.record_hedge_fired(primary["name"])
+        backup_task = asyncio.create_task(self._attempt(backup, full_messages, temperature, force_json, json_mode))
+
+        pending = {primary_task, backup_task}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup_task:
+                            provider_health.record_hedge_won(primary["name"])
+                        return task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        # Both failed; surface the backup's error (the more recent one)
+        raise backup_task.exception()
+
+    async def achat(self, messages: List[Dict], system_prompt: str = "", temperature: float = 0.7,
+                    hedge: Optional[bool] = None, cache: bool = True,
+                    prefer: Optional[str] = None, force_json: bool = True, json_mode: bool = False) -> Dict:
+        """
+        Async variant of chat() built on litellm.acompletion.
+        
+        Does not block the event loop while waiting on providers. The number of
+        concurrent provider calls per worker is capped by LLM_MAX_CONCURRENCY.
+        
+        Args:
+            hedge: Race a slow provider against the next healthy one
+                   (defaults to the LLM_HEDGING env setting)
+            cache: Serve/store through the response cache
+            prefer: litellm model id to try first (e.g. the cheap 8B tier for housekeeping)
+            force_json: Add the JSON-only instruction for small models (off for plain-text tasks)
+            json_mode: Ask the provider for a JSON object (response_format), e.g. for structured outlines
+        
+        Returns:
+            Same response dict as chat()
+        """
+        if cache:
+            cached = await self._acache_lookup(messages, system_prompt, temperature)
+            if cached:
+                print(f"⚡ Cache hit ({cached['cached']}): {cached['model_used']}")
+                return cached
+
+        full_messages = self._build_messages(messages, system_prompt)
+        hedge = LLM_HEDGING if hedge is None else hedge
+        last_error = None
+        
+        async with self._get_semaphore():
+            candidates = self._candidates(prefer)
+            for model_info in candidates:
+                try:
+                    if hedge:
+                        result = await self._hedged_attempt(model_info, candidates, full_messages, temperature,
+                                                            force_json, json_mode)
+                    else:
+                        result = await self._attempt(model_info, full_messages, temperature, force_json, json_mode)
+                    break
+                except Exception as e:
+                    last_error = str(e)
                     continue
-                else:
-                    # Unknown error, still try next
+            else:
+                return self._exhausted(last_error)
+
+        if cache:
+            await self._acache_store(messages, system_prompt, temperature, result)
+        return result
+
+    async def astream_chat(self, messages: List[Dict], system_prompt: str = "", temperature: float = 0.7,
+                           cache: bool = True) -> AsyncIterator[Dict]:
+        """
+        Streaming variant of achat().
+
+        Yields event dicts:
+            {"type": "delta", "text": "..."}  for every text chunk
+            {"type": "done", "content": ..., "model_used": ..., "success": bool}  once at the end
+
+        Falls back to the next provider only if the current one fails before
+        producing any text; a mid-stream failure ends the stream with what we have.
+        A cache hit is replayed as a single delta.
+        """
+        if cache:
+            cached = await self._acache_lookup(messages, system_prompt, temperature)
+            if cached:
+                print(f"⚡ Cache hit ({cached['cached']}): {cached['model_used']}")
+                yield {"type": "delta", "text": cached["content"]}
+                yield {"type": "done", **cached}
+                return
+
+        full_messages = self._build_messages(messages, system_prompt)
+        last_error = None
+
+        async with self._get_semaphore():
+            for model_info in self._candidates():
+                parts = []
+                try:
+                    print(f"🔄 Trying (stream): {model_info['name']}...")
+                    started = time.perf_counter()
+                    kwargs = self._request_kwargs(model_info, full_messages, temperature)
+                    stream = await acompletion(stream=True, **kwargs)
+
+                    async for chunk in stream:
+                        text = chunk.choices[0].delta.content if chunk.choices else None
+                        if text:
+                            parts.append(text)
+                            yield {"type": "delta", "text": text}
+
+                    self._record_success(model_info, started)
+                    print(f"✅ Success (stream): {model_info['name']}")
+                    result = {
+                        "content": "".join(parts),
+                        "model_used": model_info["name"],
+                        "success": True
+                    }
+                    if cache:
+                        await self._acache_store(messages, system_prompt, temperature, result)
+                    yield {"type": "done", **result}
+                    return
+
+                except Exception as e:
+                    last_error = str(e)
+                    self._record_failure(model_info, last_error)
+                    if parts:
+                        # Client already has partial text; don't splice in another model's answer
+                        yield {
+                            "type": "done",
+                            "content": "".join(parts),
+                            "model_used": model_info["name"],
+                            "success": True
+                        }
+                        return
                     continue
-        
-        # All providers failed
-        return {
-            "content": f"⚠️ All LLM providers exhausted. Last error: {last_error}",
-            "model_used": "none",
-            "success": False
-        }
+                finally:
+                    # A client disconnect closes this generator (GeneratorExit/CancelledError) without an
+                    # outcome; free the half-open probe slot or the provider is never probed again
+                    provider_health.release(model_info["name"])
+
+        yield {"type": "done", **self._exhausted(last_error)}
 
 
 # Global instance
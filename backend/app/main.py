@@ -1,34 +1,47 @@
+import io
 import os
 import json
+import asyncio
 import uuid
 import csv
+from contextlib import asynccontextmanager
 from typing import Dict, Any, List
-from fastapi import FastAPI
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, Request
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-from groq import Groq
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
 # Import Utils (Ensure these exist/work)
-from app.utils.media_generator import MediaGenerator
-from app.utils.image_generator import image_gen
-
-app = FastAPI(title="Sahayak.AI EduCore", version="2.0.0")
+from app.utils.image_cache import image_cache, image_key
+from app.session_store import session_store
+from app.context_packer import context_packer
+from app.tools.tool_parser import ToolCallScanner, parse_llm_output
+from app.tools.registry import tool_registry
+from app.jobs import job_queue, QueueFull
+from app.artifact_store import artifact_store
+from app.outline_cache import outline_cache
+from app.subsystems import subsystems
+from app.warmup import warmup
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Returns immediately: subsystems warm on background threads while /ready reports 503
+    warmup.start()
+    yield
+
+app = FastAPI(title="Sahayak.AI EduCore", version="2.0.0", lifespan=lifespan)
 
 # --- CONFIGURATION ---
 GROQ_API_KEY = os.environ.get("GROQ_API_KEY") 
 HF_TOKEN = os.environ.get("HF_TOKEN", "hf_...")       
 
-try:
-    groq_client = Groq(api_key=GROQ_API_KEY)
-except Exception as e:
-    print(f"Groq Init Warning: {e}")
-    groq_client = None
+if not GROQ_API_KEY:
+    print("Groq Init Warning: GROQ_API_KEY is not set")
 
 # Mount Frontend
 frontend_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "frontend")
@@ -70,24 +83,7 @@ You are **Sahayak**, an empathetic, intelligent, and pedagogical AI companion de
 
 **TOOL USAGE (JSON MODE)**
 To generate Media or Files, you MUST output a Single Valid JSON Block.
-JSON Schema:
-{
-  "tool_used": "mermaid" | "image_prompt" | "video_prompt" | "youtube_search" | "presentation" | "document" | "csv" | "docx" | "excel",
-  "data": <content_string_or_object>,
-  "metadata": { "topic": "summary", "audience_level": "child"|"teacher" }
-}
-
-**TOOLS AVALIABLE:**
-1. "mermaid": Flowcharts/Diagrams (graph TD).
-2. "image_prompt": Safe, Educational Image Generation.
-3. "video_prompt": Educational Video Generation.
-4. "youtube_search": Search Keyword (e.g., "Gravity for kids"). NEVER provide a URL.
-5. "presentation": Lesson Plan Slides.
-6. "document": PDF Handouts.
-7. "csv": Structured Data (CSV).
-8. "docx": Word Documents.
-9. "excel": Excel Spreadsheets.
-
+""" + tool_registry.prompt_section() + """
 **CAPABILITIES:**
 - **Math/Science**: Always use **LaTeX** for formulas ($$ E=mc^2 $$).
 - **Scope**: Adjust depth for UKG (Fun) to Graduate (Deep).
@@ -105,30 +101,40 @@ class QueryRequest(BaseModel):
     text: str
     user_id: str = "guest"
 
-# In-Memory Session Store
-SESSION_STORE = {}
+# In-Memory Session Store (bounded ring of recent turns per user, LRU/TTL evicted)
+SESSION_STORE = session_store
+
+def _start_turn(request: QueryRequest) -> List[Dict]:
+    """Record the user's message and return the history window for the LLM."""
+    # Add User Message to History
+    SESSION_STORE.append(request.user_id, "user", request.text)
+    
+    # Token-budgeted window + rolling summary of older turns
+    return context_packer.pack(request.user_id)
+
+
+def _finish_turn(user_id: str, response_data: Dict[str, Any]):
+    # Add AI Response to History
+    ai_text = str(response_data.get("data", ""))
+    SESSION_STORE.append(user_id, "assistant", ai_text)
+
+
+API_LIMIT_MESSAGE = "⚠️ **System Alert**: My daily AI fuel (API Limit) is exhausted. I cannot think right now.\n\nPlease update the `GROQ_API_KEY` in your Render settings with a fresh key (it's free!)."
+
 
 @app.post("/chat")
 async def chat_handler(request: QueryRequest):
-    if not groq_client:
+    if not GROQ_API_KEY:
         return {"tool_used": "text", "data": "Groq API Key missing.", "metadata": {}}
 
-    user_id = request.user_id
-    if user_id not in SESSION_STORE:
-        SESSION_STORE[user_id] = []
-    
-    # Add User Message to History
-    SESSION_STORE[user_id].append({"role": "user", "content": request.text})
-    
-    # Limit context window (last 10 messages)
-    history = SESSION_STORE[user_id][-10:]
+    history = _start_turn(request)
 
     try:
         # --- MULTI-LLM FALLBACK SYSTEM ---
         # Uses LiteLLM to cycle through providers when rate limited
-        from app.llm_factory import llm_factory
+        llm_factory = subsystems.get("llm")
         
-        llm_response = llm_factory.chat(
+        llm_response = await llm_factory.achat(
             messages=history,
             system_prompt=MASTER_PROMPT
         )
@@ -141,59 +147,12 @@ async def chat_handler(request: QueryRequest):
                 "metadata": {"model_used": "none"}
             }
         
-        content_str = llm_response["content"]
-        model_used = llm_response.get("model_used", "unknown")
-        # 3. Robust JSON Parsing (Handles "Here is the JSON: {...}")
-        import re
-        try:
-            # First, strip markdown code blocks if present
-            clean_str = content_str
-            if "```" in clean_str:
-                matches = re.findall(r"```(?:json)?(.*?)```", clean_str, re.DOTALL)
-                if matches:
-                    clean_str = matches[0].strip()
-            
-            # Find the JSON object
-            json_match = re.search(r'\{.*\}', clean_str, re.DOTALL)
-            parsed_json = None
-            
-            if json_match:
-                try:
-                    parsed_json = json.loads(json_match.group(0))
-                except:
-                    parsed_json = None
-            
-            if parsed_json and "tool_used" in parsed_json:
-                data = parsed_json
-            else:
-                # If no Valid JSON tool structure found, treat entire string as text.
-                # Crucially, ensure we don't accidentally send a JSON-looking string as 'data' if it was meant to be the structure.
-                # But since we failed to parse it as structure, it must be content.
-                data = {"tool_used": "text", "data": content_str}
-                
-        except Exception as e:
-            print(f"JSON Parse Logic Error: {e}. Fallback to text.")
-            data = {"tool_used": "text", "data": content_str}
+        response_data = parse_llm_output(llm_response["content"])
 
-        # --- TOOL INTERCEPTIONS (Runs regardless of JSON success/fail) ---
-        response_data = data
-        
-        try:
-            # Youtube Search: Real Backend Execution
-            if response_data.get("tool_used") == "youtube_search":
-                query = response_data.get("data", "")
-                print(f"Executing Deep YouTube Search for: {query}")
-                from app.utils.video_search import video_searcher
-                results = video_searcher.search(query)
-                # Replace string query with rich object
-                response_data["data"] = results 
-        except Exception as e:
-            print(f"Tool Execution Error: {e}")
-            # Keep original data if tool fails
+        # --- TOOL EXECUTION (async, per-tool deadlines) ---
+        response_data = await tool_registry.run(response_data)
 
-        # Add AI Response to History
-        ai_text = str(response_data.get("data", ""))
-        SESSION_STORE[user_id].append({"role": "assistant", "content": ai_text})
+        _finish_turn(request.user_id, response_data)
         
         print(f"DEBUG RESPONSE: {json.dumps(response_data)}") # DEBUG LOG
         return response_data
@@ -203,124 +162,201 @@ async def chat_handler(request: QueryRequest):
         # Final Fallback: Mock Mode (When API is totally dead)
         return {
             "tool_used": "text", 
-            "data": "⚠️ **System Alert**: My daily AI fuel (API Limit) is exhausted. I cannot think right now.\n\nPlease update the `GROQ_API_KEY` in your Render settings with a fresh key (it's free!).", 
+            "data": API_LIMIT_MESSAGE, 
             "metadata": {}
         }
 
+
+def _sse(event: str, payload: Any) -> str:
+    """Format one Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+@app.post("/chat/stream")
+async def chat_stream_handler(request: QueryRequest):
+    """
+    Streaming /chat over SSE.
+
+    Emits `delta` events ({"text": ...}) while the model writes prose, then a
+    single `final` event carrying the same payload /chat would have returned.
+    If the output opens like a JSON tool call, deltas are held back and only
+    the structured `final` event is sent.
+    """
+    if not GROQ_API_KEY:
+        async def missing_key():
+            yield _sse("final", {"tool_used": "text", "data": "Groq API Key missing.", "metadata": {}})
+        return StreamingResponse(missing_key(), media_type="text/event-stream")
+
+    history = _start_turn(request)
+
+    async def event_stream():
+        llm_factory = subsystems.get("llm")
+
+        scanner = ToolCallScanner()  # Incremental tool-call detection over the deltas
+        pending = ""       # Text received but not yet forwarded
+        forwarding = None  # None = undecided, True = prose, False = tool call
+        try:
+            async for event in llm_factory.astream_chat(messages=history, system_prompt=MASTER_PROMPT):
+                if event["type"] == "delta":
+                    scanner.feed(event["text"])
+                    if forwarding is False:
+                        continue
+                    pending += event["text"]
+                    if forwarding is None:
+                        if scanner.opens_structured is None:
+                            continue
+                        forwarding = not scanner.opens_structured
+                        if not forwarding:
+                            continue
+                    yield _sse("delta", {"text": pending})
+                    pending = ""
+                    continue
+
+                # type == "done"
+                if not event.get("success", False):
+                    yield _sse("final", {
+                        "tool_used": "text",
+                        "data": event["content"],
+                        "metadata": {"model_used": "none"}
+                    })
+                    return
+
+                response_data = parse_llm_output(event["content"], scanner.finish())
+                response_data = await tool_registry.run(response_data)
+                _finish_turn(request.user_id, response_data)
+                yield _sse("final", response_data)
+
+        except Exception as e:
+            print(f"Stream Critical Error: {e}")
+            yield _sse("final", {"tool_used": "text", "data": API_LIMIT_MESSAGE, "metadata": {}})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # --- MEDIA ENDPOINTS ---
 
-# ... imports
-from app.utils.video_generator import video_gen
+IMAGE_CACHE_CONTROL = "public, max-age=604800, immutable"  # Same prompt -> same image for a week
+_PLACEHOLDER_PNG = None
 
-# ... (Previous code)
+def _placeholder_png() -> bytes:
+    global _PLACEHOLDER_PNG
+    if _PLACEHOLDER_PNG is None:
+        buffer = io.BytesIO()
+        subsystems.get("image_gen").placeholder(buffer)
+        _PLACEHOLDER_PNG = buffer.getvalue()
+    return _PLACEHOLDER_PNG
 
 @app.get("/generate/image")
-async def generate_image_endpoint(prompt: str):
-    filename = f"img_{uuid.uuid4()}.png"
-    filepath = os.path.join("/tmp", filename)
+async def generate_image_endpoint(prompt: str, request: Request):
+    etag = f'"{image_key(prompt)}"'
+    if etag in request.headers.get("if-none-match", ""):
+        # The browser already holds this prompt's image: skip generation entirely
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": IMAGE_CACHE_CONTROL})
     try:
-        image_gen.generate(prompt, filepath)
-        return FileResponse(filepath, media_type="image/png")
-    except:
-        return FileResponse(filepath)
+        _, filepath = await asyncio.to_thread(image_cache.get_or_create, prompt)
+        return FileResponse(filepath, media_type="image/png",
+                            headers={"ETag": etag, "Cache-Control": IMAGE_CACHE_CONTROL})
+    except Exception as e:
+        print(f"Image Generation Error: {e}")
+        # Placeholder is never cached, by us or the browser, and is served from memory
+        return Response(_placeholder_png(), media_type="image/png", headers={"Cache-Control": "no-store"})
 
 @app.get("/generate/video")
 async def generate_video_endpoint(prompt: str):
-    filename = f"vid_{uuid.uuid4()}.mp4"
-    filepath = os.path.join("/tmp", filename)
+    """Legacy one-shot endpoint: runs as a background job and awaits it without blocking the loop."""
+    try:
+        job = job_queue.submit("video", prompt)
+    except QueueFull:
+        return JSONResponse({"error": "Video queue is full, try again shortly"}, status_code=429,
+                            headers={"Retry-After": "30"})
     try:
-        # Generate video (Blocking, might take 30s+)
-        video_gen.generate(prompt, filepath)
-        return FileResponse(filepath, media_type="video/mp4")
-    except:
+        await asyncio.wrap_future(job.future)
+        if job.status != "done":
+            raise RuntimeError(job.error)
+        return FileResponse(job.output_path, media_type="video/mp4")
+    except Exception:
         # Fallback or Error
         return JSONResponse({"error": "Video generation failed"}, status_code=500)
 
+class JobRequest(BaseModel):
+    prompt: str
+@app.post("/jobs/video", status_code=202)
+async def submit_video_job(request: JobRequest):
+    try:
+        job = job_queue.submit("video", request.prompt)
+    except QueueFull:
+        return JSONResponse({"error": "Video queue is full, try again shortly"}, status_code=429,
+                            headers={"Retry-After": "30"})
+    return {**job_queue.status(job), "poll_url": f"/jobs/{job.id}"}
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        return JSONResponse({"error": "Unknown or expired job"}, status_code=404)
+    return job_queue.status(job)
+
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        return JSONResponse({"error": "Unknown or expired job"}, status_code=404)
+    status = job_queue.status(job)
+    if status["status"] == "failed":
+        return JSONResponse(status, status_code=500)
+    if status["status"] != "done":
+        return JSONResponse(status, status_code=409)
+    if not os.path.exists(job.output_path):
+        # Reclaimed by artifact GC/quota before it was fetched
+        return JSONResponse({**status, "error": "Result expired"}, status_code=410)
+    return FileResponse(job.output_path, media_type="video/mp4")
+
+PPTX_MEDIA_TYPE = 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
+
+def _document_response(kind: str, data: bytes, media_type: str, filename: str):
+    """Small documents go straight from memory; big ones through the artifact store (quota + GC)."""
+    if artifact_store.serve_inline(data):
+        return Response(data, media_type=media_type,
+                        headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+    filepath = artifact_store.put_bytes(kind, data, filename.rsplit(".", 1)[-1])
+    return FileResponse(filepath, media_type=media_type, filename=filename)
+
 class PDFRequest(BaseModel):
     title: str
     content: str
 @app.post("/download/pdf")
 async def download_pdf(request: PDFRequest):
     filename = f"lesson_{uuid.uuid4()}.pdf"
-    filepath = os.path.join("/tmp", filename)
-    MediaGenerator.generate_pdf(request.title, request.content, filepath)
-    return FileResponse(filepath, media_type='application/pdf', filename=filename)
+    data = await asyncio.to_thread(subsystems.get("media").generate_pdf, request.title, request.content)
+    return _document_response("pdf", data, 'application/pdf', filename)
 
 class PPTRequest(BaseModel):
     title: str
     slides: List[Dict] = []
+    audience: str = "Students"
+    language: str = "English"
 @app.post("/download/ppt")
 async def download_ppt(request: PPTRequest):
     filename = f"pres_{uuid.uuid4()}.pptx"
-    filepath = os.path.join("/tmp", filename)
     
-    # SMART PPT: If no slides provided, generate them!
+    # SMART PPT: If no slides provided, generate them (cached per title/audience/language)
     slides_data = request.slides
     if not slides_data:
         print(f"Generating Smart PPT content for: {request.title}")
         try:
-            # Generate content using Groq
-            ppt_prompt = f"""
-            Create a 5-slide educational presentation structure for the topic: '{request.title}'.
-            Audience: Students.
-            Output JSON ONLY:
-            [
-                {{"title": "Introduction", "content": ["Point 1", "Point 2"]}},
-                {{"title": "Key Concept 1", "content": ["Detail A", "Detail B"]}}
-            ]
-            """
-            completion = groq_client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=[{"role": "user", "content": ppt_prompt}],
-                response_format={"type": "json_object"}
-            )
-            # Custom parsing to handle potential deviations
-            content_str = completion.choices[0].message.content
-            print(f"DEBUG PPT JSON: {content_str[:100]}...") # Log first 100 chars
-            
-            try:
-                data = json.loads(content_str)
-                # Normalize data to List[Dict]
-                if isinstance(data, list):
-                    slides_data = data
-                elif isinstance(data, dict):
-                    if "slides" in data and isinstance(data["slides"], list):
-                        slides_data = data["slides"]
-                    else:
-                        # Values dump
-                        for k, v in data.items():
-                            if isinstance(v, list):
-                                slides_data = v
-                                break
-                
-                # Validation: Ensure it looks like slides
-                valid_slides = []
-                for s in slides_data:
-                    if isinstance(s, dict) and 'title' in s:
-                        # Ensure content is string or list
-                        if 'content' not in s: s['content'] = []
-                        valid_slides.append(s)
-                
-                if valid_slides:
-                    slides_data = valid_slides
-                else:
-                    raise ValueError("No valid slides found in JSON")
-                    
-            except Exception as parse_err:
-                print(f"PPT Parsing Error: {parse_err}")
-                # Fallback structure
-                slides_data = [
-                    {"title": request.title, "content": ["AI generated content structure failed.", "Using fallback mode."]},
-                    {"title": "Summary", "content": ["Topic: " + request.title]}
-                ]
-
+            slides_data, cached = await outline_cache.get(request.title, request.audience, request.language)
+            if cached:
+                print(f"⚡ Outline cache hit: {request.title}")
         except Exception as e:
             print(f"Smart PPT Gen Critical Error: {e}")
             slides_data = [{"title": request.title, "content": ["Content generation failed.", "Check logs."]}]
 
     try:
-        MediaGenerator.generate_pptx(request.title, slides_data, filepath)
-        return FileResponse(filepath, media_type='application/vnd.openxmlformats-officedocument.presentationml.presentation', filename=filename)
+        data = await asyncio.to_thread(subsystems.get("media").generate_pptx, request.title, slides_data)
+        return _document_response("ppt", data, PPTX_MEDIA_TYPE, filename)
     except Exception as e:
          print(f"PPTX Creation Error: {e}")
          return JSONResponse({"error": str(e)}, status_code=500)
@@ -331,4 +367,48 @@ async def root_redirect():
 
 @app.get("/health")
 def health_check():
+    """Liveness only: the process is up. Use /ready for routing."""
     return {"status": "ok"}
+
+@app.get("/ready")
+def readiness_check():
+    """Per-subsystem warm-up state and duration; 503 until the required subsystems are usable."""
+    status = warmup.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+@app.get("/health/llm")
+def llm_health():
+    """Per-provider circuit state, p50 latency and success rate (ranked), plus response cache stats."""
+    llm_factory = subsystems.get("llm")
+    from app.llm_cache import response_cache
+    return {"providers": llm_factory.health_snapshot(), "cache": response_cache.metrics()}
+
+@app.get("/health/sessions")
+def sessions_health():
+    """Session store size, byte usage and eviction counters."""
+    return {**SESSION_STORE.metrics(), "summaries": context_packer.stats}
+
+@app.get("/health/jobs")
+def jobs_health():
+    """Background job queue depth, worker count and outcome counters."""
+    return job_queue.metrics()
+
+@app.get("/health/images")
+def images_health():
+    """Image cache size, hit/miss counters and coalesced generations."""
+    return image_cache.metrics()
+
+@app.get("/health/outlines")
+def outlines_health():
+    """Smart PPT outline cache size and hit/miss counters."""
+    return outline_cache.metrics()
+
+@app.get("/health/subsystems")
+def subsystems_health():
+    """Which heavy subsystems are loaded, how long each took, and the last load error."""
+    return subsystems.status()
+
+@app.get("/health/artifacts")
+def artifacts_health():
+    """Bytes and files held per artifact kind, against quota, plus GC counters."""
+    return artifact_store.metrics()
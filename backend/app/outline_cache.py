@@ -0,0 +1,164 @@
+"""
+Outline Cache - Persistent cache of Smart PPT slide outlines
+"Download PPT" with no slides used to ask the 70B model for a fresh 5-slide
+outline on every click, straight through the Groq SDK (no fallback, no circuit
+breaker). Outlines are now keyed by normalized title + audience + language,
+kept on disk with a TTL, and generated through LLMFactory on a miss. Repeat
+downloads need no LLM call; concurrent first downloads of a title share one.
+"""
+import os
+import re
+import asyncio
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+from app.tools.tool_parser import extract_json
+from app.utils.persistent_cache import PersistentTTLCache
+
+OUTLINE_CACHE_TTL_S = float(os.environ.get("OUTLINE_CACHE_TTL_S", str(30 * 24 * 3600)))
+OUTLINE_MODEL = os.environ.get("OUTLINE_MODEL", "groq/llama-3.3-70b-versatile")
+OUTLINE_SLIDES = 5
+
+_WHITESPACE = re.compile(r"\s+")
+
+OUTLINE_PROMPT = """Create a {n}-slide educational presentation structure for the topic: '{title}'.
+Audience: {audience}.
+Language: {language} (slide titles and points in this language).
+Output JSON ONLY:
+{{"slides": [
+    {{"title": "Introduction", "content": ["Point 1", "Point 2"]}},
+    {{"title": "Key Concept 1", "content": ["Detail A", "Detail B"]}}
+]}}"""
+
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE.sub(" ", text).strip().strip("?!.,").lower()
+
+
+def outline_key(title: str, audience: str, language: str) -> str:
+    """'Photosynthesis!' / 'photosynthesis' for the same audience and language share an entry."""
+    raw = "|".join(_normalize(part) for part in (title, audience, language))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def parse_outline(content: str) -> List[Dict]:
+    """
+    Slides from the model's JSON: a bare list, {"slides": [...]}, or any list value,
+    also when wrapped in a ``` fence or prose. Raises ValueError if nothing slide-shaped is found.
+    """
+    data = extract_json(content)
+    slides = []
+    if isinstance(data, list):
+        slides = data
+    elif isinstance(data, dict):
+        if isinstance(data.get("slides"), list):
+            slides = data["slides"]
+        else:
+            slides = next((v for v in data.values() if isinstance(v, list)), [])
+
+    valid = []
+    for s in slides:
+        if isinstance(s, dict) and 'title' in s:
+            s.setdefault('content', [])  # Ensure content is string or list
+            valid.append(s)
+    if not valid:
+        raise ValueError("No valid slides found in JSON")
+    return valid
+
+
+def fallback_outline(title: str) -> List[Dict]:
+    """Served (never cached) when generation fails, so the download still works."""
+    return [
+        {"title": title, "content": ["AI generated content structure failed.", "Using fallback mode."]},
+        {"title": "Summary", "content": ["Topic: " + title]},
+    ]
+
+
+class OutlineCache:
+    def __init__(self, cache: Optional[PersistentTTLCache] = None, llm=None):
+        """
+        Args:
+            cache: Backing store (defaults to $SAHAYAK_CACHE_DIR/ppt_outlines.sqlite3)
+            llm: Object with LLMFactory's async achat() (defaults to the llm_factory singleton)
+        """
+        self._cache = cache
+        self._llm = llm
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {"hits": 0, "misses": 0, "shared": 0, "failures": 0}
+
+    @property
+    def cache(self) -> PersistentTTLCache:
+        if self._cache is None:
+            self._cache = PersistentTTLCache("ppt_outlines", max_age_s=OUTLINE_CACHE_TTL_S)
+        return self._cache
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            from app.llm_factory import llm_factory
+            self._llm = llm_factory
+        return self._llm
+
+    async def get(self, title: str, audience: str = "Students", language: str = "English") -> Tuple[List[Dict], bool]:
+        """(slides, from_cache). Failed generations return the fallback outline and aren't stored."""
+        key = outline_key(title, audience, language)
+        try:
+            cached = await asyncio.to_thread(self.cache.get, key)
+        except Exception as e:
+            print(f"Outline Cache Error: {e}")
+            cached = None
+        if cached is not None:
+            self.stats["hits"] += 1
+            return cached[0], True
+
+        # Concurrent first downloads of the same outline wait on one generation
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.stats["shared"] += 1
+            return await asyncio.shield(pending), False
+
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            slides = await self._generate(key, title, audience, language)
+            future.set_result(slides)
+            return slides, False
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved: waiters may not exist
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _generate(self, key: str, title: str, audience: str, language: str) -> List[Dict]:
+        prompt = OUTLINE_PROMPT.format(n=OUTLINE_SLIDES, title=title, audience=audience, language=language)
+        response = await self.llm.achat(
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.7,
+            cache=False,  # This cache is the durable one; don't double-store in the response cache
+            prefer=OUTLINE_MODEL,
+            json_mode=True,
+        )
+        if not response.get("success"):
+            print(f"Smart PPT Gen Error: {response.get('content')}")
+            self.stats["failures"] += 1
+            return fallback_outline(title)
+        try:
+            slides = parse_outline(response["content"])
+        except Exception as parse_err:
+            print(f"PPT Parsing Error: {parse_err}")
+            self.stats["failures"] += 1
+            return fallback_outline(title)
+        try:
+            await asyncio.to_thread(self.cache.set, key, slides)
+        except Exception as e:
+            print(f"Outline Cache Error: {e}")
+        return slides
+
+    def metrics(self) -> Dict:
+        return {"entries": len(self.cache), "ttl_s": OUTLINE_CACHE_TTL_S, **self.stats}
+
+
+# Singleton
+outline_cache = OutlineCache()
@@ -0,0 +1,240 @@
+"""
+Provider Health - Circuit Breaker + Latency Ranking for LLMFactory
+Tracks per-provider outcomes so we stop paying for calls that are bound to fail
+(e.g. Groq daily quota exhausted) and prefer the fastest healthy provider.
+
+States:
+    closed     -> requests flow normally
+    open       -> provider skipped until its cooldown expires
+    half_open  -> cooldown expired, exactly one probe request is let through
+"""
+import os
+import time
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Cooldowns (seconds). Rate limits back off exponentially up to the max.
+RATE_LIMIT_COOLDOWN = float(os.environ.get("LLM_RATE_LIMIT_COOLDOWN", "30"))
+AUTH_COOLDOWN = float(os.environ.get("LLM_AUTH_COOLDOWN", "600"))
+ERROR_COOLDOWN = float(os.environ.get("LLM_ERROR_COOLDOWN", "15"))
+MAX_COOLDOWN = float(os.environ.get("LLM_MAX_COOLDOWN", "900"))
+# With every circuit open, at most one early probe per this many seconds
+EARLY_PROBE_INTERVAL = float(os.environ.get("LLM_EARLY_PROBE_INTERVAL", "15"))
+
+# Generic errors only trip the circuit after this many in a row
+ERROR_THRESHOLD = 3
+# Samples needed before a provider's latency is trusted for ranking
+MIN_SAMPLES = 5
+WINDOW = 50
+
+
+def classify_error(error_msg: str) -> str:
+    """Bucket a provider exception message into rate_limit / auth / error."""
+    msg = error_msg.lower()
+    if "429" in msg or "rate limit" in msg or "ratelimit" in msg or "rate_limit" in msg or "quota" in msg:
+        return "rate_limit"
+    if "api_key" in msg or "unauthorized" in msg or "401" in msg or "invalid key" in msg or "authentication" in msg:
+        return "auth"
+    return "error"
+
+
+class ProviderHealth:
+    """Rolling stats and circuit state for a single provider."""
+
+    def __init__(self, name: str, window: int = WINDOW):
+        self.name = name
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)  # True = success
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.cooldown = 0.0
+        self.trips = 0                 # Consecutive times the circuit opened (for backoff)
+        self.consecutive_errors = 0
+        self.probe_in_flight = False
+        self.early_probe = False       # Granted one call before the cooldown ends (all circuits open)
+        self.last_error: Optional[str] = None
+        self.hedges_fired = 0          # Times this provider was slow enough to trigger a hedge
+        self.hedges_won = 0            # ...and the hedge answered first
+
+    def reopens_at(self) -> float:
+        return self.opened_at + self.cooldown
+
+    def available(self, now: float) -> bool:
+        """Could a request be sent now? (Does not claim the half-open probe.)"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            return self.early_probe or now >= self.reopens_at()
+        return not self.probe_in_flight
+
+    def acquire(self, now: float) -> bool:
+        """Claim the right to call this provider; half-open admits a single probe."""
+        if not self.available(now):
+            return False
+        if self.state != CLOSED:
+            self.state = HALF_OPEN
+            self.probe_in_flight = True
+            self.early_probe = False
+        return True
+
+    def record_success(self, latency: float):
+        self.latencies.append(latency)
+        self.outcomes.append(True)
+        self.state = CLOSED
+        self.trips = 0
+        self.consecutive_errors = 0
+        self.probe_in_flight = False
+
+    def record_failure(self, kind: str, error_msg: str, now: float):
+        self.outcomes.append(False)
+        self.last_error = error_msg[:200]
+        self.probe_in_flight = False
+        self.consecutive_errors += 1
+
+        if kind == "rate_limit":
+            base = RATE_LIMIT_COOLDOWN
+        elif kind == "auth":
+            base = AUTH_COOLDOWN
+        elif self.consecutive_errors >= ERROR_THRESHOLD or self.state == HALF_OPEN:
+            base = ERROR_COOLDOWN
+        else:
+            return
+
+        self.trips += 1
+        self.cooldown = min(base * (2 ** (self.trips - 1)), MAX_COOLDOWN)
+        self.opened_at = now
+        self.state = OPEN
+
+    def p50(self) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[len(ordered) // 2]
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+    def success_rate(self) -> float:
+        if not self.outcomes:
+            return 1.0
+        return sum(self.outcomes) / len(self.outcomes)
+
+    def expected_cost(self) -> Optional[float]:
+        """p50 latency inflated by failure rate; None until enough samples exist."""
+        if len(self.latencies) < MIN_SAMPLES:
+            return None
+        return self.p50() / max(self.success_rate(), 0.05)
+
+    def snapshot(self, now: float) -> Dict:
+        p50 = self.p50()
+        return {
+            "name": self.name,
+            "state": self.state,
+            "p50_ms": round(p50 * 1000) if p50 is not None else None,
+            "success_rate": round(self.success_rate(), 3),
+            "samples": len(self.outcomes),
+            "cooldown_remaining_s": round(max(self.reopens_at() - now, 0), 1) if self.state == OPEN else 0,
+            "last_error": self.last_error,
+            "hedges_fired": self.hedges_fired,
+            "hedges_won": self.hedges_won,
+        }
+
+
+class ProviderHealthRegistry:
+    """Health state for every provider, plus dynamic ordering."""
+
+    def __init__(self):
+        self._providers: Dict[str, ProviderHealth] = {}
+        self._lock = threading.Lock()
+        self._last_early_probe = float("-inf")
+
+    def get(self, name: str) -> ProviderHealth:
+        with self._lock:
+            if name not in self._providers:
+                self._providers[name] = ProviderHealth(name)
+            return self._providers[name]
+
+    def rank(self, models: List[Dict], now: Optional[float] = None, allow_probe: bool = True) -> List[Dict]:
+        """
+        Return the providers that may be called right now, best first.
+
+        Providers with enough samples are ordered by expected cost (p50 / success
+        rate); the rest keep their configured FALLBACK_MODELS order after them.
+        If every circuit is open, the provider that cools down soonest is offered
+        as an early probe so a burst of 429s can't lock the app out completely,
+        at most once per EARLY_PROBE_INTERVAL; its cooldown (and backoff) is left
+        as is (pass allow_probe=False for read-only views).
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            healths = [self._providers.setdefault(m["name"], ProviderHealth(m["name"])) for m in models]
+            allowed = [(i, m, h) for i, (m, h) in enumerate(zip(models, healths)) if h.available(now)]
+
+            if not allowed and models and allow_probe:
+                i, h = min(enumerate(healths), key=lambda pair: pair[1].reopens_at())
+                if not h.probe_in_flight and now - self._last_early_probe >= EARLY_PROBE_INTERVAL:
+                    self._last_early_probe = now
+                    h.early_probe = True
+                    return [models[i]]
+                return []
+
+        def sort_key(item):
+            index, _, health = item
+            cost = health.expected_cost()
+            return (cost is None, cost if cost is not None else 0.0, index)
+
+        return [m for _, m, _ in sorted(allowed, key=sort_key)]
+
+    def acquire(self, name: str, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return self._providers.setdefault(name, ProviderHealth(name)).acquire(now)
+
+    def release(self, name: str):
+        """Give back a half-open probe slot without recording an outcome (e.g. cancelled call)."""
+        with self._lock:
+            self._providers.setdefault(name, ProviderHealth(name)).probe_in_flight = False
+
+    def hedge_budget(self, name: str, default: float, floor: float, ceiling: float) -> float:
+        """Observed p90 latency clamped to [floor, ceiling]; `default` until sampled."""
+        with self._lock:
+            health = self._providers.setdefault(name, ProviderHealth(name))
+            if len(health.latencies) < MIN_SAMPLES:
+                return default
+            return min(max(health.percentile(0.9), floor), ceiling)
+
+    def record_hedge_fired(self, name: str):
+        with self._lock:
+            self._providers.setdefault(name, ProviderHealth(name)).hedges_fired += 1
+
+    def record_hedge_won(self, name: str):
+        with self._lock:
+            self._providers.setdefault(name, ProviderHealth(name)).hedges_won += 1
+
+    def record_success(self, name: str, latency: float):
+        with self._lock:
+            self._providers.setdefault(name, ProviderHealth(name)).record_success(latency)
+
+    def record_failure(self, name: str, error_msg: str, now: Optional[float] = None) -> str:
+        now = time.monotonic() if now is None else now
+        kind = classify_error(error_msg)
+        with self._lock:
+            self._providers.setdefault(name, ProviderHealth(name)).record_failure(kind, error_msg, now)
+        return kind
+
+    def snapshot(self) -> List[Dict]:
+        now = time.monotonic()
+        with self._lock:
+            return [h.snapshot(now) for h in self._providers.values()]
+
+
+# Singleton
+provider_health = ProviderHealthRegistry()
@@ -0,0 +1,164 @@
+"""
+BM25 - In-memory inverted index kept next to the Chroma vectors for hybrid retrieval
+MiniLM similarity blurs exact curriculum terms: a chapter name like "Jugs and
+Mugs" or a Hindi keyword like "भिन्न" is a handful of tokens in a 384-dim
+average, so the right chunk often loses to a generic one. BM25 scores those
+rare terms highly (IDF) and fuses with the vector score in RAGStore.search().
+
+Postings are precomputed (term -> {doc id: term frequency}) and updated as the
+store writes, so a query only touches the posting lists of its own terms.
+Metadata filters (grade/topic/type/...) are pushed down: each (field, value) has
+its own id set, the sets are intersected first, and only those documents are
+scored. Only FILTER_FIELDS can be filtered on, and values compare as strings
+({"grade": 5} == {"grade": "5"}); normalize_filters() is shared by every
+backend so Chroma and the memmap index agree with this one.
+
+Persisted as JSON next to the index; see RAGStore.lexical for how it is
+validated and rebuilt.
+"""
+import os
+import re
+import json
+import math
+import heapq
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# \w misses Indic vowel signs and viramas (category M), which would split "संख्याएँ" apart
+_TOKEN = re.compile(r"[\w\u0900-\u0DFF]+")
+FILTER_FIELDS = ("grade", "topic", "type", "subject", "board", "source")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def filter_value(field: str, value) -> str:
+    """Canonical form of one filter condition's value; raises ValueError for a field no backend indexes."""
+    if field not in FILTER_FIELDS:
+        raise ValueError(f"Cannot filter on '{field}': filterable metadata fields are {', '.join(FILTER_FIELDS)}")
+    return str(value)
+
+
+def normalize_filters(filters: Optional[Dict]) -> Dict[str, str]:
+    """{"grade": 5, "type": None} -> {"grade": "5"} (None = no condition)."""
+    return {field: filter_value(field, value) for field, value in (filters or {}).items() if value is not None}
+
+
+def filterable(metadata: Optional[Dict]) -> Optional[Dict]:
+    """Metadata as stored: FILTER_FIELDS values as strings, so typed stores (Chroma) match string filters."""
+    if not metadata:
+        return metadata
+    return {k: str(v) if k in FILTER_FIELDS and v is not None else v for k, v in metadata.items()}
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.lengths: Dict[str, int] = {}
+        self.metadata: Dict[str, Dict] = {}
+        self._fields: Dict[Tuple[str, str], Set[str]] = {}  # (field, value) -> doc ids
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.lengths
+
+    def add(self, doc_id: str, text: str, metadata: Optional[Dict] = None):
+        """Index (or re-index) one document."""
+        if doc_id in self.lengths:
+            self.remove(doc_id)
+        terms = Counter(tokenize(text))
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+        self._add_doc(doc_id, sum(terms.values()), metadata or {})
+
+    def _add_doc(self, doc_id: str, length: int, metadata: Dict):
+        self.lengths[doc_id] = length
+        self._total_length += length
+        self.metadata[doc_id] = metadata
+        for field in FILTER_FIELDS:
+            if metadata.get(field) is not None:
+                self._fields.setdefault((field, str(metadata[field])), set()).add(doc_id)
+
+    def remove(self, doc_id: str):
+        self.remove_many([doc_id])
+
+    def remove_many(self, doc_ids: Iterable[str]):
+        """Drop documents. Postings don't record which terms a document has, so this scans them once
+        per call (deletes are rare, queries are not)."""
+        doc_ids = set(doc_ids) & set(self.lengths)
+        if not doc_ids:
+            return
+        for doc_id in doc_ids:
+            self._total_length -= self.lengths.pop(doc_id)
+            metadata = self.metadata.pop(doc_id)
+            for field in FILTER_FIELDS:
+                ids = self._fields.get((field, str(metadata.get(field))))
+                if ids is not None:
+                    ids.discard(doc_id)
+        for term in list(self.postings):
+            docs = self.postings[term]
+            for doc_id in doc_ids.intersection(docs):
+                del docs[doc_id]
+            if not docs:
+                del self.postings[term]
+
+    def candidates(self, filters: Optional[Dict]) -> Optional[Set[str]]:
+        """Ids matching every filter (exact match), or None when there are no filters."""
+        active = normalize_filters(filters)
+        if not active:
+            return None
+        sets = [self._fields.get((field, value), set()) for field, value in active.items()]
+        sets.sort(key=len)
+        return set(sets[0]).intersection(*sets[1:])
+
+    def search(self, text: str, k: int = 10, filters: Optional[Dict] = None) -> List[Tuple[str, float]]:
+        """Top-k (doc id, BM25 score), best first; only documents passing `filters` are scored."""
+        allowed = self.candidates(filters)
+        if allowed is not None and not allowed:
+            return []
+        n = len(self.lengths)
+        if n == 0:
+            return []
+        avg_length = self._total_length / n
+        k1, b = self.k1, self.b
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(text)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1.0 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            if allowed is None:
+                matches = docs.items()
+            elif len(allowed) < len(docs):
+                matches = ((d, docs[d]) for d in allowed if d in docs)
+            else:
+                matches = ((d, tf) for d, tf in docs.items() if d in allowed)
+            for doc_id, tf in matches:
+                norm = k1 * (1.0 - b + b * self.lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1.0) / (tf + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def save(self, path: str):
+        """Atomic write (a crash mid-save leaves the previous file)."""
+        data = {"k1": self.k1, "b": self.b, "postings": self.postings,
+                "lengths": self.lengths, "metadata": self.metadata}
+        tmp = path + ".part"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls(data["k1"], data["b"])
+        index.postings = data["postings"]
+        for doc_id, length in data["lengths"].items():
+            index._add_doc(doc_id, length, data["metadata"].get(doc_id) or {})
+        return index
@@ -0,0 +1,241 @@
+"""
+Embeddings - One MiniLM embedder per process, shared by the RAG store and the LLM semantic cache
+Loading sentence-transformers takes seconds and ~100MB, so it must never be
+constructed per query (the old RAG path did exactly that).
+
+EMBEDDING_BACKEND=onnx runs the same model through onnxruntime instead of
+full-precision PyTorch, from a local export (by default the int8 dynamically
+quantized one):
+    python -m app.rag.embeddings prepare     # fetch the ONNX export + tokenizer, write model_int8.onnx
+It needs `onnxruntime` + `tokenizers` (and `onnx` for the quantization step)
+but not torch, pads each batch only to its longest text, and:
+    - coalesces concurrent embed_query() calls into one model run (QueryBatcher),
+    - keeps an LRU of recent query embeddings (teachers repeat questions).
+benchmarks/bench_embeddings.py measures the speedup and the drift against the
+PyTorch (or fp32) baseline.
+"""
+import os
+import sys
+import time
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch")  # torch | onnx
+EMBEDDING_ONNX_PATH = os.environ.get(
+    "EMBEDDING_ONNX_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "models", "all-MiniLM-L6-v2"))
+EMBEDDING_ONNX_FILE = os.environ.get("EMBEDDING_ONNX_FILE", "model_int8.onnx")  # model.onnx = fp32
+EMBEDDING_THREADS = int(os.environ.get("EMBEDDING_THREADS", "0"))  # 0 = onnxruntime default (all cores)
+EMBEDDING_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_MAX_TOKENS = 256  # all-MiniLM-L6-v2's max_seq_length
+QUERY_BATCH_MAX = int(os.environ.get("EMBEDDING_QUERY_BATCH", "16"))
+QUERY_BATCH_WAIT_MS = float(os.environ.get("EMBEDDING_QUERY_WAIT_MS", "1"))
+QUERY_CACHE_SIZE = int(os.environ.get("EMBEDDING_QUERY_CACHE", "1024"))
+
+_embedder = None
+_lock = threading.Lock()
+
+
+def _length_groups(texts: List[str]) -> List[List[str]]:
+    """Split length-sorted texts so padding to a group's longest text adds at most ~25%."""
+    groups: List[List[str]] = []
+    for text in texts:
+        if groups and len(text) <= 1.25 * len(groups[-1][0]) + 8:
+            groups[-1].append(text)
+        else:
+            groups.append([text])
+    return groups
+
+
+class QueryBatcher:
+    """
+    Coalesces concurrent single-text requests into batched encode() calls on one
+    background thread. Requests that arrive while the model is busy queue up and
+    go together in the next run (split by length, as every text in a run is padded
+    to the longest); a lone request waits at most `wait_ms` for company.
+    """
+
+    def __init__(self, encode: Callable[[List[str]], object], max_batch: int = QUERY_BATCH_MAX,
+                 wait_ms: float = QUERY_BATCH_WAIT_MS):
+        self.encode = encode
+        self.max_batch = max_batch
+        self.wait_s = wait_ms / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "batches": 0, "largest_batch": 0}
+
+    def submit(self, text: str) -> Future:
+        future = Future()
+        self._queue.put((text, future))
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name="embed-batcher", daemon=True)
+                    self._thread.start()
+        return future
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.wait_s
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+            texts = sorted(set(text for text, _ in batch), key=len)  # Identical concurrent queries run once
+            try:
+                vectors = {}
+                for group in _length_groups(texts):
+                    vectors.update(zip(group, self.encode(group)))
+                for text, future in batch:
+                    future.set_result(vectors[text])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            self.stats["requests"] += len(batch)
+            self.stats["batches"] += 1
+            self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+
+
+class OnnxEmbeddings:
+    def __init__(self, path: str = EMBEDDING_ONNX_PATH, model_file: str = EMBEDDING_ONNX_FILE,
+                 threads: int = EMBEDDING_THREADS, batch_size: int = EMBEDDING_BATCH_SIZE,
+                 max_tokens: int = EMBEDDING_MAX_TOKENS, cache_size: int = QUERY_CACHE_SIZE,
+                 query_batch: int = QUERY_BATCH_MAX, query_wait_ms: float = QUERY_BATCH_WAIT_MS):
+        """
+        Args:
+            path: Folder with the ONNX model(s) and tokenizer.json
+            model_file: Model inside `path`; falls back to model.onnx (fp32) if missing
+            threads: onnxruntime intra-op threads (0 = default)
+            batch_size: Texts per model run in embed_documents()
+            cache_size: Query embeddings kept in the LRU (0 = off)
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_path = os.path.join(path, model_file)
+        if not os.path.exists(model_path) and os.path.exists(os.path.join(path, "model.onnx")):
+            print(f"Embeddings: {model_file} not in {path}, using model.onnx (fp32)")
+            model_path = os.path.join(path, "model.onnx")
+        self.model_path = model_path
+        self.tokenizer = Tokenizer.from_file(os.path.join(path, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_tokens)
+        self.tokenizer.no_padding()  # Padded per batch in _encode
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        outputs = [o.name for o in self.session.get_outputs()]
+        self._output = "last_hidden_state" if "last_hidden_state" in outputs else outputs[0]
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._batcher = QueryBatcher(self._encode, query_batch, query_wait_ms)
+        self.stats = {"queries": 0, "cache_hits": 0, "documents": 0}
+
+    def _encode(self, texts: List[str]):
+        """Mean-pooled, L2-normalised sentence vectors (what sentence-transformers returns for MiniLM)."""
+        import numpy as np
+        encodings = self.tokenizer.encode_batch(texts)
+        width = max(1, max(len(e.ids) for e in encodings))
+        ids = np.zeros((len(texts), width), dtype=np.int64)
+        mask = np.zeros((len(texts), width), dtype=np.int64)
+        for row, encoding in enumerate(encodings):
+            ids[row, :len(encoding.ids)] = encoding.ids
+            mask[row, :len(encoding.ids)] = 1
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(ids)
+        hidden = self.session.run([self._output], feeds)[0]
+        weights = mask[..., None].astype(hidden.dtype)
+        pooled = (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1.0)
+        return pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Similar lengths share a batch, so little compute goes to padding
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            rows = order[start:start + self.batch_size]
+            for i, vector in zip(rows, self._encode([texts[i] for i in rows])):
+                vectors[i] = vector.tolist()
+        self.stats["documents"] += len(texts)
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        self.stats["queries"] += 1
+        if self.cache_size:
+            with self._cache_lock:
+                if text in self._cache:
+                    self._cache.move_to_end(text)
+                    self.stats["cache_hits"] += 1
+                    return list(self._cache[text])
+        vector = self._batcher.submit(text).result().tolist()
+        if self.cache_size:
+            with self._cache_lock:
+                self._cache[text] = vector
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return list(vector)
+
+    def metrics(self) -> Dict:
+        return {"model": self.model_path, **self.stats, "batcher": self._batcher.stats,
+                "cached_queries": len(self._cache)}
+
+
+def get_embedder():
+    """LangChain-style embedder (embed_documents / embed_query), loaded on first call."""
+    global _embedder
+    if _embedder is None:
+        with _lock:
+            if _embedder is None:
+                if EMBEDDING_BACKEND == "onnx":
+                    try:
+                        _embedder = OnnxEmbeddings()
+                    except Exception as e:
+                        print(f"Embeddings: ONNX backend unavailable ({e}), using PyTorch")
+                if _embedder is None:
+                    from langchain_huggingface import HuggingFaceEmbeddings
+                    _embedder = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+    return _embedder
+
+
+def quantize_onnx_model(source: str, target: str):
+    """int8 dynamic quantization of the weights (activations stay float); needs the `onnx` package."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    quantize_dynamic(source, target, weight_type=QuantType.QInt8)
+
+
+def prepare_onnx_model(target_dir: str = EMBEDDING_ONNX_PATH, repo: str = EMBEDDING_MODEL):
+    """Fetch the model's ONNX export and tokenizer into `target_dir` and quantize it (build step)."""
+    from huggingface_hub import hf_hub_download
+    os.makedirs(target_dir, exist_ok=True)
+    for remote, local in (("onnx/model.onnx", "model.onnx"), ("tokenizer.json", "tokenizer.json")):
+        dest = os.path.join(target_dir, local)
+        if not os.path.exists(dest):
+            os.replace(hf_hub_download(repo, remote, local_dir=target_dir), dest)
+            print(f"Downloaded {repo}/{remote}")
+    quantize_onnx_model(os.path.join(target_dir, "model.onnx"), os.path.join(target_dir, "model_int8.onnx"))
+    print(f"Wrote {os.path.join(target_dir, 'model_int8.onnx')}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["prepare"]:
+        prepare_onnx_model()
+    else:
+        print("Usage: python -m app.rag.embeddings prepare")
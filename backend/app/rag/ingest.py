@@ -0,0 +1,364 @@
+"""
+Ingest - Batched, parallel curriculum ingestion into the persistent RAG index
+Loads NCERT / state-board textbooks (PDF, .txt, .md) into the Chroma store:
+
+    files -> pages -> ~1200-char overlapping chunks (+ grade/subject/topic/page metadata)
+          -> embedded in large batches on a process pool -> written incrementally
+
+Grade, subject and topic come from the folder layout, e.g.
+    ncert/class-4/maths/fractions.pdf  ->  grade "4", subject "maths", topic "fractions"
+and can be overridden per run (--grade/--subject/--board).
+
+Workers only extract, chunk and embed; the parent is the single Chroma writer.
+After each file is written its content hash and chunk ids go into a manifest
+(atomically), so an interrupted run resumes where it stopped and a re-run only
+processes new or changed files. Chunks of a changed file that no longer exist
+are deleted; --prune also drops files that were removed from disk.
+
+    python -m app.rag.ingest data/ncert --workers 4
+    python -m app.rag.ingest data/maharashtra/class-5 --board Maharashtra --prune
+"""
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import importlib
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Iterator, List, Optional, Tuple
+
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+INGEST_BATCH_SIZE = int(os.environ.get("INGEST_BATCH_SIZE", "256"))      # Chunks per embedding call
+INGEST_TASK_BYTES = int(os.environ.get("INGEST_TASK_BYTES", str(4 * 1024 * 1024)))  # Small files share a task
+CHUNK_CHARS = int(os.environ.get("INGEST_CHUNK_CHARS", "1200"))
+CHUNK_OVERLAP = int(os.environ.get("INGEST_CHUNK_OVERLAP", "150"))
+DEFAULT_EMBEDDER = "app.rag.embeddings:get_embedder"
+SUPPORTED_EXTENSIONS = (".pdf", ".txt", ".md")
+
+GRADE_DIR = re.compile(r"^(?:class|grade|std|standard)[-_ ]?(\d{1,2})$", re.I)
+_SENTENCE_END = re.compile(r"(?<=[.!?।])\s+")   # Includes the Devanagari danda
+_WHITESPACE = re.compile(r"[ \t\r\f\v]+")
+
+
+# --- Reading and chunking ---
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def infer_metadata(relpath: str, overrides: Optional[Dict] = None) -> Dict:
+    """grade / subject / topic from a path like 'ncert/class-4/maths/fractions.pdf'."""
+    parts = relpath.replace("\\", "/").split("/")
+    folders, filename = parts[:-1], parts[-1]
+    metadata = {"source": relpath.replace("\\", "/"),
+                "topic": re.sub(r"[-_]+", " ", os.path.splitext(filename)[0]).strip()}
+    for i, folder in enumerate(folders):
+        match = GRADE_DIR.match(folder)
+        if match:
+            metadata["grade"] = str(int(match.group(1)))
+            if i + 1 < len(folders):
+                metadata["subject"] = folders[i + 1].lower()
+            break
+    else:
+        if len(folders) > 1:
+            metadata["subject"] = folders[-1].lower()
+    metadata.update({k: v for k, v in (overrides or {}).items() if v})
+    return metadata
+
+
+def iter_pages(path: str) -> Iterator[Tuple[Optional[int], str]]:
+    """(page number, text) one page at a time; plain-text files are a single page-less block."""
+    if path.lower().endswith(".pdf"):
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            raise RuntimeError("PDF ingestion needs pypdf (pip install pypdf)")
+        reader = PdfReader(path)
+        for number, page in enumerate(reader.pages, 1):
+            yield number, page.extract_text() or ""
+    else:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            yield None, f.read()
+
+
+def chunk_text(text: str, size: int = CHUNK_CHARS, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    """
+    Greedy paragraph/sentence packing up to `size` characters. Each chunk starts
+    with the last ~`overlap` characters of the previous one so an idea split at
+    a boundary is still retrievable from either side.
+    """
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = _WHITESPACE.sub(" ", paragraph.replace("\n", " ")).strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= size:
+            pieces.append(paragraph)
+            continue
+        for sentence in _SENTENCE_END.split(paragraph):
+            # A "sentence" longer than a chunk (tables, OCR noise) is cut hard
+            pieces.extend(sentence[i:i + size] for i in range(0, len(sentence), size))
+
+    chunks, current = [], ""
+    for piece in pieces:
+        if current and len(current) + 1 + len(piece) > size:
+            chunks.append(current)
+            tail = current[-overlap:] if overlap else ""
+            current = tail[tail.find(" ") + 1:] if " " in tail else tail  # Start the overlap on a word
+        current = f"{current} {piece}".strip() if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def chunk_id(source: str, text: str) -> str:
+    """Hash of source + chunk text: re-ingesting unchanged text keeps its id, and files never share ids."""
+    return hashlib.sha256(f"{source}\0{text}".encode("utf-8")).hexdigest()
+
+
+# --- Pool workers ---
+
+_worker_embedder = None
+
+
+def _load_embedder(factory):
+    if callable(factory):
+        return factory()
+    module_name, attribute = factory.split(":")
+    return getattr(importlib.import_module(module_name), attribute)()
+
+
+def _init_worker(factory, single_threaded: bool = False):
+    """
+    Runs once per pool worker: one embedder each. Spawned processes pass single_threaded=True
+    to pin BLAS/onnxruntime to one thread (the pool is the parallelism); the in-process
+    thread worker must not, as os.environ there is the whole app's.
+    """
+    global _worker_embedder
+    if single_threaded:
+        os.environ.setdefault("OMP_NUM_THREADS", "1")
+        os.environ.setdefault("EMBEDDING_THREADS", "1")  # onnxruntime ignores OMP_NUM_THREADS
+        os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    _worker_embedder = _load_embedder(factory)
+
+
+def _process_files(files: List[Tuple[str, str, Dict]], batch_size: int) -> List[Dict]:
+    """Extract, chunk and embed a group of files. A broken file is reported, not fatal to the group."""
+    results, texts = [], []
+    for path, key, metadata in files:
+        result = {"key": key, "ids": [], "texts": [], "metadatas": [], "error": None}
+        seen = set()
+        try:
+            for page, page_text in iter_pages(path):
+                for text in chunk_text(page_text):
+                    cid = chunk_id(key, text)
+                    if cid in seen:
+                        continue  # Running headers/footers repeated on every page
+                    seen.add(cid)
+                    result["ids"].append(cid)
+                    result["texts"].append(text)
+                    result["metadatas"].append({**metadata, "page": page} if page else dict(metadata))
+        except Exception as e:
+            result = {"key": key, "ids": [], "texts": [], "metadatas": [], "error": f"{type(e).__name__}: {e}"}
+        results.append(result)
+        texts.extend(result["texts"])
+
+    # One embedding call per `batch_size` chunks across the whole group (small files batch together)
+    vectors = []
+    for start in range(0, len(texts), batch_size):
+        vectors.extend(_worker_embedder.embed_documents(texts[start:start + batch_size]))
+    offset = 0
+    for result in results:
+        count = len(result["texts"])
+        result["embeddings"] = [list(map(float, v)) for v in vectors[offset:offset + count]]
+        offset += count
+    return results
+
+
+# --- Manifest ---
+
+class Manifest:
+    """key -> {"sha256", "chunks": [ids], "ingested_at"}; saved atomically after every file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.path)
+
+
+# --- Pipeline ---
+
+def _scan(paths: List[str]) -> Iterator[Tuple[str, str]]:
+    """(absolute path, manifest key) for supported files; keys are relative to the given root, incl. its name."""
+    for root in paths:
+        root = os.path.abspath(root)
+        if os.path.isfile(root):
+            yield root, os.path.basename(root)
+            continue
+        base = os.path.dirname(root)
+        for directory, subdirs, files in os.walk(root):
+            subdirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    path = os.path.join(directory, name)
+                    yield path, os.path.relpath(path, base).replace(os.sep, "/")
+
+
+def _group(files: List[Tuple[str, str, Dict]], task_bytes: int) -> List[List[Tuple[str, str, Dict]]]:
+    """Pack small files together up to `task_bytes`; a big textbook is a task of its own."""
+    groups, current, current_bytes = [], [], 0
+    for item in files:
+        size = os.path.getsize(item[0])
+        if current and current_bytes + size > task_bytes:
+            groups.append(current)
+            current, current_bytes = [], 0
+        current.append(item)
+        current_bytes += size
+    if current:
+        groups.append(current)
+    return groups
+
+
+def ingest(paths: List[str], store=None, manifest_path: Optional[str] = None, workers: int = INGEST_WORKERS,
+           batch_size: int = INGEST_BATCH_SIZE, task_bytes: int = INGEST_TASK_BYTES,
+           overrides: Optional[Dict] = None, prune: bool = False, embedder=DEFAULT_EMBEDDER,
+           executor: Optional[Executor] = None) -> Dict:
+    """
+    Ingest files/folders into `store` (defaults to the rag_store singleton).
+
+    Args:
+        manifest_path: Resume manifest (defaults to <store dir>/ingest_manifest.json)
+        workers: Pool processes; 1 runs in a single background thread
+        embedder: Callable (or "module:callable") returning the embedder, called once per worker
+        executor: Pre-built executor whose workers already ran _init_worker (tests)
+
+    Returns:
+        Counters: files seen/skipped/ingested/failed, chunks written/deleted, seconds
+    """
+    if store is None:
+        from app.rag.store import rag_store
+        store = rag_store
+    manifest = Manifest(manifest_path or os.path.join(store.path, "ingest_manifest.json"))
+    stats = {"files_seen": 0, "files_skipped": 0, "files_ingested": 0, "files_failed": 0,
+             "chunks_written": 0, "chunks_deleted": 0}
+    started = time.perf_counter()
+
+    # 1. Only new or changed files are processed
+    todo, seen, digests = [], set(), {}
+    for path, key in _scan(paths):
+        stats["files_seen"] += 1
+        seen.add(key)
+        digest = file_hash(path)
+        entry = manifest.entries.get(key)
+        if entry and entry["sha256"] == digest:
+            stats["files_skipped"] += 1
+            continue
+        todo.append((path, key, infer_metadata(key, overrides)))
+        digests[key] = digest
+
+    if prune:
+        roots = {k.split("/", 1)[0] for k in seen} | {os.path.basename(os.path.abspath(p)) for p in paths}
+        for key in [k for k in manifest.entries if k.split("/", 1)[0] in roots and k not in seen]:
+            stale = manifest.entries.pop(key).get("chunks", [])
+            store.delete(stale)
+            stats["chunks_deleted"] += len(stale)
+        manifest.save()
+
+    # 2. Extract + embed on the pool, write here as each group finishes
+    if todo:
+        own_executor = executor is None
+        if own_executor:
+            if workers <= 1:
+                executor = ThreadPoolExecutor(max_workers=1, initializer=_init_worker, initargs=(embedder,))
+            else:
+                # spawn: each worker imports the embedder fresh instead of inheriting a forked copy
+                executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                               initializer=_init_worker, initargs=(embedder, True))
+        try:
+            groups = iter(_group(todo, task_bytes))
+            in_flight = set()
+            max_in_flight = max(2, workers * 2)  # Bounded: embeddings of a whole corpus never sit in memory
+            while True:
+                while len(in_flight) < max_in_flight:
+                    group = next(groups, None)
+                    if group is None:
+                        break
+                    in_flight.add(executor.submit(_process_files, group, batch_size))
+                if not in_flight:
+                    break
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for result in future.result():
+                        _commit(result, digests[result["key"]], store, manifest, stats)
+        finally:
+            if own_executor:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    store.save_lexical()  # Once per run; a killed run is detected and rebuilt on next open
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    return stats
+
+
+def _commit(result: Dict, digest: str, store, manifest: Manifest, stats: Dict):
+    """Write one file's chunks, drop its stale ones, then record it (a crash before this line = redo the file)."""
+    key = result["key"]
+    entry = manifest.entries.get(key, {})
+    if result["error"]:
+        print(f"Ingest: {key} failed ({result['error']})")  # Not recorded: retried on the next run
+        stats["files_failed"] += 1
+        return
+    if result["ids"]:
+        store.add_embedded(result["ids"], result["texts"], result["embeddings"], result["metadatas"])
+    stale = sorted(set(entry.get("chunks", [])) - set(result["ids"]))
+    if stale:
+        store.delete(stale)  # Paragraphs edited out of a changed file
+    manifest.entries[key] = {"sha256": digest, "chunks": result["ids"],
+                             "ingested_at": time.time()}
+    manifest.save()
+    stats["files_ingested"] += 1
+    stats["chunks_written"] += len(result["ids"])
+    stats["chunks_deleted"] += len(stale)
+    print(f"Ingest: {key} ({len(result['ids'])} chunks)")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Ingest curriculum PDFs/text into the RAG index")
+    parser.add_argument("paths", nargs="+", help="Files or folders (folder layout gives grade/subject/topic)")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    parser.add_argument("--grade")
+    parser.add_argument("--subject")
+    parser.add_argument("--board")
+    parser.add_argument("--prune", action="store_true", help="Delete chunks of files no longer on disk")
+    parser.add_argument("--manifest", help="Manifest path (default: next to the index)")
+    args = parser.parse_args(argv)
+
+    stats = ingest(args.paths, manifest_path=args.manifest, workers=args.workers, batch_size=args.batch_size,
+                   overrides={"grade": args.grade, "subject": args.subject, "board": args.board},
+                   prune=args.prune)
+    processed = stats["files_ingested"] + stats["files_failed"]
+    rate = processed / stats["seconds"] if stats["seconds"] else 0.0
+    print(json.dumps(stats))
+    print(f"{processed} files in {stats['seconds']:.1f}s ({rate:.1f} docs/s, "
+          f"{stats['chunks_written'] / max(stats['seconds'], 1e-9):.0f} chunks/s)")
+    return 1 if stats["files_failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
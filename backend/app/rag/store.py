@@ -1,49 +1,310 @@
-import chromadb
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
-from langchain_core.documents import Document
+"""
+RAG Store - Persistent Chroma index of teaching knowledge, one per process
+query_rag() used to rebuild everything per query: load MiniLM, embed every
+document and recreate the collection in an in-memory chromadb.Client(). That
+cost seconds each time. Now:
+    - the index lives on disk ($RAG_DIR) and is opened once per process,
+    - documents are keyed by a hash of their content, so re-ingesting the same
+      text (e.g. the seed set on every boot) is a cheap id lookup, and only new
+      text is embedded,
+    - the embedder is the shared MiniLM instance (app/rag/embeddings.py).
+A query is then one embedding plus an HNSW lookup: milliseconds.
+
+search() is the hybrid retriever: a BM25 inverted index (app/rag/bm25.py) is
+kept in step with every write, both sides are asked for candidates with the
+grade/topic/type filters applied up front (Chroma `where` / BM25 id sets), and
+the scores are fused:
+    score = RAG_HYBRID_ALPHA * cosine + (1 - RAG_HYBRID_ALPHA) * bm25 / best bm25
+alpha 1.0 is pure vector, 0.0 pure keyword. benchmarks/bench_rag_hybrid.py
+reports recall@k and latency to tune it.
+
+Chroma's on-disk format is single-process; with several gunicorn workers give
+each its own RAG_DIR or build the index once at deploy time. RAG_BACKEND=numpy
+swaps Chroma for a memory-mapped float16/int8 matrix (app/rag/vector_index.py):
+less RAM, near-instant open, and workers share it through the page cache.
+"""
 import os
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+from app.rag.bm25 import BM25Index, filterable, normalize_filters
+from app.utils.persistent_cache import CACHE_DIR
 
-# Initialize persistent client (or in-memory for MVP)
-client = chromadb.Client()
+RAG_DIR = os.environ.get("RAG_DIR", os.path.join(CACHE_DIR, "chroma"))
+RAG_COLLECTION = os.environ.get("RAG_COLLECTION", "sahayak_knowledge")
+RAG_BACKEND = os.environ.get("RAG_BACKEND", "chroma")  # chroma | numpy
+RAG_WRITE_BATCH = 1000  # Rows per Chroma call (it rejects very large batches)
+RAG_HYBRID_ALPHA = float(os.environ.get("RAG_HYBRID_ALPHA", "0.5"))  # Weight of the vector score
+RAG_CANDIDATES = int(os.environ.get("RAG_CANDIDATES", "20"))  # Per side, before fusion
 
 # Sample Knowledge Base for MVP (Sunita's Scenario)
-docs = [
-    Document(
-        page_content="Teaching Subtraction with Zero: Use the 'Money Exchange' analogy. 10 Rupees note can be changed into 10 coins of 1 Rupee. Similarly 1 Ten is 10 Ones. Don't say 'borrow', say 'regroup' or 'exchange'.",
-        metadata={"topic": "subtraction", "grade": "4", "type": "pedagogy"}
-    ),
-    Document(
-        page_content="Classroom Noise Control: Use a 'Call and Response'. When teacher says 'One Two Three', students say 'Eyes on me'. Make it a game. Reward the quietest row with a star.",
-        metadata={"topic": "discipline", "type": "management"}
-    ),
-    Document(
-        page_content="Multi-grade Engagement: Give the older group (Class 5) a self-work worksheet while you teach concepts to the younger group (Class 4). Use peer-learning leaders.",
-        metadata={"topic": "multi-grade", "type": "management"}
-    )
+SEED_DOCS = [
+    {
+        "content": "Teaching Subtraction with Zero: Use the 'Money Exchange' analogy. 10 Rupees note can be changed into 10 coins of 1 Rupee. Similarly 1 Ten is 10 Ones. Don't say 'borrow', say 'regroup' or 'exchange'.",
+        "metadata": {"topic": "subtraction", "grade": "4", "type": "pedagogy"},
+    },
+    {
+        "content": "Classroom Noise Control: Use a 'Call and Response'. When teacher says 'One Two Three', students say 'Eyes on me'. Make it a game. Reward the quietest row with a star.",
+        "metadata": {"topic": "discipline", "type": "management"},
+    },
+    {
+        "content": "Multi-grade Engagement: Give the older group (Class 5) a self-work worksheet while you teach concepts to the younger group (Class 4). Use peer-learning leaders.",
+        "metadata": {"topic": "multi-grade", "type": "management"},
+    },
 ]
 
-# Simple setup function
-def get_vector_store():
-    # In a real app, this would load from disk. For MVP, we re-create/load.
-    try:
-        # Use Open Source Embeddings (runs on CPU, no API key needed)
-        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-        
-        vectorstore = Chroma.from_documents(
-            documents=docs,
-            embedding=embeddings,
-            collection_name="sahayak_knowledge"
-        )
-        return vectorstore
-    except Exception as e:
-        print(f"RAG Init Error: {e}")
+NO_CONTEXT = "No Context Available (Offline/Mock Mode)"
+
+
+def doc_id(content: str) -> str:
+    """Content hash used as the Chroma id: same text -> same id -> never embedded twice."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def chroma_where(filters: Optional[Dict]) -> Optional[Dict]:
+    """Normalized filters ({"grade": "4"}) -> Chroma `where`."""
+    clauses = [{field: value} for field, value in (filters or {}).items()]
+    if not clauses:
         return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+class RAGStore:
+    def __init__(self, path: str = RAG_DIR, collection_name: str = RAG_COLLECTION, embedder=None,
+                 backend: str = RAG_BACKEND):
+        """
+        Args:
+            path: Directory of the persistent index
+            collection_name: Chroma collection (or sub-folder of the numpy index)
+            embedder: Object with embed_documents()/embed_query() (defaults to the shared MiniLM)
+            backend: "chroma" or "numpy" (memory-mapped MemmapIndex)
+        """
+        if backend not in ("chroma", "numpy"):
+            raise ValueError(f"RAG_BACKEND must be chroma or numpy, not {backend}")
+        self.path = path
+        self.collection_name = collection_name
+        self.backend = backend
+        self._embedder = embedder
+        self._collection = None
+        self._lexical = None
+        self._lexical_dirty = False
+        self._seeded = False
+        self._lock = threading.Lock()
+        self._lexical_lock = threading.RLock()
+        self.stats = {"queries": 0, "embedded": 0, "already_indexed": 0, "lexical_rebuilds": 0}
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            from app.rag.embeddings import get_embedder
+            self._embedder = get_embedder()
+        return self._embedder
+
+    @property
+    def collection(self):
+        """Opened once; an existing index is loaded from disk, not rebuilt."""
+        if self._collection is None:
+            with self._lock:
+                if self._collection is None and self.backend == "numpy":
+                    from app.rag.vector_index import MemmapIndex
+                    self._collection = MemmapIndex(os.path.join(self.path, self.collection_name))
+                elif self._collection is None:
+                    import chromadb
+                    from chromadb.config import Settings
+                    os.makedirs(self.path, exist_ok=True)
+                    client = chromadb.PersistentClient(path=self.path, settings=Settings(anonymized_telemetry=False))
+                    self._collection = client.get_or_create_collection(
+                        self.collection_name, metadata={"hnsw:space": "cosine"})
+        return self._collection
+
+    @property
+    def lexical_path(self) -> str:
+        return os.path.join(self.path, f"bm25_{self.collection_name}.json")
+
+    @property
+    def lexical(self):
+        """
+        The BM25 index, loaded from disk. It is rebuilt from Chroma's documents when the file is
+        missing, unreadable or holds a different number of documents than the collection
+        (e.g. an ingest run that was killed before save_lexical()).
+        """
+        if self._lexical is None:
+            with self._lexical_lock:
+                if self._lexical is None:
+                    index = None
+                    if os.path.exists(self.lexical_path):
+                        try:
+                            index = BM25Index.load(self.lexical_path)
+                        except (OSError, ValueError, KeyError) as e:
+                            print(f"RAG: BM25 index unreadable ({e}), rebuilding")
+                    if index is None or len(index) != self.count():
+                        index = self._rebuild_lexical(BM25Index())
+                    self._lexical = index
+        return self._lexical
+
+    def _rebuild_lexical(self, index):
+        offset = 0
+        while True:
+            page = self.collection.get(include=["documents", "metadatas"], limit=RAG_WRITE_BATCH, offset=offset)
+            for i, text, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+                index.add(i, text or "", metadata)
+            if len(page["ids"]) < RAG_WRITE_BATCH:
+                break
+            offset += RAG_WRITE_BATCH
+        self.stats["lexical_rebuilds"] += 1
+        self._lexical_dirty = True
+        self.save_lexical(index)
+        return index
+
+    def _index_lexical(self, ids: List[str], texts: List[str], metadatas: List[Optional[Dict]]):
+        with self._lexical_lock:
+            lexical = self.lexical
+            lexical.remove_many([i for i in ids if i in lexical])  # One postings scan for all re-written ids
+            for i, text, metadata in zip(ids, texts, metadatas):
+                lexical.add(i, text, metadata)
+            self._lexical_dirty = True
+
+    def save_lexical(self, index=None):
+        """Persist the BM25 index if it changed (after seeding / at the end of an ingest run)."""
+        with self._lexical_lock:
+            index = index or self._lexical
+            if index is not None and self._lexical_dirty:
+                os.makedirs(self.path, exist_ok=True)
+                index.save(self.lexical_path)
+                self._lexical_dirty = False
 
-def query_rag(query: str, k: int = 2):
-    store = get_vector_store()
-    if not store:
-        return "No Context Available (Offline/Mock Mode)"
-        
-    results = store.similarity_search(query, k=k)
-    return "\n\n".join([doc.page_content for doc in results])
+    def upsert(self, docs: List[Dict]) -> int:
+        """
+        Add {"content", "metadata"} docs; text already in the index is skipped without embedding.
+        Returns the number of documents embedded.
+        """
+        by_id = {doc_id(d["content"]): d for d in docs}  # Also drops duplicates within the batch
+        if not by_id:
+            return 0
+        existing = set(self.collection.get(ids=list(by_id), include=[])["ids"])
+        new_ids = [i for i in by_id if i not in existing]
+        self.stats["already_indexed"] += len(existing)
+        if new_ids:
+            texts = [by_id[i]["content"] for i in new_ids]
+            metadatas = [filterable(by_id[i].get("metadata")) for i in new_ids]
+            self.collection.upsert(
+                ids=new_ids,
+                embeddings=self.embedder.embed_documents(texts),
+                documents=texts,
+                metadatas=[m or None for m in metadatas],  # Chroma rejects {}
+            )
+            self._index_lexical(new_ids, texts, metadatas)
+            self.stats["embedded"] += len(new_ids)
+        return len(new_ids)
+
+    def add_embedded(self, ids: List[str], texts: List[str], embeddings: List[List[float]],
+                     metadatas: List[Optional[Dict]]):
+        """Write vectors computed elsewhere (the ingestion workers)."""
+        metadatas = [filterable(m) for m in metadatas]
+        for start in range(0, len(ids), RAG_WRITE_BATCH):
+            end = start + RAG_WRITE_BATCH
+            self.collection.upsert(ids=ids[start:end], embeddings=embeddings[start:end],
+                                   documents=texts[start:end], metadatas=[m or None for m in metadatas[start:end]])
+        self._index_lexical(ids, texts, metadatas)
+
+    def delete(self, ids: List[str]):
+        for start in range(0, len(ids), RAG_WRITE_BATCH):
+            self.collection.delete(ids=ids[start:start + RAG_WRITE_BATCH])
+        with self._lexical_lock:
+            self.lexical.remove_many(ids)
+            self._lexical_dirty = True
+
+    def ensure_seeded(self):
+        """Index SEED_DOCS once per process (a no-op id lookup once they're on disk)."""
+        if not self._seeded:
+            self.upsert(SEED_DOCS)
+            self.save_lexical()
+            self._seeded = True
+
+    def query(self, text: str, k: int = 2, where: Optional[Dict] = None) -> List[Dict]:
+        """Top-k [{"content", "metadata", "score"}] by cosine similarity, optionally filtered on metadata."""
+        self.stats["queries"] += 1
+        result = self.collection.query(query_embeddings=[self.embedder.embed_query(text)], n_results=k,
+                                       where=where, include=["documents", "metadatas", "distances"])
+        return [
+            {"content": content, "metadata": metadata or {}, "score": 1.0 - distance}
+            for content, metadata, distance in zip(result["documents"][0], result["metadatas"][0],
+                                                   result["distances"][0])
+        ]
+
+    def search(self, text: str, k: int = 2, filters: Optional[Dict] = None,
+               alpha: float = RAG_HYBRID_ALPHA, candidates: int = RAG_CANDIDATES) -> List[Dict]:
+        """
+        Hybrid top-k [{"content", "metadata", "score", "vector", "lexical"}], best first.
+
+        Args:
+            filters: Exact-match metadata, e.g. {"grade": "4", "type": "pedagogy"}; applied before scoring.
+                     Fields must be in FILTER_FIELDS (ValueError otherwise); 4 and "4" match alike
+            alpha: Weight of the vector score (1.0 = vector only, 0.0 = BM25 only)
+            candidates: Results taken from each side before fusion
+        """
+        self.stats["queries"] += 1
+        filters = normalize_filters(filters)  # Every backend: same fields, values compared as strings
+        n = max(k, candidates)
+        with self._lexical_lock:
+            allowed = self.lexical.candidates(filters)
+            if allowed is not None:
+                if not allowed:
+                    return []  # Nothing has this grade/topic: skip both searches
+                n = min(n, len(allowed))
+            lexical = self.lexical.search(text, n, filters) if alpha < 1.0 else []
+
+        vector, hits = {}, {}
+        if alpha > 0.0:
+            result = self.collection.query(query_embeddings=[self.embedder.embed_query(text)], n_results=n,
+                                           where=chroma_where(filters),
+                                           include=["documents", "metadatas", "distances"])
+            for i, content, metadata, distance in zip(result["ids"][0], result["documents"][0],
+                                                       result["metadatas"][0], result["distances"][0]):
+                vector[i] = max(0.0, 1.0 - distance)
+                hits[i] = (content, metadata or {})
+
+        best = lexical[0][1] if lexical and lexical[0][1] > 0 else 1.0
+        keyword = {i: score / best for i, score in lexical}
+        missing = [i for i in keyword if i not in hits]
+        if missing:
+            rows = self.collection.get(ids=missing, include=["documents", "metadatas"])
+            for i, content, metadata in zip(rows["ids"], rows["documents"], rows["metadatas"]):
+                hits[i] = (content, metadata or {})
+
+        fused = sorted(((alpha * vector.get(i, 0.0) + (1.0 - alpha) * keyword.get(i, 0.0), i) for i in hits),
+                       reverse=True)[:k]
+        return [{"content": hits[i][0], "metadata": hits[i][1], "score": score,
+                 "vector": vector.get(i, 0.0), "lexical": keyword.get(i, 0.0)} for score, i in fused]
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def warm(self) -> int:
+        """Open both indexes, seed them and load the embedder (startup warm-up). Returns the document count."""
+        self.ensure_seeded()
+        self.lexical  # Load (or rebuild) the BM25 index
+        self.embedder.embed_query("warm-up")
+        return self.count()
+
+    def metrics(self) -> Dict:
+        return {"path": self.path, "backend": self.backend, "documents": self.count(),
+                "lexical_documents": len(self._lexical) if self._lexical is not None else None, **self.stats}
+
+
+# Singleton
+rag_store = RAGStore()
+
+
+def query_rag(query: str, k: int = 2, filters: Optional[Dict] = None):
+    """Context string for a prompt; `filters` narrows by metadata, e.g. {"grade": "4"}."""
+    try:
+        rag_store.ensure_seeded()
+        results = rag_store.search(query, k=k, filters=filters)
+    except Exception as e:
+        print(f"RAG Query Error: {e}")
+        return NO_CONTEXT
+    if not results:
+        return NO_CONTEXT
+    return "\n\n".join(r["content"] for r in results)
@@ -0,0 +1,408 @@
+"""
+Vector Index - Memory-mapped NumPy backend for the RAG store (RAG_BACKEND=numpy)
+Per-school deployments hold well under 200k chunks, where Chroma's SQLite/HNSW
+stack costs more RSS and startup time than the search itself. This backend is
+a brute-force index over flat files that every worker maps from the page cache:
+
+    vectors.<gen>   n x dim unit vectors, float16 or int8 (+ scales.<gen>, float32 per row)
+    live.<gen>      uint8 per row, 0 = deleted (tombstone)
+    col_<field>.<gen>  int32 code per row for each metadata filter column (-1 = missing)
+    records.<gen>   JSON [id, document, metadata] per row, records_off.<gen> = int64 offsets
+    header.json     row count, dim, dtype, column vocabularies, generation
+
+Opening reads header.json and maps the files: no parsing, no index build, and
+the pages are shared by every process on the box. A query is a blocked
+matrix-vector product (cosine = dot of unit vectors) and argpartition for the
+top k. Metadata filters are evaluated on the code columns first; when they leave
+few rows only those rows are scored.
+
+Files are append-only and header.json (written last, atomically) says how many
+rows are valid, so a crashed write just leaves ignored bytes at the end.
+Deletes flip the live byte; when more than half the rows are dead the files are
+rewritten as the next generation. One process writes (the ingest run); readers
+notice header.json changing and re-map.
+
+It implements the subset of the Chroma collection API that RAGStore uses
+(upsert / get / delete / query / count), so the store code is unchanged.
+"""
+import os
+import json
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.rag.bm25 import FILTER_FIELDS, filter_value
+
+RAG_VECTOR_DTYPE = os.environ.get("RAG_VECTOR_DTYPE", "float16")  # float16 | int8
+SCORE_BLOCK_ROWS = 2048      # Rows converted to float32 at a time (stays in cache)
+SUBSET_SCORE_FRACTION = 0.25  # Filters leaving fewer rows than this fraction: score only those rows
+COMPACT_MIN_DEAD = 1000
+
+
+def _conditions(where: Optional[Dict]) -> List[tuple]:
+    """Chroma-style where ({"f": v}, {"f": {"$eq": v}}, {"$and": [...]}) -> [(field, value)]."""
+    if not where:
+        return []
+    found = []
+    for key, value in where.items():
+        if key == "$and":
+            for clause in value:
+                found.extend(_conditions(clause))
+        elif key.startswith("$"):
+            raise ValueError(f"Unsupported where operator {key}")
+        elif isinstance(value, dict):
+            if set(value) != {"$eq"}:
+                raise ValueError(f"Unsupported where clause for {key}: {value}")
+            found.append((key, value["$eq"]))
+        else:
+            found.append((key, value))
+    return found
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+class MemmapIndex:
+    def __init__(self, root: str, dtype: str = RAG_VECTOR_DTYPE, columns: Sequence[str] = FILTER_FIELDS):
+        """
+        Args:
+            root: Directory of the index files
+            dtype: Storage type of new indexes ("float16" or "int8"); an existing index keeps its own
+            columns: Metadata fields stored as filterable columns
+        """
+        if dtype not in ("float16", "int8"):
+            raise ValueError(f"RAG_VECTOR_DTYPE must be float16 or int8, not {dtype}")
+        self.root = root
+        self.dtype = dtype
+        self.columns = list(columns)
+        self._lock = threading.RLock()
+        self._header: Optional[Dict] = None
+        self._stamp = None
+        self._maps: Dict[str, np.ndarray] = {}
+        self._codes: Dict[str, Dict[str, int]] = {}
+        self._row_of: Optional[Dict[str, int]] = None  # id -> row, built on first write/lookup by id
+        self._tails_checked = False
+
+    # --- Files ---
+
+    @property
+    def _header_path(self) -> str:
+        return os.path.join(self.root, "header.json")
+
+    def _file(self, name: str, generation: Optional[int] = None) -> str:
+        return os.path.join(self.root, f"{name}.{self._header['generation'] if generation is None else generation}")
+
+    def _refresh(self):
+        """(Re)load header.json when another process rewrote it; drops stale maps."""
+        try:
+            st = os.stat(self._header_path)
+        except FileNotFoundError:
+            return
+        stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if stamp != self._stamp:
+            with open(self._header_path, encoding="utf-8") as f:
+                self._set_header(json.load(f))
+            self._stamp = stamp
+            self._row_of = None  # Another process wrote: rebuild the id map on next use
+
+    def _set_header(self, header: Dict):
+        self._header = header
+        self._maps = {}
+        self._codes = {field: {value: code for code, value in enumerate(vocab)}
+                       for field, vocab in header["vocab"].items()}
+
+    def _write_header(self, header: Dict):
+        tmp = self._header_path + ".part"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(header, f, ensure_ascii=False)
+        os.replace(tmp, self._header_path)
+        self._set_header(header)
+        st = os.stat(self._header_path)
+        self._stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _map(self, name: str, dtype, width: int = 1, rows: Optional[int] = None) -> np.ndarray:
+        """Read-only view of the first `rows` rows of a file (shared through the page cache)."""
+        rows = self._header["count"] if rows is None else rows
+        key = f"{name}:{rows}"
+        if key not in self._maps:
+            shape = (rows, width) if width > 1 else (rows,)
+            if rows == 0:
+                self._maps[key] = np.empty(shape, dtype=dtype)
+            else:
+                self._maps[key] = np.memmap(self._file(name), dtype=dtype, mode="r", shape=shape)
+        return self._maps[key]
+
+    def _vectors(self) -> np.ndarray:
+        dtype = np.int8 if self._header["dtype"] == "int8" else np.float16
+        return self._map("vectors", dtype, self._header["dim"])
+
+    def _offsets(self) -> np.ndarray:
+        return self._map("records_off", np.int64, rows=self._header["count"] + 1)
+
+    def _records(self, rows: Sequence[int]) -> List[list]:
+        if not len(rows):
+            return []
+        offsets = self._offsets()
+        with open(self._file("records"), "rb") as f:
+            result = []
+            for row in rows:
+                start, end = int(offsets[row]), int(offsets[row + 1])
+                f.seek(start)
+                result.append(json.loads(f.read(end - start)))
+        return result
+
+    def _rows(self) -> Dict[str, int]:
+        if self._row_of is None:
+            live = self._map("live", np.uint8)
+            rows = np.flatnonzero(live)
+            self._row_of = {record[0]: int(row) for row, record in zip(rows, self._records(rows))}
+        return self._row_of
+
+    # --- Writes (single writer) ---
+
+    def _new_header(self, dim: int) -> Dict:
+        os.makedirs(self.root, exist_ok=True)
+        header = {"version": 1, "generation": 0, "count": 0, "live": 0, "dim": dim, "dtype": self.dtype,
+                  "columns": self.columns, "vocab": {field: [] for field in self.columns}}
+        self._header = header
+        for name in self._file_names():
+            open(self._file(name), "wb").close()
+        with open(self._file("records_off"), "wb") as f:
+            f.write(np.zeros(1, dtype=np.int64).tobytes())
+        return header
+
+    def _file_names(self) -> List[str]:
+        names = ["vectors", "live", "records", "records_off"] + [f"col_{field}" for field in self._header["columns"]]
+        return names + (["scales"] if self._header["dtype"] == "int8" else [])
+
+    def _check_tails(self):
+        """Cut bytes a crashed writer appended past the rows header.json vouches for."""
+        if self._tails_checked:
+            return
+        h = self._header
+        n, dim = h["count"], h["dim"]
+        sizes = {"vectors": n * dim * (1 if h["dtype"] == "int8" else 2), "live": n, "scales": n * 4,
+                 "records_off": (n + 1) * 8, "records": int(self._offsets()[n])}
+        sizes.update({f"col_{field}": n * 4 for field in h["columns"]})
+        for name in self._file_names():
+            path = self._file(name)
+            if os.path.getsize(path) > sizes[name]:
+                os.truncate(path, sizes[name])
+        self._tails_checked = True
+
+    def _append(self, name: str, data: bytes):
+        with open(self._file(name), "ab") as f:
+            f.write(data)
+
+    def _set_live(self, rows: Sequence[int], value: int):
+        with open(self._file("live"), "r+b") as f:
+            for row in sorted(rows):
+                f.seek(row)
+                f.write(bytes([value]))
+
+    def upsert(self, ids: List[str], embeddings, documents: Optional[List[str]] = None,
+               metadatas: Optional[List[Optional[Dict]]] = None):
+        if not ids:
+            return
+        documents = documents if documents is not None else [None] * len(ids)
+        metadatas = metadatas if metadatas is not None else [None] * len(ids)
+        latest = {i: n for n, i in enumerate(ids)}  # Last write wins within the batch
+        order = sorted(latest.values())
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32)[order])
+        with self._lock:
+            self._refresh()
+            header = self._header or self._new_header(vectors.shape[1])
+            if vectors.shape[1] != header["dim"]:
+                raise ValueError(f"Embedding dim {vectors.shape[1]} != index dim {header['dim']}")
+            self._check_tails()
+            row_of = self._rows()
+            replaced = [row_of[ids[n]] for n in order if ids[n] in row_of]
+            if replaced:
+                self._set_live(replaced, 0)
+
+            if header["dtype"] == "int8":
+                scales = np.abs(vectors).max(axis=1) / 127.0
+                scales[scales == 0] = 1.0
+                self._append("vectors", np.round(vectors / scales[:, None]).astype(np.int8).tobytes())
+                self._append("scales", scales.astype(np.float32).tobytes())
+            else:
+                self._append("vectors", vectors.astype(np.float16).tobytes())
+            self._append("live", np.ones(len(order), dtype=np.uint8).tobytes())
+
+            vocab = {field: list(values) for field, values in header["vocab"].items()}
+            for field in header["columns"]:
+                codes = np.full(len(order), -1, dtype=np.int32)
+                lookup = {value: code for code, value in enumerate(vocab[field])}
+                for slot, n in enumerate(order):
+                    value = (metadatas[n] or {}).get(field)
+                    if value is not None:
+                        value = str(value)
+                        if value not in lookup:
+                            lookup[value] = len(vocab[field])
+                            vocab[field].append(value)
+                        codes[slot] = lookup[value]
+                self._append(f"col_{field}", codes.tobytes())
+
+            blobs = [json.dumps([ids[n], documents[n], metadatas[n] or None], ensure_ascii=False).encode("utf-8")
+                     for n in order]
+            end = int(self._offsets()[header["count"]])
+            self._append("records", b"".join(blobs))
+            self._append("records_off", (end + np.cumsum([len(b) for b in blobs], dtype=np.int64)).tobytes())
+
+            first = header["count"]
+            self._write_header({**header, "count": first + len(order),
+                                "live": header["live"] - len(replaced) + len(order), "vocab": vocab})
+            self._row_of = row_of
+            for slot, n in enumerate(order):
+                row_of[ids[n]] = first + slot
+
+    def add(self, ids, embeddings, documents=None, metadatas=None):
+        self.upsert(ids, embeddings, documents, metadatas)
+
+    def delete(self, ids: Optional[List[str]] = None):
+        with self._lock:
+            self._refresh()
+            if self._header is None or not ids:
+                return
+            row_of = self._rows()
+            rows = [row_of.pop(i) for i in set(ids) if i in row_of]
+            if not rows:
+                return
+            self._set_live(rows, 0)
+            header = {**self._header, "live": self._header["live"] - len(rows)}
+            self._write_header(header)
+            dead = header["count"] - header["live"]
+            if dead >= COMPACT_MIN_DEAD and dead > header["live"]:
+                self.compact()
+
+    def compact(self):
+        """Rewrite live rows as the next generation; readers switch when they see the new header."""
+        with self._lock:
+            self._refresh()
+            old = self._header
+            if old is None:
+                return
+            keep = np.flatnonzero(self._map("live", np.uint8))
+            generation = old["generation"] + 1
+            names = self._file_names()
+            sources = {"vectors": self._vectors(), "live": None,
+                       **{f"col_{field}": self._map(f"col_{field}", np.int32) for field in old["columns"]}}
+            if old["dtype"] == "int8":
+                sources["scales"] = self._map("scales", np.float32)
+            blobs = [json.dumps(r, ensure_ascii=False).encode("utf-8") for r in self._records(keep)]
+            for name in names:
+                with open(self._file(name, generation), "wb") as f:
+                    if name == "live":
+                        f.write(np.ones(len(keep), dtype=np.uint8).tobytes())
+                    elif name == "records":
+                        f.write(b"".join(blobs))
+                    elif name == "records_off":
+                        f.write(np.cumsum([0] + [len(b) for b in blobs], dtype=np.int64).tobytes())
+                    else:
+                        for start in range(0, len(keep), SCORE_BLOCK_ROWS):
+                            f.write(np.ascontiguousarray(sources[name][keep[start:start + SCORE_BLOCK_ROWS]]).tobytes())
+            self._write_header({**old, "generation": generation, "count": len(keep), "live": len(keep)})
+            self._row_of = None
+            for name in names:
+                os.remove(os.path.join(self.root, f"{name}.{old['generation']}"))  # Open maps stay valid
+            print(f"Vector index: compacted {old['count']} -> {len(keep)} rows")
+
+    # --- Reads ---
+
+    def _mask(self, where: Optional[Dict]) -> np.ndarray:
+        mask = self._map("live", np.uint8).astype(bool)
+        for field, value in _conditions(where):
+            value = filter_value(field, value)  # Same rules as BM25 and RAGStore.search
+            if field not in self._header["columns"]:
+                raise ValueError(f"'{field}' is not a metadata column of this index ({self._header['columns']})")
+            code = self._codes[field].get(value)
+            if code is None:
+                return np.zeros_like(mask)
+            mask &= self._map(f"col_{field}", np.int32) == code
+        return mask
+
+    def _scores(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Cosine similarity of `query` (unit, float32) with all rows, or only `rows`."""
+        vectors = self._vectors()
+        scales = self._map("scales", np.float32) if self._header["dtype"] == "int8" else None
+        total = len(rows) if rows is not None else len(vectors)
+        scores = np.empty(total, dtype=np.float32)
+        for start in range(0, total, SCORE_BLOCK_ROWS):
+            end = min(start + SCORE_BLOCK_ROWS, total)
+            index = rows[start:end] if rows is not None else slice(start, end)
+            block = vectors[index].astype(np.float32) @ query
+            scores[start:end] = block * scales[index] if scales is not None else block
+        return scores
+
+    def query(self, query_embeddings, n_results: int = 10, where: Optional[Dict] = None,
+              include: Sequence[str] = ("documents", "metadatas", "distances")) -> Dict:
+        with self._lock:
+            self._refresh()
+            header = self._header
+            result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+            queries = _normalize(np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32)))
+            if header is None or header["live"] == 0:
+                for key in result:
+                    result[key] = [[] for _ in queries]
+                return result
+            mask = self._mask(where)
+            selected = int(mask.sum())
+            subset = np.flatnonzero(mask) if selected < SUBSET_SCORE_FRACTION * len(mask) else None
+            for query in queries:
+                k = min(n_results, selected)
+                if k == 0:
+                    rows, scores = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+                elif subset is not None:
+                    candidate = self._scores(query, subset)
+                    best = np.argpartition(-candidate, k - 1)[:k]
+                    rows, scores = subset[best], candidate[best]
+                else:
+                    candidate = self._scores(query)
+                    candidate[~mask] = -np.inf
+                    rows = np.argpartition(-candidate, k - 1)[:k]
+                    scores = candidate[rows]
+                order = np.argsort(-scores, kind="stable")
+                rows, scores = rows[order], scores[order]
+                records = self._records(rows)
+                result["ids"].append([r[0] for r in records])
+                result["documents"].append([r[1] for r in records])
+                result["metadatas"].append([r[2] for r in records])
+                result["distances"].append([float(1.0 - s) for s in scores])
+            return {key: value for key, value in result.items() if key == "ids" or key in include}
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None, limit: Optional[int] = None,
+            offset: Optional[int] = None, include: Sequence[str] = ("documents", "metadatas")) -> Dict:
+        with self._lock:
+            self._refresh()
+            if self._header is None:
+                rows = []
+            elif ids is not None:
+                row_of = self._rows()
+                rows = [row_of[i] for i in ids if i in row_of]
+                if where:
+                    mask = self._mask(where)
+                    rows = [r for r in rows if mask[r]]
+            else:
+                rows = np.flatnonzero(self._mask(where))
+                rows = rows[offset or 0:(offset or 0) + limit if limit is not None else None]
+            records = self._records(rows)
+        result = {"ids": [r[0] for r in records]}
+        if "documents" in include:
+            result["documents"] = [r[1] for r in records]
+        if "metadatas" in include:
+            result["metadatas"] = [r[2] for r in records]
+        return result
+
+    def count(self) -> int:
+        with self._lock:
+            self._refresh()
+            return self._header["live"] if self._header else 0
+
+    def metrics(self) -> Dict:
+        self._refresh()
+        header = self._header or {}
+        return {"path": self.root, "dtype": header.get("dtype", self.dtype), "rows": header.get("count", 0),
+                "live": header.get("live", 0), "generation": header.get("generation")}
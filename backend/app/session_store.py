@@ -0,0 +1,217 @@
+"""
+Session Store - Bounded, evicting conversation memory
+Replaces the old unbounded SESSION_STORE dict (user_id -> every message ever sent).
+
+Each session is a fixed ring of recent turns. Turn text is stored as UTF-8 bytes
+(zlib-compressed when large), sessions are evicted LRU once idle past the TTL or
+when the global byte budget is exceeded. Turns the ring drops before the context
+packer has folded them into the session summary are held (up to another ring's
+worth) until it does, so a long chat of short turns still gets summarized.
+"""
+import os
+import sys
+import time
+import zlib
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional
+
+SESSION_MAX_TURNS = int(os.environ.get("SESSION_MAX_TURNS", "20"))
+SESSION_TTL_S = float(os.environ.get("SESSION_TTL_S", "7200"))  # 2h idle
+SESSION_MAX_BYTES = int(os.environ.get("SESSION_MAX_BYTES", str(64 * 1024 * 1024)))
+SESSION_MAX_SESSIONS = int(os.environ.get("SESSION_MAX_SESSIONS", "10000"))
+
+# Turns longer than this are zlib-compressed (lesson plans, slide decks, video lists)
+COMPRESS_THRESHOLD = 512
+TURN_OVERHEAD = 64  # Approximate per-turn object overhead in bytes
+
+_ROLES = {r: sys.intern(r) for r in ("user", "assistant", "system")}
+
+
+class Turn:
+    """One stored message. __slots__ keeps per-turn overhead small."""
+    __slots__ = ("role", "data", "compressed", "seq", "tokens")
+
+    def __init__(self, role: str, content: str, seq: int = 0):
+        self.role = _ROLES.get(role) or sys.intern(role)
+        self.seq = seq        # Position in the session (monotonic, survives ring drops)
+        self.tokens = None    # Token count, filled in and cached by the context packer
+        raw = content.encode("utf-8")
+        packed = zlib.compress(raw, 6) if len(raw) > COMPRESS_THRESHOLD else raw
+        self.compressed = len(packed) < len(raw)
+        self.data = packed if self.compressed else raw
+
+    @property
+    def content(self) -> str:
+        raw = zlib.decompress(self.data) if self.compressed else self.data
+        return raw.decode("utf-8")
+
+    @property
+    def size(self) -> int:
+        return len(self.data) + TURN_OVERHEAD
+
+    def to_message(self) -> Dict:
+        return {"role": self.role, "content": self.content}
+
+
+class Session:
+    __slots__ = ("turns", "last_seen", "bytes", "next_seq", "summary", "summary_upto", "dropped")
+
+    def __init__(self, max_turns: int):
+        self.turns = deque(maxlen=max_turns)
+        self.last_seen = time.monotonic()
+        self.bytes = 0
+        self.next_seq = 1
+        self.summary = ""       # Rolling summary of turns that left the context window
+        self.summary_upto = 0   # Highest turn seq folded into the summary
+        self.dropped = deque(maxlen=max_turns)  # Left the ring, not yet summarized
+
+
+class SessionStore:
+    """Thread-safe per-user turn rings with LRU/TTL eviction and a global byte budget."""
+
+    def __init__(self, max_turns: int = SESSION_MAX_TURNS, ttl_s: float = SESSION_TTL_S,
+                 max_bytes: int = SESSION_MAX_BYTES, max_sessions: int = SESSION_MAX_SESSIONS):
+        self.max_turns = max_turns
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"ttl_evictions": 0, "budget_evictions": 0, "turns_dropped": 0, "turns_lost": 0}
+
+    # --- Internal (caller holds the lock) ---
+    def _remove(self, user_id: str):
+        session = self._sessions.pop(user_id, None)
+        if session is not None:
+            self._bytes -= session.bytes
+
+    def _expire_idle(self, now: float):
+        # Sessions are kept in LRU order, so idle ones sit at the front
+        while self._sessions:
+            user_id, session = next(iter(self._sessions.items()))
+            if now - session.last_seen < self.ttl_s:
+                break
+            self._remove(user_id)
+            self.stats["ttl_evictions"] += 1
+
+    def _enforce_budget(self, keep: str):
+        while len(self._sessions) > 1 and (self._bytes > self.max_bytes or len(self._sessions) > self.max_sessions):
+            user_id = next(iter(self._sessions))
+            if user_id == keep:
+                # Never evict the session being written; move it out of the way
+                self._sessions.move_to_end(user_id)
+                user_id = next(iter(self._sessions))
+            self._remove(user_id)
+            self.stats["budget_evictions"] += 1
+
+    def _release(self, session: Session, turn: Turn):
+        session.bytes -= turn.size
+        self._bytes -= turn.size
+
+    def _touch(self, user_id: str, now: float) -> Session:
+        session = self._sessions.get(user_id)
+        if session is None:
+            session = Session(self.max_turns)
+            self._sessions[user_id] = session
+        else:
+            self._sessions.move_to_end(user_id)
+        session.last_seen = now
+        return session
+
+    # --- Public API ---
+    def append(self, user_id: str, role: str, content: str) -> Turn:
+        turn = Turn(role, str(content))
+        now = time.monotonic()
+        with self._lock:
+            self._expire_idle(now)
+            session = self._touch(user_id, now)
+            turn.seq = session.next_seq
+            session.next_seq += 1
+            if len(session.turns) == session.turns.maxlen:
+                dropped = session.turns[0]
+                self.stats["turns_dropped"] += 1
+                if dropped.seq > session.summary_upto:
+                    # Keep it for the summary; it still counts against the budget
+                    if len(session.dropped) == session.dropped.maxlen:
+                        self._release(session, session.dropped[0])
+                        self.stats["turns_lost"] += 1  # Summaries fell a whole ring behind
+                    session.dropped.append(dropped)
+                else:
+                    self._release(session, dropped)
+            session.turns.append(turn)
+            session.bytes += turn.size
+            self._bytes += turn.size
+            self._enforce_budget(keep=user_id)
+        return turn
+
+    def turns(self, user_id: str, limit: Optional[int] = None) -> List[Turn]:
+        """Most recent stored turns (oldest first)."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire_idle(now)
+            session = self._sessions.get(user_id)
+            if session is None:
+                return []
+            self._sessions.move_to_end(user_id)
+            session.last_seen = now
+            turns = list(session.turns)
+        return turns[-limit:] if limit else turns
+
+    def dropped(self, user_id: str) -> List[Turn]:
+        """Turns that left the ring but aren't covered by the summary yet (oldest first)."""
+        with self._lock:
+            session = self._sessions.get(user_id)
+            return list(session.dropped) if session is not None else []
+
+    def history(self, user_id: str, limit: Optional[int] = None) -> List[Dict]:
+        """Most recent messages as [{"role", "content"}] dicts (oldest first)."""
+        return [turn.to_message() for turn in self.turns(user_id, limit)]
+
+    def summary(self, user_id: str) -> tuple:
+        """(summary_text, highest_seq_covered) for a session; ("", 0) if none."""
+        with self._lock:
+            session = self._sessions.get(user_id)
+            if session is None:
+                return "", 0
+            return session.summary, session.summary_upto
+
+    def set_summary(self, user_id: str, text: str, upto_seq: int):
+        with self._lock:
+            session = self._sessions.get(user_id)
+            if session is None or upto_seq < session.summary_upto:
+                return  # Session evicted meanwhile, or a newer summary already landed
+            delta = len(text.encode("utf-8")) - len(session.summary.encode("utf-8"))
+            session.summary = text
+            session.summary_upto = upto_seq
+            session.bytes += delta
+            self._bytes += delta
+            while session.dropped and session.dropped[0].seq <= upto_seq:
+                self._release(session, session.dropped.popleft())
+
+    def clear(self, user_id: str):
+        with self._lock:
+            self._remove(user_id)
+
+    def __contains__(self, user_id: str) -> bool:
+        with self._lock:
+            return user_id in self._sessions
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "turns": sum(len(s.turns) for s in self._sessions.values()),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                **self.stats,
+            }
+
+
+# Singleton
+session_store = SessionStore()
@@ -0,0 +1,94 @@
+"""
+Subsystems - Lazy registry for the heavy singletons (LLM client, SDXL, video, PDF/PPTX)
+Importing app.main used to pull in litellm, huggingface_hub, gradio_client,
+fpdf/fontTools and python-pptx and build every generator up front, including
+a network round-trip for the ModelScope video client. Each subsystem is now
+named here by "module:attribute" and only imported on first use (or by an
+explicit warm()), so a cold start pays only for FastAPI and the app's own
+small modules. Load time and failures are recorded per subsystem.
+
+    subsystems.get("image_gen").generate(prompt, path)
+"""
+import time
+import importlib
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+# name -> "module:attribute" (the module's own singleton, built when it's imported)
+SUBSYSTEMS = {
+    "llm": "app.llm_factory:llm_factory",
+    "media": "app.utils.media_generator:MediaGenerator",
+    "image_gen": "app.utils.image_generator:image_gen",
+    "video_gen": "app.utils.video_generator:video_gen",
+}
+
+
+class _Entry:
+    __slots__ = ("target", "instance", "loaded", "load_s", "error", "lock")
+
+    def __init__(self, target: str):
+        self.target = target
+        self.instance = None
+        self.loaded = False
+        self.load_s: Optional[float] = None
+        self.error: Optional[str] = None
+        self.lock = threading.Lock()
+
+
+class SubsystemRegistry:
+    def __init__(self, targets: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            targets: name -> "module:attribute" (defaults to SUBSYSTEMS)
+        """
+        self._entries = {name: _Entry(target) for name, target in (targets or SUBSYSTEMS).items()}
+
+    def register(self, name: str, target: str):
+        self._entries[name] = _Entry(target)
+
+    def get(self, name: str) -> Any:
+        """The subsystem's singleton, importing it on first call. Import errors propagate (and are retried next call)."""
+        entry = self._entries[name]
+        if entry.loaded:
+            return entry.instance
+        with entry.lock:
+            if not entry.loaded:
+                module_name, attribute = entry.target.split(":")
+                started = time.perf_counter()
+                try:
+                    entry.instance = getattr(importlib.import_module(module_name), attribute)
+                except Exception as e:
+                    entry.error = f"{type(e).__name__}: {e}"
+                    raise
+                entry.load_s = time.perf_counter() - started
+                entry.error = None
+                entry.loaded = True
+                print(f"Subsystem {name} loaded in {entry.load_s * 1000:.0f}ms")
+        return entry.instance
+
+    def loaded(self, name: str) -> bool:
+        return self._entries[name].loaded
+
+    def warm(self, names: Optional[Iterable[str]] = None) -> Dict[str, bool]:
+        """Load the given subsystems now (all by default). Returns name -> ok; failures are logged, not raised."""
+        results = {}
+        for name in (names if names is not None else list(self._entries)):
+            try:
+                self.get(name)
+                results[name] = True
+            except Exception as e:
+                print(f"Subsystem {name} warm-up failed: {e}")
+                results[name] = False
+        return results
+
+    def status(self) -> Dict[str, Dict]:
+        return {
+            name: {"loaded": entry.loaded,
+                   "load_ms": round(entry.load_s * 1000, 1) if entry.load_s is not None else None,
+                   "error": entry.error}
+            for name, entry in self._entries.items()
+        }
+
+
+# Singleton
+subsystems = SubsystemRegistry()
@@ -0,0 +1,130 @@
+"""
+Tool Registry - The tools Sahayak may call from MASTER_PROMPT, in one place
+Each tool declares its prompt description and, if it runs on the backend, an
+executor with a deadline. Blocking executors (DDGS etc.) run on a bounded
+thread pool so they never stall the event loop. The prompt's tool section is
+generated from the registry, so adding a tool is a single registration.
+"""
+import os
+import asyncio
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+TOOL_MAX_WORKERS = int(os.environ.get("TOOL_MAX_WORKERS", "8"))
+TOOL_DEFAULT_DEADLINE_S = float(os.environ.get("TOOL_DEFAULT_DEADLINE_S", "10"))
+
+
+class Tool:
+    def __init__(self, name: str, description: str, executor: Optional[Callable] = None,
+                 deadline_s: float = TOOL_DEFAULT_DEADLINE_S, blocking: bool = True):
+        """
+        Args:
+            name: Value of "tool_used" in the model's JSON
+            description: One-liner shown to the model in MASTER_PROMPT
+            executor: fn(data, metadata) -> new data; None = rendered by the frontend
+            deadline_s: Max seconds the executor may take before we keep the original data
+            blocking: Sync executor that must run on the thread pool
+        """
+        self.name = name
+        self.description = description
+        self.executor = executor
+        self.deadline_s = deadline_s
+        self.blocking = blocking and executor is not None and not inspect.iscoroutinefunction(executor)
+
+
+class ToolRegistry:
+    def __init__(self, max_workers: int = TOOL_MAX_WORKERS):
+        self._tools: Dict[str, Tool] = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        self.stats = {"executed": 0, "timeouts": 0, "errors": 0}
+
+    def register(self, name: str, description: str, executor: Optional[Callable] = None,
+                 deadline_s: float = TOOL_DEFAULT_DEADLINE_S, blocking: bool = True) -> Tool:
+        tool = Tool(name, description, executor, deadline_s, blocking)
+        self._tools[name] = tool
+        return tool
+
+    def get(self, name: str) -> Optional[Tool]:
+        return self._tools.get(name)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._tools)
+
+    def prompt_section(self) -> str:
+        """The JSON schema + numbered tool list embedded in MASTER_PROMPT."""
+        choices = " | ".join(f'"{name}"' for name in self._tools)
+        listing = "\n".join(f'{i}. "{tool.name}": {tool.description}' for i, tool in enumerate(self._tools.values(), 1))
+        return (
+            "JSON Schema:\n"
+            "{\n"
+            f'  "tool_used": {choices},\n'
+            '  "data": <content_string_or_object>,\n'
+            '  "metadata": { "topic": "summary", "audience_level": "child"|"teacher" },\n'
+            '  "tool_calls": [ { "tool_used": ..., "data": ..., "metadata": {...} } ]\n'
+            "}\n"
+            '"tool_calls" is optional: add it only when one answer needs more than one tool '
+            "(e.g. a diagram AND real videos); each entry has the same shape as the main call.\n\n"
+            "**TOOLS AVALIABLE:**\n"
+            f"{listing}\n"
+        )
+
+    async def execute(self, call: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one tool call in place. On timeout/error the original data is kept."""
+        tool = self._tools.get(call.get("tool_used"))
+        if tool is None or tool.executor is None:
+            return call
+
+        data, metadata = call.get("data", ""), call.get("metadata", {})
+        print(f"Executing tool '{tool.name}' (deadline {tool.deadline_s}s)")
+        try:
+            if tool.blocking:
+                loop = asyncio.get_running_loop()
+                future = loop.run_in_executor(self._pool, tool.executor, data, metadata)
+            else:
+                future = tool.executor(data, metadata)
+            call["data"] = await asyncio.wait_for(future, timeout=tool.deadline_s)
+            self.stats["executed"] += 1
+        except asyncio.TimeoutError:
+            print(f"Tool Timeout: {tool.name} exceeded {tool.deadline_s}s")
+            self.stats["timeouts"] += 1
+        except Exception as e:
+            print(f"Tool Execution Error: {e}")
+            self.stats["errors"] += 1
+        return call
+
+    async def run(self, response_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Execute every backend tool a response needs, concurrently: the main call
+        plus any extra calls listed under "tool_calls".
+        """
+        extra = response_data.get("tool_calls") or []
+        if not isinstance(extra, list):
+            response_data.pop("tool_calls")  # e.g. a single object instead of a list: ignore it
+            extra = []
+        calls = [response_data] + [c for c in extra if isinstance(c, dict)]
+        await asyncio.gather(*(self.execute(call) for call in calls))
+        return response_data
+
+
+# --- Executors ---
+
+def _youtube_search(data: Any, metadata: Dict) -> Any:
+    """Real video search for the keyword the model chose (DDGS is blocking -> thread pool)."""
+    from app.utils.video_search import video_searcher
+    return video_searcher.search(str(data))
+
+
+# --- Registry (order = order shown to the model) ---
+tool_registry = ToolRegistry()
+tool_registry.register("mermaid", "Flowcharts/Diagrams (graph TD).")
+tool_registry.register("image_prompt", "Safe, Educational Image Generation.")
+tool_registry.register("video_prompt", "Educational Video Generation.")
+tool_registry.register("youtube_search", 'Search Keyword (e.g., "Gravity for kids"). NEVER provide a URL.',
+                       executor=_youtube_search, deadline_s=8.0)
+tool_registry.register("presentation", "Lesson Plan Slides.")
+tool_registry.register("document", "PDF Handouts.")
+tool_registry.register("csv", "Structured Data (CSV).")
+tool_registry.register("docx", "Word Documents.")
+tool_registry.register("excel", "Excel Spreadsheets.")
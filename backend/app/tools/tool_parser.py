@@ -0,0 +1,232 @@
+"""
+Tool-Call Parser - Single-pass extraction of the JSON tool block from LLM output
+Replaces the per-request `re.search(r'\\{.*\\}', ..., re.DOTALL)` in /chat, which is
+quadratic on unclosed braces and grabs the wrong span when the text also has
+LaTeX (\\frac{1}{2}) or mermaid ({Decision}) braces.
+
+The scanner walks the text once, tracking:
+    - balanced {...} spans (respecting JSON strings and escapes)
+    - ``` fences, skipping ```mermaid blocks entirely
+Each completed top-level span is tried with json.loads; the first object with a
+"tool_used" key wins. It accepts text incrementally, so the streaming endpoint
+can feed it deltas as they arrive.
+"""
+import re
+import json
+from typing import Any, Dict, Optional
+
+_INTERESTING = re.compile(r'[{}"\\`\n]')
+# An unescaped backslash (preceded by an even run of backslashes) starting...
+#   ...an invalid JSON escape (LaTeX: \sqrt, \pi, \alpha ...)
+_BAD_ESCAPE = re.compile(r'(?<!\\)((?:\\\\)*)\\(?!["\\/bfnrtu])')
+#   ...a "valid" \f / \b escape that is really LaTeX (\frac, \beta): form feed
+#      and backspace never appear in model prose
+_LATEX_CONTROL = re.compile(r'(?<!\\)((?:\\\\)*)\\(?=[fb][A-Za-z])')
+# Fenced languages whose braces are never tool JSON
+_SKIP_FENCES = {"mermaid", "latex", "tex", "math"}
+MAX_RESCANS = 8
+
+
+def _loads(candidate: str) -> Optional[Any]:
+    candidate = _LATEX_CONTROL.sub(r"\1\\\\", candidate)
+    try:
+        return json.loads(candidate, strict=False)  # strict=False: allow raw newlines in strings
+    except ValueError:
+        pass
+    repaired = _BAD_ESCAPE.sub(r"\1\\\\", candidate)
+    if repaired != candidate:
+        try:
+            return json.loads(repaired, strict=False)
+        except ValueError:
+            pass
+    return None
+
+
+class ToolCallScanner:
+    """
+    Incremental balanced-brace scanner.
+
+        scanner = ToolCallScanner()
+        for delta in stream:
+            scanner.feed(delta)
+        tool_call = scanner.finish()   # dict with "tool_used", or None
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.result: Optional[Dict] = None
+        self.span = None            # (start, end) of the winning JSON object
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._span_start = None
+        self._fence_open = False
+        self._fence_lang = None
+        self._lang_start = None
+        self._rescans = 0
+
+    @property
+    def opens_structured(self) -> Optional[bool]:
+        """True/False once the first non-space char is known: does the output open like JSON or a fence?"""
+        head = self.text.lstrip()
+        if not head:
+            return None
+        return head[0] in "{`"
+
+    def feed(self, chunk: str) -> Optional[Dict]:
+        if chunk and self.result is None:
+            self.text += chunk
+            self._scan(final=False)
+        return self.result
+
+    def finish(self) -> Optional[Dict]:
+        if self.result is None:
+            self._scan(final=True)
+        # An unclosed span (e.g. a stray "{" in prose) may have swallowed the real
+        # tool block; rescan from just after it, a bounded number of times.
+        while self.result is None and self._span_start is not None and self._rescans < MAX_RESCANS:
+            if "tool_used" not in self.text[self._span_start:]:
+                break  # Nothing worth finding after the stray brace
+            self._rescans += 1
+            self._pos = self._span_start + 1
+            self._depth = 0
+            self._in_string = False
+            self._span_start = None
+            self._scan(final=True)
+        return self.result
+
+    def _finish_lang(self, end: int):
+        self._fence_lang = self.text[self._lang_start:end].strip().lower()
+        self._lang_start = None
+
+    def _scan(self, final: bool):
+        text = self.text
+        n = len(text)
+        pos = self._pos
+
+        while self.result is None:
+            match = _INTERESTING.search(text, pos)
+            if match is None:
+                pos = n
+                break
+            i = match.start()
+            ch = text[i]
+
+            if self._in_string:
+                if ch == "\\":
+                    if i + 1 >= n and not final:
+                        pos = i  # Wait for the escaped character
+                        break
+                    pos = i + 2
+                    continue
+                if ch == '"':
+                    self._in_string = False
+                pos = i + 1
+                continue
+
+            if ch == "`":
+                j = i
+                while j < n and text[j] == "`":
+                    j += 1
+                if j == n and not final:
+                    pos = i  # The backtick run may continue in the next chunk
+                    break
+                if j - i >= 3 and self._depth == 0:
+                    if self._fence_open:
+                        self._fence_open = False
+                        self._fence_lang = None
+                        self._lang_start = None
+                    else:
+                        self._fence_open = True
+                        self._fence_lang = None
+                        self._lang_start = j
+                pos = j
+                continue
+
+            if ch == "\n":
+                if self._lang_start is not None:
+                    self._finish_lang(i)
+                pos = i + 1
+                continue
+
+            if self._lang_start is not None and ch == "{":
+                self._finish_lang(i)  # ```json {"tool_used": ...} on one line
+
+            if self._fence_open and self._fence_lang in _SKIP_FENCES:
+                pos = i + 1
+                continue
+
+            if ch == '"':
+                if self._depth > 0:
+                    self._in_string = True
+            elif ch == "{":
+                if self._depth == 0:
+                    self._span_start = i
+                self._depth += 1
+            elif ch == "}" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._try_span(self._span_start, i + 1)
+                    self._span_start = None
+            pos = i + 1
+
+        self._pos = pos
+
+    def _try_span(self, start: int, end: int):
+        candidate = self.text[start:end]
+        if "tool_used" not in candidate:
+            return  # LaTeX/mermaid/example braces: skip the JSON parse entirely
+        parsed = _loads(candidate)
+        if isinstance(parsed, dict) and "tool_used" in parsed:
+            self.result = parsed
+            self.span = (start, end)
+
+
+def extract_tool_call(text: str) -> Optional[Dict]:
+    """First JSON object with a "tool_used" key in `text`, or None."""
+    if "tool_used" not in text:
+        return None  # Plain prose: skip the scan
+    scanner = ToolCallScanner()
+    scanner.feed(text)
+    return scanner.finish()
+
+
+def extract_json(text: str, max_attempts: int = 32) -> Optional[Any]:
+    """
+    First JSON object or array in `text`: the whole reply, or one wrapped in a
+    ``` fence or prose ("Here is the outline: {...} Hope this helps").
+    Returns None if no candidate parses.
+    """
+    parsed = _loads(text.strip())
+    if isinstance(parsed, (dict, list)):
+        return parsed
+    decoder = json.JSONDecoder(strict=False)
+    attempts = 0
+    for match in re.finditer(r"[{\[]", text):
+        if attempts >= max_attempts:
+            break
+        attempts += 1
+        try:
+            parsed, _ = decoder.raw_decode(text, match.start())
+        except ValueError:
+            continue
+        if isinstance(parsed, (dict, list)) and parsed:
+            return parsed
+    return None
+
+
+def parse_llm_output(content_str: str, tool_call: Optional[Dict] = None) -> Dict[str, Any]:
+    """
+    Turn raw LLM text into the {tool_used, data, metadata} response shape.
+    Pass `tool_call` if a scanner already extracted it (streaming path).
+    """
+    if tool_call is None:
+        try:
+            tool_call = extract_tool_call(content_str)
+        except Exception as e:
+            print(f"JSON Parse Logic Error: {e}. Fallback to text.")
+            tool_call = None
+    if tool_call is not None:
+        return tool_call
+    # No valid JSON tool structure found: the whole string is content
+    return {"tool_used": "text", "data": content_str}
@@ -0,0 +1,237 @@
+"""
+Fonts - Cached Unicode TTF fonts for PDF handouts in Indian scripts
+FPDF's core fonts are Latin-1 only, so Hindi/Tamil/Bengali/Telugu handouts came
+out as "????". Embedding TTFs fixes that, but fpdf2's add_font() re-parses the
+whole font (cmap, per-glyph widths) for every document.
+
+Each TTF is parsed once per process into a prototype; a document gets a cheap
+copy that shares the parsed metrics but has its own lazily-loaded font tables
+and glyph subset (fpdf2 subsets the embedded font in place on output, so the
+tables can't be shared). Only scripts that actually occur in the document are
+loaded, and only the glyphs used are embedded.
+
+Fonts are looked up in $FONT_DIR, backend/app/assets/fonts and the usual
+system font folders. The Noto set is not checked in; the deploy build
+(render.yaml) fetches it into app/assets/fonts with:
+    python -m app.utils.fonts download
+A script with no font, or no HarfBuzz shaping (`uharfbuzz`, which Indic
+conjuncts and vowel signs need), is logged at warm-up and reported as degraded
+on /ready.
+"""
+import os
+import sys
+import copy
+import threading
+from io import BytesIO
+from typing import Dict, List, Optional, Set
+
+FONT_DIR = os.environ.get("FONT_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "fonts"))
+SYSTEM_FONT_DIRS = [
+    "/usr/share/fonts/truetype/noto",
+    "/usr/share/fonts/opentype/noto",
+    "/usr/share/fonts/noto",
+    "/usr/share/fonts/truetype/dejavu",
+    "/usr/share/fonts/TTF",
+]
+
+# script -> (first codepoint, last codepoint)
+SCRIPT_RANGES = {
+    "devanagari": (0x0900, 0x097F),  # Hindi, Marathi, Sanskrit
+    "bengali": (0x0980, 0x09FF),     # Bengali, Assamese
+    "tamil": (0x0B80, 0x0BFF),
+    "telugu": (0x0C00, 0x0C7F),
+}
+# script -> candidate files, first found wins ("latin" is the base font for everything else)
+SCRIPT_FONTS = {
+    "latin": ["NotoSans-Regular.ttf", "DejaVuSans.ttf"],
+    "devanagari": ["NotoSansDevanagari-Regular.ttf"],
+    "bengali": ["NotoSansBengali-Regular.ttf"],
+    "tamil": ["NotoSansTamil-Regular.ttf"],
+    "telugu": ["NotoSansTelugu-Regular.ttf"],
+}
+NOTO_URL = "https://github.com/notofonts/notofonts.github.io/raw/main/fonts/{family}/hinted/ttf/{file}"
+# sfnt version tags: TrueType outlines, Apple TrueType, CFF (an HTML error page is none of these)
+FONT_MAGIC = (b"\x00\x01\x00\x00", b"true", b"OTTO")
+
+
+def detect_scripts(text: str) -> Set[str]:
+    """Indian scripts present in `text` (Latin/punctuation isn't reported)."""
+    found = set()
+    for ch in text:
+        cp = ord(ch)
+        if cp < 0x0900 or cp > 0x0C7F:
+            continue  # Fast path: outside every range we know
+        for script, (lo, hi) in SCRIPT_RANGES.items():
+            if lo <= cp <= hi:
+                found.add(script)
+                break
+    return found
+
+
+def dominant_script(text: str) -> str:
+    """The script with the most characters in `text` ("latin" if none of ours)."""
+    counts: Dict[str, int] = {}
+    for ch in text:
+        cp = ord(ch)
+        if 0x0900 <= cp <= 0x0C7F:
+            for script, (lo, hi) in SCRIPT_RANGES.items():
+                if lo <= cp <= hi:
+                    counts[script] = counts.get(script, 0) + 1
+                    break
+    return max(counts, key=counts.get) if counts else "latin"
+
+
+def text_shaping_available() -> bool:
+    """Indic conjuncts and vowel signs need HarfBuzz shaping (optional `uharfbuzz`)."""
+    try:
+        import uharfbuzz  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class FontCache:
+    def __init__(self, search_dirs: Optional[List[str]] = None, script_fonts: Optional[Dict[str, List[str]]] = None):
+        """
+        Args:
+            search_dirs: Folders searched in order for font files
+            script_fonts: script -> candidate file names (defaults to SCRIPT_FONTS)
+        """
+        self.search_dirs = search_dirs if search_dirs is not None else [FONT_DIR] + SYSTEM_FONT_DIRS
+        self.script_fonts = script_fonts or SCRIPT_FONTS
+        self._paths: Dict[str, Optional[str]] = {}
+        self._prototypes: Dict[str, object] = {}   # path -> parsed fpdf TTFFont
+        self._blobs: Dict[str, bytes] = {}         # path -> font file bytes
+        self._lock = threading.Lock()
+        self.stats = {"parsed": 0, "cloned": 0, "slow_path": 0}
+
+    def path_for(self, script: str) -> Optional[str]:
+        if script not in self._paths:
+            path = None
+            for name in self.script_fonts.get(script, []):
+                for directory in self.search_dirs:
+                    candidate = os.path.join(directory, name)
+                    if os.path.exists(candidate):
+                        path = candidate
+                        break
+                if path:
+                    break
+            self._paths[script] = path
+        return self._paths[script]
+
+    def available(self, script: str) -> bool:
+        return self.path_for(script) is not None
+
+    def _prototype(self, path: str):
+        proto = self._prototypes.get(path)
+        if proto is None:
+            with self._lock:
+                proto = self._prototypes.get(path)
+                if proto is None:
+                    from fpdf import FPDF
+                    from fpdf.fonts import TTFFont
+                    with open(path, "rb") as f:
+                        self._blobs[path] = f.read()
+                    proto = TTFFont(FPDF(), path, "prototype", "")
+                    self._prototypes[path] = proto
+                    self.stats["parsed"] += 1
+        return proto
+
+    def install(self, pdf, script: str) -> Optional[str]:
+        """
+        Register `script`'s font on `pdf` (idempotent). Returns the family name to pass
+        to pdf.set_font(), or None if no font file for that script is installed.
+        """
+        path = self.path_for(script)
+        if path is None:
+            return None
+        family = f"sahayak-{script}"
+        if family in pdf.fonts:
+            return family
+        try:
+            pdf.fonts[family] = self._clone(pdf, path, family)
+            self.stats["cloned"] += 1
+        except Exception as e:
+            # fpdf2 internals moved: fall back to a full parse for this document
+            print(f"Font cache clone failed ({e}), parsing {os.path.basename(path)}")
+            pdf.add_font(family, "", path)
+            self.stats["slow_path"] += 1
+        return family
+
+    def _clone(self, pdf, path: str, family: str):
+        from fontTools import ttLib
+        from fpdf.fonts import SubsetMap
+        proto = self._prototype(path)
+        font = copy.copy(proto)  # Shares cmap, widths, glyph ids
+        font.i = len(pdf.fonts) + 1
+        font.fontkey = family
+        # Output stamps the descriptor with this document's object id and font stream
+        font.desc = copy.copy(proto.desc)
+        # Per-document state: output subsets `ttfont` in place and fills `subset`
+        font.ttfont = ttLib.TTFont(BytesIO(self._blobs[path]), recalcTimestamp=False, lazy=True)
+        font.missing_glyphs = []
+        font.biggest_size_pt = 0
+        font.subset = SubsetMap(font)
+        return font
+
+    def missing(self) -> List[str]:
+        """Scripts with no installed font file."""
+        return [script for script in self.script_fonts if not self.available(script)]
+
+    def warm(self) -> List[str]:
+        """Parse every installed script font now (startup warm-up). Returns the scripts loaded."""
+        warmed = []
+        for script in self.script_fonts:
+            path = self.path_for(script)
+            if path is not None:
+                self._prototype(path)
+                warmed.append(script)
+        missing = self.missing()
+        if missing:
+            print(f"⚠️ WARNING: No font for {', '.join(missing)} in {', '.join(self.search_dirs)}; "
+                  f"PDF handouts in those scripts will have missing characters. "
+                  f"Run: python -m app.utils.fonts download")
+        if not text_shaping_available():
+            print("⚠️ WARNING: uharfbuzz not installed; Indic PDF handouts will have broken conjuncts "
+                  "and misplaced vowel signs. Run: pip install uharfbuzz")
+        return warmed
+
+    def metrics(self) -> Dict:
+        return {"fonts": {s: self.path_for(s) for s in self.script_fonts},
+                "shaping": text_shaping_available(), **self.stats}
+
+
+def download_noto_fonts(target_dir: str = FONT_DIR, url_template: str = NOTO_URL) -> List[str]:
+    """
+    Fetch the Noto TTFs listed in SCRIPT_FONTS into `target_dir` (build step).
+    Raises on an HTTP error or a response that isn't a font, so a broken build fails
+    instead of shipping without Indic fonts. Returns the files downloaded.
+    """
+    import requests
+    os.makedirs(target_dir, exist_ok=True)
+    downloaded = []
+    for names in SCRIPT_FONTS.values():
+        name = names[0]
+        dest = os.path.join(target_dir, name)
+        if os.path.exists(dest):
+            continue
+        url = url_template.format(family=name.split("-")[0], file=name)
+        response = requests.get(url, timeout=60)
+        response.raise_for_status()
+        if not response.content.startswith(FONT_MAGIC):
+            raise ValueError(f"{url} did not return a TrueType font")
+        with open(dest + ".part", "wb") as f:
+            f.write(response.content)
+        os.replace(dest + ".part", dest)
+        downloaded.append(name)
+        print(f"Downloaded {name} ({len(response.content) // 1024}KB)")
+    return downloaded
+
+
+font_cache = FontCache()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["download"]:
+        download_noto_fonts()
+    print(font_cache.metrics())
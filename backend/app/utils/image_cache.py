@@ -0,0 +1,150 @@
+"""
+Image Cache - Content-addressed disk cache for /generate/image
+The frontend asks for the same prompt repeatedly (re-renders, history reloads),
+and every request used to be a full SDXL call plus a fresh img_<uuid>.png in /tmp.
+
+Images are stored as <sha256(prompt)>.png under IMAGE_CACHE_DIR. The directory is
+a size-capped LRU (a hit bumps the file's mtime, eviction removes the oldest
+files), so the warm set survives restarts. Concurrent misses for the same prompt
+share one generation, and the hash doubles as the HTTP ETag.
+"""
+import os
+import time
+import uuid
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+from app.utils.persistent_cache import CACHE_DIR
+from app.utils.singleflight import SingleFlight
+
+IMAGE_CACHE_DIR = os.environ.get("IMAGE_CACHE_DIR", os.path.join(CACHE_DIR, "images"))
+IMAGE_CACHE_MAX_BYTES = int(os.environ.get("IMAGE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+IMAGE_MODEL_ID = "stabilityai/stable-diffusion-xl-base-1.0"  # Part of the key: a model swap must miss
+
+
+def image_key(prompt: str) -> str:
+    """Whitespace-insensitive prompt hash; also used as the ETag."""
+    normalized = " ".join(prompt.split())
+    return hashlib.sha256(f"{IMAGE_MODEL_ID}\n{normalized}".encode("utf-8")).hexdigest()
+
+
+class ImageCache:
+    def __init__(self, directory: str = IMAGE_CACHE_DIR, max_bytes: int = IMAGE_CACHE_MAX_BYTES,
+                 render: Optional[Callable[[str, str], str]] = None):
+        """
+        Args:
+            directory: Where <key>.png files live
+            max_bytes: Total size cap; least recently used files are deleted beyond it
+            render: fn(prompt, output_path) that raises on failure; defaults to SDXL via image_gen.render
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._render = render
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # key -> size, oldest first
+        self._bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "failures": 0, "evictions": 0}
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        """Rebuild LRU order from the files already on disk (mtime = last use)."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".png"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, name[:-4], st.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._bytes += size
+        self._evict()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.png")
+
+    def lookup(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key not in self._index:
+                return None
+            self._index.move_to_end(key)
+        path = self.path_for(key)
+        try:
+            os.utime(path)  # Persist recency for the next restart's index rebuild
+        except OSError:
+            with self._lock:  # Deleted behind our back
+                self._bytes -= self._index.pop(key, 0)
+            return None
+        return path
+
+    def get_or_create(self, prompt: str) -> Tuple[str, str]:
+        """
+        Returns (key, path) of the cached PNG, generating it on a miss.
+        Raises if generation fails; failures are never cached.
+        """
+        key = image_key(prompt)
+        path = self.lookup(key)
+        if path is not None:
+            self.stats["hits"] += 1
+            return key, path
+        return key, self._flight.do(key, lambda: self._create(key, prompt))
+
+    def _create(self, key: str, prompt: str) -> str:
+        path = self.lookup(key)  # A previous leader may have just finished
+        if path is not None:
+            self.stats["hits"] += 1
+            return path
+        self.stats["misses"] += 1
+        render = self._render
+        if render is None:
+            from app.subsystems import subsystems
+            render = subsystems.get("image_gen").render
+
+        final = self.path_for(key)
+        tmp = f"{final}.{uuid.uuid4().hex}.tmp"
+        started = time.perf_counter()
+        try:
+            render(prompt, tmp)
+            os.replace(tmp, final)  # Atomic: readers never see a half-written PNG
+        except Exception:
+            self.stats["failures"] += 1
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        size = os.path.getsize(final)
+        with self._lock:
+            self._bytes += size - self._index.pop(key, 0)
+            self._index[key] = size
+        self._evict(keep=key)
+        print(f"Image cached {key[:12]} ({size // 1024}KB in {time.perf_counter() - started:.1f}s)")
+        return final
+
+    def _evict(self, keep: Optional[str] = None):
+        victims = []
+        with self._lock:
+            while self._bytes > self.max_bytes and len(self._index) > 1:
+                key, size = next(iter(self._index.items()))
+                if key == keep:
+                    break
+                self._index.popitem(last=False)
+                self._bytes -= size
+                victims.append(key)
+            self.stats["evictions"] += len(victims)
+        for key in victims:
+            try:
+                os.remove(self.path_for(key))
+            except OSError:
+                pass
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self._index), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                    "coalesced": self._flight.stats["coalesced"], **self.stats}
+
+
+image_cache = ImageCache()
@@ -16,17 +16,24 @@ class ImageGenerator:
         # or better, use a specific public space wrapper. 
         self.client = InferenceClient(model="stabilityai/stable-diffusion-xl-base-1.0")
 
+    def render(self, prompt, output_path):
+        """Real SDXL generation only; raises on API failure (no placeholder)."""
+        image = self.client.text_to_image(prompt)
+        image.save(output_path, format="PNG")
+        return output_path
+
+    def placeholder(self, output_path):
+        img = Image.new('RGB', (1024, 1024), color = (73, 109, 137))
+        img.save(output_path, format="PNG")
+        return output_path
+
     def generate(self, prompt, output_path):
         try:
-            image = self.client.text_to_image(prompt)
-            image.save(output_path)
-            return output_path
+            return self.render(prompt, output_path)
         except Exception as e:
             print(f"HF Generation Error: {e}")
             # Fallback to simple placeholder if API fails (rate limit)
-            img = Image.new('RGB', (1024, 1024), color = (73, 109, 137))
-            img.save(output_path)
-            return output_path
+            return self.placeholder(output_path)
 
 # Singleton
 image_gen = ImageGenerator()
@@ -1,75 +1,36 @@
 
 import os
-from fpdf import FPDF
-from pptx import Presentation
-from pptx.util import Inches, Pt
+import io
 import textwrap
+from app.utils.presentation_generator import render_presentation
+from app.utils.pdf_generator import render_pdf
 
 class MediaGenerator:
     @staticmethod
-    def generate_pdf(title, content, output_path):
-        """Generates a PDF file with the given title and content."""
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font("Arial", size=15)
-        
-        # Title
-        pdf.cell(200, 10, txt=title, ln=1, align='C')
-        pdf.ln(10)
-        
-        # Content
-        pdf.set_font("Arial", size=12)
-        # Handle unicode roughly (FPDF doesn't support complex unicode well without fonts, 
-        # sticking to latin1 compatible or sanitizing for MVP)
-        # For full Hindi support, we would need a TTF font. 
-        # Using basic replacement for now to avoid crashes.
-        safe_content = content.encode('latin-1', 'replace').decode('latin-1')
-        
-        pdf.multi_cell(0, 10, txt=safe_content)
-        
-        pdf.output(output_path)
+    def generate_pdf(title, content, output_path=None):
+        """
+        Generates a PDF (rendered by pdf_generator with Unicode fonts for Indian scripts).
+        output_path=None returns the bytes.
+        """
+        data = render_pdf(title, content)
+        if output_path is None:
+            return data
+        with open(output_path, "wb") as f:
+            f.write(data)
         return output_path
 
     @staticmethod
-    def generate_pptx(title, slides_data, output_path):
+    def generate_pptx(title, slides_data, output_path=None, with_images=True):
         """
-        Generates a PPTX file.
-        slides_data: List of dicts {'title': str, 'content': str/list}
+        Generates a PPTX file (rendered by presentation_generator, the single PPTX path).
+        slides_data: List of dicts {'title': str, 'content': str/list, 'image': optional query/URL}
+        output_path=None returns the bytes instead of writing a file.
         """
-        prs = Presentation()
-        
-        # Title Slide
-        title_slide_layout = prs.slide_layouts[0]
-        slide = prs.slides.add_slide(title_slide_layout)
-        title_shape = slide.shapes.title
-        subtitle = slide.placeholders[1]
-        
-        title_shape.text = title
-        subtitle.text = "Generated by Sahayak.AI"
-        
-        # Content Slides
-        bullet_slide_layout = prs.slide_layouts[1]
-        
-        for slide_info in slides_data:
-            slide = prs.slides.add_slide(bullet_slide_layout)
-            shapes = slide.shapes
-            title_shape = shapes.title
-            body_shape = shapes.placeholders[1]
-            
-            title_shape.text = slide_info.get('title', 'Untitled Slide')
-            
-            tf = body_shape.text_frame
-            content = slide_info.get('content', [])
-            
-            if isinstance(content, str):
-                tf.text = content
-            elif isinstance(content, list):
-                for item in content:
-                    p = tf.add_paragraph()
-                    p.text = str(item)
-                    p.level = 0
-        
-        prs.save(output_path)
+        data = render_presentation(title, slides_data, with_images=with_images)
+        if output_path is None:
+            return data
+        with open(output_path, "wb") as f:
+            f.write(data)
         return output_path
         
     @staticmethod
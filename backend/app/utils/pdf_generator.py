@@ -1,5 +1,16 @@
+"""
+PDF Generator using fpdf2 (Open Source)
+Lesson-plan / handout PDFs. This is the single PDF code path
+(MediaGenerator.generate_pdf delegates here).
+
+Text is set in cached Unicode TTFs (app/utils/fonts.py): each paragraph uses the
+font of its dominant script, other scripts in the document are registered as
+fallbacks for mixed runs, and fpdf2 embeds only the glyphs used. With no TTF
+installed it degrades to the old Latin-1 core-font output.
+"""
 from fpdf import FPDF
-import textwrap
+from fpdf.enums import XPos, YPos
+from app.utils.fonts import font_cache, detect_scripts, dominant_script, text_shaping_available
 
 class EducationalPDF(FPDF):
     def header(self):
@@ -12,31 +23,63 @@ class EducationalPDF(FPDF):
         self.set_font('Helvetica', 'I', 8)
         self.cell(0, 10, f'Page {self.page_no()}', align='C')
 
-def create_pdf(title: str, content: str, filename: str):
-    pdf = EducationalPDF()
-    pdf.add_page()
-    
-    # Title
+
+def _latin1_fallback(pdf: FPDF, title: str, content: str):
+    """Pre-Unicode behaviour, used only when no TTF font is installed at all."""
     pdf.set_font("Helvetica", "B", 16)
-    pdf.multi_cell(0, 10, title, align='L')
+    pdf.multi_cell(0, 10, title.encode('latin-1', 'replace').decode('latin-1'), align='L')
     pdf.ln(5)
-    
-    # Content
-    # Simplified Markdown parsing (removing ** for bold)
     pdf.set_font("Helvetica", size=12)
-    
+    # FPDF standard fonts only support Latin-1: replace unsupported chars to prevent a crash
+    pdf.multi_cell(0, 7, content.encode('latin-1', 'replace').decode('latin-1'))
+
+
+def render_pdf(title: str, content: str, fonts=None) -> bytes:
+    """Render a handout to PDF bytes."""
+    fonts = fonts or font_cache
+    pdf = EducationalPDF()
+
     # Very basic cleanup of markdown for PDF
     clean_content = content.replace('**', '').replace('###', '')
-    
-    # Handle utf-8 characters robustly
-    try:
-        # FPDF standard fonts only support Latin-1.
-        # We replace unsupported chars to prevent crash.
-        clean_content = clean_content.encode('latin-1', 'replace').decode('latin-1')
-        pdf.multi_cell(0, 7, clean_content)
-    except Exception as e:
-        print(f"PDF Generation Encoding Error: {e}")
-        pdf.multi_cell(0, 7, "Error: Content contains unsupported characters for PDF generation. Please view in web interface.")
-    
-    pdf.output(filename)
+
+    base = fonts.install(pdf, "latin")
+    if base is None:
+        pdf.add_page()
+        _latin1_fallback(pdf, title, clean_content)
+        return bytes(pdf.output())
+
+    # Load only the scripts this document uses
+    families = {"latin": base}
+    for script in detect_scripts(title + clean_content):
+        family = fonts.install(pdf, script)
+        if family:
+            families[script] = family
+        else:
+            print(f"PDF: no font installed for {script}; those characters will be missing")
+    if len(families) > 1:
+        pdf.set_fallback_fonts([f for s, f in families.items() if s != "latin"] + [base], exact_match=False)
+        if text_shaping_available():
+            pdf.set_text_shaping(True)  # Conjuncts and vowel-sign reordering
+
+    pdf.add_page()
+
+    # Title
+    pdf.set_font(families.get(dominant_script(title), base), size=16)
+    pdf.multi_cell(0, 10, title, align='L')
+    pdf.ln(5)
+
+    # Content: one font selection per paragraph (its dominant script)
+    for paragraph in clean_content.split("\n"):
+        if not paragraph.strip():
+            pdf.ln(7)
+            continue
+        pdf.set_font(families.get(dominant_script(paragraph), base), size=12)
+        pdf.multi_cell(0, 7, paragraph, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    return bytes(pdf.output())
+
+
+def create_pdf(title: str, content: str, filename: str):
+    with open(filename, "wb") as f:
+        f.write(render_pdf(title, content))
     return filename
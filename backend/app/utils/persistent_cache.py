@@ -0,0 +1,83 @@
+"""
+Persistent TTL Cache - Small SQLite-backed key/value store for JSON values
+Survives process restarts (and is shared by workers on the same disk), which
+an in-memory dict cannot do. Entries carry their write time so callers can
+decide between fresh / stale-while-revalidate / expired.
+"""
+import os
+import json
+import time
+import sqlite3
+import tempfile
+import threading
+from typing import Any, Optional, Tuple
+
+CACHE_DIR = os.environ.get("SAHAYAK_CACHE_DIR", os.path.join(tempfile.gettempdir(), "sahayak_cache"))
+
+
+class PersistentTTLCache:
+    def __init__(self, name: str, max_age_s: float, path: Optional[str] = None, max_entries: int = 50000):
+        """
+        Args:
+            name: Table name (and default file name) for this cache
+            max_age_s: Entries older than this are treated as missing and purged
+            path: SQLite file; defaults to $SAHAYAK_CACHE_DIR/<name>.sqlite3
+            max_entries: Oldest rows are pruned beyond this
+        """
+        self.name = name
+        self.max_age_s = max_age_s
+        self.max_entries = max_entries
+        self.path = path or os.path.join(CACHE_DIR, f"{name}.sqlite3")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {name} (key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {name}_stored_at ON {name} (stored_at)")
+        self._conn.commit()
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """(value, age_seconds) or None if missing/expired."""
+        with self._lock:
+            row = self._conn.execute(f"SELECT value, stored_at FROM {self.name} WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        age = time.time() - row[1]
+        if age > self.max_age_s:
+            self.delete(key)
+            return None
+        return json.loads(row[0]), age
+
+    def set(self, key: str, value: Any):
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.name} (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, payload, time.time()),
+            )
+            self._conn.commit()
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self._prune()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.name} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def _prune(self):
+        """Drop expired rows and the oldest rows beyond max_entries (caller holds the lock)."""
+        self._conn.execute(f"DELETE FROM {self.name} WHERE stored_at < ?", (time.time() - self.max_age_s,))
+        self._conn.execute(
+            f"DELETE FROM {self.name} WHERE key IN (SELECT key FROM {self.name} ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.name}").fetchone()[0]
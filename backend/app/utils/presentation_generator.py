@@ -1,55 +1,142 @@
 """
 Presentation Generator using python-pptx (Open Source)
-Creates PowerPoint presentations for educational content
+Creates PowerPoint presentations for educational content.
+
+This is the single PPTX code path (MediaGenerator.generate_pptx delegates here).
+The default template package is read from disk once and kept as bytes; each deck
+opens its own Presentation from them (python-pptx objects can't be safely
+deep-copied). That saves only ~0.4ms (~15%) per open over Presentation(); a
+full render is dominated by building and saving the slides.
+Decks are rendered into a BytesIO and returned as bytes, so endpoints can
+stream them back without a round trip through /tmp.
 """
+import io
+import threading
+from typing import Dict, List, Optional
 from pptx import Presentation
 from pptx.util import Inches, Pt
-from pptx.dml.color import RgbColor
-from pptx.enum.text import PP_ALIGN
-import os
+from app.utils.slide_images import slide_image_source, resolve_slide_images, strip_image_markers
 
-def create_presentation(title: str, slides_content: list, filename: str) -> str:
+DEFAULT_SUBTITLE = "Generated by Sahayak.AI"
+TITLE_LAYOUT, BULLET_LAYOUT = 0, 1
+
+_template_bytes: Optional[bytes] = None
+_template_lock = threading.Lock()
+
+
+def _base_template() -> bytes:
+    """The default template package, serialized once. Bytes can't be mutated or detached by a deck."""
+    global _template_bytes
+    if _template_bytes is None:
+        with _template_lock:
+            if _template_bytes is None:
+                buffer = io.BytesIO()
+                Presentation().save(buffer)
+                _template_bytes = buffer.getvalue()
+    return _template_bytes
+
+
+def new_presentation() -> Presentation:
+    """A fresh, independent deck opened from the cached template bytes."""
+    return Presentation(io.BytesIO(_base_template()))
+
+
+def _place_image(prs, slide, body_shape, image: bytes):
+    """Text on the left ~55%, picture fitted into the right-hand column."""
+    margin = Inches(0.4)
+    column_left = int(prs.slide_width * 0.56)
+    box_w = prs.slide_width - column_left - margin
+    box_h = prs.slide_height - body_shape.top - margin
+    try:
+        picture = slide.shapes.add_picture(io.BytesIO(image), column_left, body_shape.top, width=box_w)
+    except Exception as e:
+        print(f"PPTX Image Error: {e}")  # Not a decodable image: keep the text-only slide
+        return
+    if picture.height > box_h:
+        scale = box_h / picture.height
+        picture.height = int(box_h)
+        picture.width = int(picture.width * scale)
+        picture.left = int(column_left + (box_w - picture.width) / 2)
+    body_shape.width = column_left - body_shape.left - Inches(0.2)
+
+
+def render_presentation(title: str, slides_content: List[Dict], subtitle: str = DEFAULT_SUBTITLE,
+                        with_images: bool = True, images: Optional[List[Optional[bytes]]] = None,
+                        body_font_pt: Optional[int] = None) -> bytes:
     """
-    Create a PowerPoint presentation from content.
-    
+    Render a deck to PPTX bytes.
+
     Args:
-        title: Presentation title
-        slides_content: List of dicts with 'title' and 'content' keys
-        filename: Output filename (without extension)
-    
+        title: Presentation title (title slide)
+        slides_content: List of dicts {'title': str, 'content': str/list, 'image': optional query/URL}
+        subtitle: Title slide subtitle
+        with_images: Resolve each slide's [IMAGE_SEARCH: ...] concurrently and place it on the slide
+        images: Pre-resolved image bytes aligned with slides_content (skips the lookup)
+        body_font_pt: Force a body font size (None = template default)
+
     Returns:
-        Path to generated file
+        The .pptx file contents
     """
-    prs = Presentation()
-    
+    if images is None:
+        images = [None] * len(slides_content)
+        if with_images:
+            images = resolve_slide_images([slide_image_source(s) for s in slides_content])
+
+    prs = new_presentation()
+
     # Title Slide
-    title_slide_layout = prs.slide_layouts[0]
-    slide = prs.slides.add_slide(title_slide_layout)
-    title_shape = slide.shapes.title
-    subtitle = slide.placeholders[1]
-    
-    title_shape.text = title
-    subtitle.text = "Generated by Sahayak.AI - Your Teaching Companion"
-    
+    slide = prs.slides.add_slide(prs.slide_layouts[TITLE_LAYOUT])
+    slide.shapes.title.text = title
+    slide.placeholders[1].text = subtitle
+
     # Content Slides
-    content_layout = prs.slide_layouts[1]  # Title and Content
-    
-    for slide_data in slides_content:
-        slide = prs.slides.add_slide(content_layout)
-        slide.shapes.title.text = slide_data.get('title', 'Untitled')
-        
+    bullet_layout = prs.slide_layouts[BULLET_LAYOUT]
+    for slide_data, image in zip(slides_content, images):
+        slide = prs.slides.add_slide(bullet_layout)
+        slide.shapes.title.text = strip_image_markers(str(slide_data.get('title', 'Untitled Slide')))
+
         body = slide.placeholders[1]
         tf = body.text_frame
-        tf.text = slide_data.get('content', '')
-        
-        # Format text
-        for paragraph in tf.paragraphs:
-            paragraph.font.size = Pt(18)
-    
-    # Save
-    output_path = f"/tmp/{filename}.pptx"
-    prs.save(output_path)
-    return output_path
+        content = slide_data.get('content', [])
+        if isinstance(content, str):
+            tf.text = strip_image_markers(content)
+        elif isinstance(content, list):
+            for item in content:
+                text = strip_image_markers(str(item))
+                if not text:
+                    continue  # Item was only an image marker
+                p = tf.add_paragraph()
+                p.text = text
+                p.level = 0
+
+        if body_font_pt:
+            for paragraph in tf.paragraphs:
+                paragraph.font.size = Pt(body_font_pt)
+
+        if image:
+            _place_image(prs, slide, body, image)
+
+    buffer = io.BytesIO()
+    prs.save(buffer)
+    return buffer.getvalue()
+
+
+def create_presentation(title: str, slides_content: list, filename: str) -> str:
+    """
+    Create a PowerPoint presentation from content.
+
+    Args:
+        title: Presentation title
+        slides_content: List of dicts with 'title' and 'content' keys
+        filename: Output filename (without extension); kept for callers, the artifact store names the file
+
+    Returns:
+        Path to generated file (managed by the artifact store)
+    """
+    from app.artifact_store import artifact_store
+    data = render_presentation(title, slides_content,
+                               subtitle="Generated by Sahayak.AI - Your Teaching Companion", body_font_pt=18)
+    return artifact_store.put_bytes("ppt", data, "pptx")
 
 
 def create_lesson_presentation(topic: str, content: str) -> str:
@@ -59,17 +146,17 @@ def create_lesson_presentation(topic: str, content: str) -> str:
     """
     slides = []
     sections = content.split('###')
-    
+
     for section in sections:
         if section.strip():
             lines = section.strip().split('\n', 1)
             title = lines[0].replace('**', '').strip()
             body = lines[1].strip() if len(lines) > 1 else ""
             slides.append({'title': title, 'content': body[:500]})  # Limit content per slide
-    
+
     if not slides:
         slides = [{'title': topic, 'content': content[:500]}]
-    
+
     return create_presentation(topic, slides, topic.replace(' ', '_').lower())
 
 
@@ -0,0 +1,114 @@
+"""
+Slide Images - Resolve every image a deck needs, concurrently
+The pedagogy agent puts `[IMAGE_SEARCH: query]` (and sometimes a markdown
+`![alt](url)`) on each slide. Looking those up one slide at a time made a deck
+cost N image searches in series; here all of a deck's lookups run at once on a
+bounded pool under a single per-deck deadline, so a 5-slide deck takes about as
+long as its slowest lookup. Slides whose image misses the deadline just get
+no picture.
+"""
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+SLIDE_IMAGE_WORKERS = int(os.environ.get("SLIDE_IMAGE_WORKERS", "6"))
+SLIDE_IMAGE_DEADLINE_S = float(os.environ.get("SLIDE_IMAGE_DEADLINE_S", "12"))
+SLIDE_IMAGE_FETCH_TIMEOUT_S = 8.0
+SLIDE_IMAGE_MAX_BYTES = 5 * 1024 * 1024  # Skip anything bigger: it bloats the PPTX
+
+IMAGE_SEARCH_MARKER = re.compile(r"\[IMAGE_SEARCH:\s*([^\]]+?)\s*\]")
+MARKDOWN_IMAGE = re.compile(r"!\[[^\]]*\]\((https?://[^)\s]+)\)")
+
+
+def _texts(slide: Dict) -> List[str]:
+    content = slide.get("content", [])
+    items = content if isinstance(content, list) else [content]
+    return [str(slide.get("title", ""))] + [str(item) for item in items]
+
+
+def slide_image_source(slide: Dict) -> Optional[str]:
+    """The image a slide asks for: explicit "image" key, else first marker, else first markdown image URL."""
+    explicit = slide.get("image")
+    if isinstance(explicit, str) and explicit.strip():
+        return explicit.strip()
+    for text in _texts(slide):
+        match = IMAGE_SEARCH_MARKER.search(text)
+        if match:
+            return match.group(1)
+    for text in _texts(slide):
+        match = MARKDOWN_IMAGE.search(text)
+        if match:
+            return match.group(1)
+    return None
+
+
+def strip_image_markers(text: str) -> str:
+    """Slide text without the [IMAGE_SEARCH: ...] / ![](...) markers."""
+    return MARKDOWN_IMAGE.sub("", IMAGE_SEARCH_MARKER.sub("", text)).strip()
+
+
+def _download(url: str) -> bytes:
+    import requests
+    response = requests.get(url, timeout=SLIDE_IMAGE_FETCH_TIMEOUT_S,
+                            headers={"User-Agent": "Sahayak.AI/1.0"}, stream=True)
+    response.raise_for_status()
+    if not response.headers.get("Content-Type", "image/").startswith("image/"):
+        raise ValueError(f"Not an image: {response.headers.get('Content-Type')}")
+    data = response.raw.read(SLIDE_IMAGE_MAX_BYTES + 1, decode_content=True)
+    if len(data) > SLIDE_IMAGE_MAX_BYTES:
+        raise ValueError("Image too large")
+    return data
+
+
+def fetch_slide_image(source: str) -> Optional[bytes]:
+    """URL -> download; query -> DDG image search, then SDXL (via the image cache) if every result fails."""
+    if source.startswith(("http://", "https://")):
+        return _download(source)
+
+    from app.tools.search import search_images
+    for url in search_images(source, max_results=2):
+        try:
+            return _download(url)
+        except Exception as e:
+            print(f"Slide image download failed ({url[:60]}): {e}")
+
+    from app.utils.image_cache import image_cache
+    _, path = image_cache.get_or_create(source)
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def resolve_slide_images(sources: List[Optional[str]], fetch: Callable[[str], Optional[bytes]] = None,
+                         max_workers: int = SLIDE_IMAGE_WORKERS,
+                         deadline_s: float = SLIDE_IMAGE_DEADLINE_S) -> List[Optional[bytes]]:
+    """
+    Fetch every distinct source concurrently; returns image bytes aligned with `sources`
+    (None where the slide has no image, the lookup failed, or the deck deadline passed).
+    """
+    fetch = fetch or fetch_slide_image
+    unique = list(dict.fromkeys(s for s in sources if s))
+    if not unique:
+        return [None] * len(sources)
+
+    started = time.perf_counter()
+    resolved: Dict[str, bytes] = {}
+    pool = ThreadPoolExecutor(max_workers=min(max_workers, len(unique)), thread_name_prefix="slide-img")
+    try:
+        futures = {pool.submit(fetch, source): source for source in unique}
+        done, pending = wait(futures, timeout=deadline_s)
+        for future in done:
+            try:
+                data = future.result()
+                if data:
+                    resolved[futures[future]] = data
+            except Exception as e:
+                print(f"Slide image lookup failed for '{futures[future]}': {e}")
+    finally:
+        # Don't hold the deck hostage to a slow lookup: abandon stragglers
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    print(f"Slide images: {len(resolved)}/{len(unique)} resolved in {time.perf_counter() - started:.1f}s"
+          f"{f' ({len(pending)} past deadline)' if pending else ''}")
+    return [resolved.get(s) if s else None for s in sources]
@@ -0,0 +1,139 @@
+"""
+Still Video - Encode a single image (or a Ken-Burns pan/zoom over it) straight to MP4
+The "Motion Slide" fallback used MoviePy's generic frame loop: 96 identical
+1024x1024 frames converted to NumPy and re-encoded one by one. Here ffmpeg gets
+either the still itself (looped, x264 `-tune stillimage`, duplicated frames
+become near-free skip blocks) or raw RGB Ken-Burns frames over a stdin pipe.
+No intermediate frames touch the disk.
+"""
+import os
+import shutil
+import subprocess
+from functools import lru_cache
+from typing import Optional, Tuple
+from PIL import Image
+
+STILL_VIDEO_PRESET = os.environ.get("STILL_VIDEO_PRESET", "veryfast")
+KEN_BURNS_SIZE = (720, 720)
+KEN_BURNS_ZOOM = 1.15  # End zoom; start is 1.0
+
+
+@lru_cache(maxsize=1)
+def find_ffmpeg() -> Optional[str]:
+    """ffmpeg from imageio-ffmpeg (bundled with MoviePy) or PATH; None if neither exists."""
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return shutil.which("ffmpeg")
+
+
+def _even(n: int) -> int:
+    return n - (n % 2)  # yuv420p needs even dimensions
+
+
+def _x264_args(fps: int, tune: str) -> list:
+    return [
+        "-c:v", "libx264", "-preset", STILL_VIDEO_PRESET, "-tune", tune,
+        "-pix_fmt", "yuv420p", "-r", str(fps), "-movflags", "+faststart",
+    ]
+
+
+def _run(cmd: list, stdin_frames=None):
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE if stdin_frames is not None else subprocess.DEVNULL,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        if stdin_frames is not None:
+            for frame in stdin_frames:
+                proc.stdin.write(frame)
+        _, err = proc.communicate()  # Closes stdin: ffmpeg sees EOF and finishes the file
+    except BrokenPipeError:
+        _, err = proc.communicate()  # ffmpeg died early; its stderr says why
+    except BaseException:
+        proc.kill()
+        proc.wait()
+        raise
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed ({proc.returncode}): {err.decode(errors='replace')[-300:]}")
+
+
+def encode_still(image_path: str, output_path: str, duration_s: float = 4.0, fps: int = 24) -> str:
+    """The image held for `duration_s`; with -tune stillimage every frame after the first is ~a skip frame."""
+    ffmpeg = find_ffmpeg()
+    if ffmpeg is None:
+        raise RuntimeError("ffmpeg not found")
+    # Input at 1 fps: the PNG is decoded/scaled once per second, `-r` duplicates it up to `fps`
+    cmd = [ffmpeg, "-y", "-loglevel", "error", "-loop", "1", "-framerate", "1", "-i", image_path,
+           "-t", f"{duration_s:.3f}", "-vf", "scale=trunc(iw/2)*2:trunc(ih/2)*2",
+           *_x264_args(fps, "stillimage"), "-an", output_path]
+    _run(cmd)
+    return output_path
+
+
+def ken_burns_frames(image: Image.Image, frames: int, size: Tuple[int, int] = KEN_BURNS_SIZE,
+                     zoom: float = KEN_BURNS_ZOOM):
+    """
+    Yield raw RGB frames of a slow zoom with a gentle diagonal pan.
+    Each frame is one C-level resize of a sub-pixel crop box, so motion stays smooth.
+    """
+    image = image.convert("RGB")
+    src_w, src_h = image.size
+    out_w, out_h = size
+    # Fit the output aspect inside the source
+    base_w = min(src_w, src_h * out_w / out_h)
+    base_h = base_w * out_h / out_w
+    for i in range(frames):
+        t = i / max(1, frames - 1)
+        t = t * t * (3 - 2 * t)  # Smoothstep: ease in/out
+        scale = 1.0 + (zoom - 1.0) * t
+        box_w, box_h = base_w / scale, base_h / scale
+        # Drift from the top-left towards the centre while zooming in
+        cx = src_w / 2 - (src_w - base_w / zoom) / 2 * (1 - t)
+        cy = src_h / 2 - (src_h - base_h / zoom) / 2 * (1 - t)
+        left = min(max(0.0, cx - box_w / 2), src_w - box_w)
+        top = min(max(0.0, cy - box_h / 2), src_h - box_h)
+        frame = image.resize(size, Image.BILINEAR, box=(left, top, left + box_w, top + box_h))
+        yield frame.tobytes()
+
+
+def encode_ken_burns(image_path: str, output_path: str, duration_s: float = 4.0, fps: int = 24,
+                     size: Tuple[int, int] = KEN_BURNS_SIZE) -> str:
+    """Pan/zoom "Motion Slide": frames are generated in memory and piped to ffmpeg as raw RGB."""
+    ffmpeg = find_ffmpeg()
+    if ffmpeg is None:
+        raise RuntimeError("ffmpeg not found")
+    size = (_even(size[0]), _even(size[1]))
+    frames = max(1, int(round(duration_s * fps)))
+    cmd = [ffmpeg, "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgb24",
+           "-s", f"{size[0]}x{size[1]}", "-framerate", str(fps), "-i", "pipe:0",
+           *_x264_args(fps, "film"), "-an", output_path]
+    with Image.open(image_path) as image:
+        _run(cmd, ken_burns_frames(image, frames, size))
+    return output_path
+
+
+def encode_still_moviepy(image_path: str, output_path: str, duration_s: float = 4.0, fps: int = 24) -> str:
+    """Original MoviePy path, kept for hosts without an ffmpeg binary we can drive directly."""
+    # Compatibility for MoviePy v2
+    try:
+        from moviepy import ImageClip
+    except ImportError:
+        try:
+            from moviepy.editor import ImageClip
+        except ImportError:
+             from moviepy.video.VideoClip import ImageClip
+
+    # MoviePy v2 uses with_duration, v1 uses set_duration. Try both.
+    try:
+        clip = ImageClip(image_path)
+        if hasattr(clip, "with_duration"):
+            clip = clip.with_duration(duration_s).with_fps(fps)
+        else:
+            clip = clip.set_duration(duration_s).set_fps(fps)
+
+        # No `verbose=`: MoviePy v2 rejects it, and logger=None silences both versions
+        clip.write_videofile(output_path, codec="libx264", audio_codec="aac", logger=None)
+    except Exception as e:
+        print(f"MoviePy Clip Error: {e}")
+        raise e
+    return output_path
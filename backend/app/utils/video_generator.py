@@ -1,16 +1,17 @@
 import os
 import shutil
-import uuid
-from gradio_client import Client
-from PIL import Image
-import numpy as np
 from app.utils.image_generator import image_gen
+from app.utils.still_video import find_ffmpeg, encode_still, encode_ken_burns, encode_still_moviepy
+
+# Ken-Burns pan/zoom for the fallback "Motion Slide"; "0" = plain still
+VIDEO_FALLBACK_MOTION = os.environ.get("VIDEO_FALLBACK_MOTION", "1") == "1"
 
 class VideoGenerator:
     def __init__(self):
         # Try to init client, but don't crash if it fails
         self.client = None
         try:
+            from gradio_client import Client
             self.client = Client("damo-vilab/modelscope-text-to-video-synthesis")
         except:
             print("Video: ModelScope Client Init Failed. Using Fallback.")
@@ -26,45 +27,30 @@ class VideoGenerator:
             except Exception as e:
                 print(f"Real Video Gen Failed: {e}")
 
-        # 2. FALLBACK: Generate Image -> Video (Slideshow)
+        # 2. FALLBACK: Generate Image -> Video ("Motion Slide")
         print("Video: Using Image-to-Video Fallback.")
+        temp_img = output_path.replace(".mp4", ".png")
         try:
-            # Compatibility for MoviePy v2
-            try:
-                from moviepy import ImageClip
-            except ImportError:
-                try:
-                    from moviepy.editor import ImageClip
-                except ImportError:
-                     from moviepy.video.VideoClip import ImageClip
-            
             # Generate a frame using our ImageGenerator
-            temp_img = output_path.replace(".mp4", ".png")
             image_gen.generate(prompt, temp_img)
-            
-            
-            if os.path.exists(temp_img):
-                # Create 4 sec video from image
-                # MoviePy v2 uses with_duration, v1 uses set_duration. Try both.
+            if not os.path.exists(temp_img):
+                return None
+
+            # Fast path: ffmpeg straight from the still (no per-frame MoviePy loop)
+            if find_ffmpeg():
                 try:
-                    clip = ImageClip(temp_img)
-                    if hasattr(clip, "with_duration"):
-                        clip = clip.with_duration(4).with_fps(24)
-                    else:
-                        clip = clip.set_duration(4).set_fps(24)
-                        
-                    clip.write_videofile(output_path, codec="libx264", audio_codec="aac", verbose=False, logger=None)
+                    encode = encode_ken_burns if VIDEO_FALLBACK_MOTION else encode_still
+                    return encode(temp_img, output_path, duration_s=4, fps=24)
                 except Exception as e:
-                    print(f"MoviePy Clip Error: {e}")
-                    raise e
-                
-                # Cleanup
-                if os.path.exists(temp_img):
-                    os.remove(temp_img)
-                    
-                return output_path
+                    print(f"ffmpeg Still Encode Failed, trying MoviePy: {e}")
+
+            return encode_still_moviepy(temp_img, output_path)
         except Exception as e:
             print(f"Fallback Video Failed: {e}")
             return None
+        finally:
+            # Cleanup
+            if os.path.exists(temp_img):
+                os.remove(temp_img)
 
 video_gen = VideoGenerator()
@@ -1,7 +1,80 @@
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from duckduckgo_search import DDGS
+from app.utils.persistent_cache import PersistentTTLCache
+from app.utils.singleflight import SingleFlight
+
+# Results younger than FRESH are served as-is; up to STALE they are served
+# instantly while a background refresh runs; older ones are re-fetched.
+VIDEO_SEARCH_FRESH_S = float(os.environ.get("VIDEO_SEARCH_FRESH_S", str(24 * 3600)))
+VIDEO_SEARCH_STALE_S = float(os.environ.get("VIDEO_SEARCH_STALE_S", str(7 * 24 * 3600)))
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """'  Gravity for Kids! ' and 'gravity for kids' share one cache entry."""
+    return _WHITESPACE.sub(" ", query).strip().strip("?!.,").lower()
+
 
 class VideoSearchService:
+    def __init__(self, cache: PersistentTTLCache = None):
+        self.cache = cache or PersistentTTLCache("video_search", max_age_s=VIDEO_SEARCH_STALE_S)
+        self._flight = SingleFlight()
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="video-refresh")
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.stats = {"fresh_hits": 0, "stale_hits": 0, "misses": 0}
+
     def search(self, query: str, limit: int = 4):
+        key = f"{normalize_query(query)}|{limit}"
+        try:
+            cached = self.cache.get(key)
+        except Exception as e:
+            print(f"Video Search Cache Error: {e}")
+            cached = None
+
+        if cached is not None:
+            results, age = cached
+            if age < VIDEO_SEARCH_FRESH_S:
+                self.stats["fresh_hits"] += 1
+                return results
+            # Stale-while-revalidate: answer now, refresh in the background
+            self.stats["stale_hits"] += 1
+            self._refresh_in_background(key, query, limit)
+            return results
+
+        self.stats["misses"] += 1
+        # Concurrent identical searches share one upstream DDGS call
+        return self._flight.do(key, lambda: self._fetch_and_store(key, query, limit))
+
+    def _refresh_in_background(self, key: str, query: str, limit: int):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._flight.do(key, lambda: self._fetch_and_store(key, query, limit))
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._refresher.submit(refresh)
+
+    def _fetch_and_store(self, key: str, query: str, limit: int):
+        results = self._search_upstream(query, limit)
+        if results:  # Don't pin failures/empty answers in the cache
+            try:
+                self.cache.set(key, results)
+            except Exception as e:
+                print(f"Video Search Cache Error: {e}")
+        return results
+
+    def _search_upstream(self, query: str, limit: int = 4):
         try:
             # Clean Query: If LLM hallucinated a URL, try to save it or fail.
             if query.startswith("http"):
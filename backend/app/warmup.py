@@ -0,0 +1,197 @@
+"""
+Warm-up - Background warm-up of heavy subsystems, reported by /ready
+/health only says the process is up. Right after a deploy the LLM client, the
+MiniLM embeddings, the RAG index, the ModelScope video client and the PDF fonts
+are all cold, so the first real requests paid every cold start. These are now
+warmed concurrently on background threads at startup. /ready reports each one's state
+and warm-up time and returns 503 until the required ones are usable, so the
+load balancer only routes traffic to warm instances. A failed task is retried
+with backoff (WARMUP_RETRY_S), so a transient failure doesn't keep /ready at 503
+for the life of the process.
+
+States: cold -> warming -> ready | degraded (usable, with a fallback) | skipped | failed
+"""
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.subsystems import subsystems
+
+WARMUP_ON_STARTUP = os.environ.get("WARMUP_ON_STARTUP", "1") == "1"
+# One 1-token completion per distinct provider key at boot
+WARMUP_VALIDATE_KEYS = os.environ.get("WARMUP_VALIDATE_KEYS", "1") == "1"
+# The RAG index pulls MiniLM into every worker and no route queries it yet: opt in once one does
+WARMUP_RAG = os.environ.get("WARMUP_RAG", "0") == "1"
+# Subsystems that must be usable before /ready says yes; the rest are reported only
+READY_REQUIRES = [s.strip() for s in os.environ.get("READY_REQUIRES", "llm,media").split(",") if s.strip()]
+# First retry of a failed task after this many seconds, doubling up to WARMUP_RETRY_MAX_S (0 = never retry)
+WARMUP_RETRY_S = float(os.environ.get("WARMUP_RETRY_S", "30"))
+WARMUP_RETRY_MAX_S = float(os.environ.get("WARMUP_RETRY_MAX_S", "600"))
+
+COLD, WARMING, READY, DEGRADED, SKIPPED, FAILED = "cold", "warming", "ready", "degraded", "skipped", "failed"
+USABLE = (READY, DEGRADED, SKIPPED)
+
+
+def _warm_llm() -> Tuple[str, object]:
+    llm = subsystems.get("llm")
+    if not llm.available_models:
+        raise RuntimeError("No LLM API keys configured")
+    if not WARMUP_VALIDATE_KEYS:
+        return READY, f"{len(llm.available_models)} providers (keys not validated)"
+    keys = llm.validate_keys()
+    working = [name for name, outcome in keys.items() if outcome == "ok"]
+    if working:
+        return (READY if len(working) == len(keys) else DEGRADED), keys
+    if all(outcome == "auth" for outcome in keys.values()):
+        raise RuntimeError(f"No provider accepted its key: {', '.join(keys)}")
+    # Rate-limited or unreachable: the circuit breaker re-probes them, so quota doesn't gate readiness
+    return DEGRADED, keys
+
+
+def _warm_embeddings() -> Tuple[str, object]:
+    from app.llm_cache import response_cache
+    from app.rag.embeddings import EMBEDDING_BACKEND, EMBEDDING_MODEL
+    if not response_cache.semantic_enabled:
+        return SKIPPED, "Semantic cache off (LLM_SEMANTIC_CACHE=0)"
+    if not response_cache.warm():
+        raise RuntimeError(f"{EMBEDDING_MODEL} failed to load")
+    return READY, f"{EMBEDDING_MODEL} ({EMBEDDING_BACKEND})"
+
+
+def _warm_rag() -> Tuple[str, object]:
+    if not WARMUP_RAG:
+        return SKIPPED, "Loaded on first query (WARMUP_RAG=0)"
+    from app.rag.store import rag_store
+    return READY, {"documents": rag_store.warm()}  # Opens the on-disk index; embeds only unseen seed docs
+
+
+def _warm_video() -> Tuple[str, object]:
+    video_gen = subsystems.get("video_gen")  # Builds the ModelScope client (network round-trip)
+    if video_gen.client is None:
+        return DEGRADED, "ModelScope unreachable; Motion Slide fallback only"
+    return READY, "ModelScope client connected"
+
+
+def _warm_media() -> Tuple[str, object]:
+    subsystems.get("media")
+    from app.utils.fonts import font_cache, text_shaping_available
+    fonts = font_cache.warm()
+    missing = font_cache.missing()
+    shaping = text_shaping_available()  # Indic scripts render wrongly without it
+    return (DEGRADED if missing or not shaping else READY), {"fonts": fonts, "missing": missing, "shaping": shaping}
+
+
+def _warm_images() -> Tuple[str, object]:
+    subsystems.get("image_gen")
+    return READY, None
+
+
+WARMUP_TASKS = {
+    "llm": _warm_llm,
+    "embeddings": _warm_embeddings,
+    "rag": _warm_rag,
+    "video": _warm_video,
+    "media": _warm_media,
+    "images": _warm_images,
+}
+
+
+class _Task:
+    __slots__ = ("fn", "state", "started_at", "duration_s", "detail", "attempts")
+
+    def __init__(self, fn: Callable[[], Tuple[str, object]]):
+        self.fn = fn
+        self.state = COLD
+        self.started_at: Optional[float] = None
+        self.duration_s: Optional[float] = None
+        self.detail: object = None
+        self.attempts = 0
+
+
+class Warmup:
+    def __init__(self, tasks: Optional[Dict[str, Callable]] = None, requires: Optional[List[str]] = None,
+                 enabled: bool = WARMUP_ON_STARTUP, retry_s: float = WARMUP_RETRY_S,
+                 retry_max_s: float = WARMUP_RETRY_MAX_S):
+        """
+        Args:
+            tasks: name -> fn() returning (state, detail); raising marks the task failed
+            requires: Task names that must be usable for ready() (defaults to READY_REQUIRES)
+            enabled: False = no warm-up; everything loads lazily and ready() is always True
+            retry_s: Delay before re-running a failed task, doubled per attempt up to retry_max_s (0 = no retry)
+        """
+        self._tasks = {name: _Task(fn) for name, fn in (tasks or WARMUP_TASKS).items()}
+        self.requires = requires if requires is not None else READY_REQUIRES
+        self.enabled = enabled
+        self.retry_s = retry_s
+        self.retry_max_s = retry_max_s
+        self._started = threading.Event()
+        self._done = threading.Event()
+        self._remaining = len(self._tasks)
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Run every task concurrently on background threads (idempotent, returns immediately)."""
+        with self._lock:
+            if not self.enabled or self._started.is_set():
+                return
+            self._started.set()
+        if not self._tasks:
+            self._done.set()
+            return
+        pool = ThreadPoolExecutor(max_workers=len(self._tasks), thread_name_prefix="warmup")
+        for name, task in self._tasks.items():
+            pool.submit(self._run, name, task)
+        pool.shutdown(wait=False)
+
+    def _run(self, name: str, task: _Task):
+        task.attempts += 1
+        task.state = WARMING
+        task.started_at = time.perf_counter()
+        try:
+            task.state, task.detail = task.fn()
+        except Exception as e:
+            task.state, task.detail = FAILED, f"{type(e).__name__}: {e}"
+        task.duration_s = time.perf_counter() - task.started_at
+        print(f"Warm-up {name}: {task.state} in {task.duration_s * 1000:.0f}ms")
+        if task.state == FAILED and self.retry_s > 0:
+            delay = min(self.retry_s * 2 ** (task.attempts - 1), self.retry_max_s)
+            print(f"Warm-up {name}: retrying in {delay:.0f}s")
+            timer = threading.Timer(delay, self._run, (name, task))
+            timer.daemon = True
+            timer.start()
+        if task.attempts > 1:
+            return  # wait() tracks the first pass only
+        with self._lock:
+            self._remaining -= 1
+            if self._remaining == 0:
+                self._done.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until every task finished (True) or the timeout passed (False)."""
+        return self._done.wait(timeout)
+
+    def ready(self) -> bool:
+        if not self.enabled:
+            return True
+        return all(self._tasks[name].state in USABLE for name in self.requires if name in self._tasks)
+
+    def status(self) -> Dict:
+        now = time.perf_counter()
+        report = {}
+        for name, task in self._tasks.items():
+            if task.duration_s is not None:
+                ms = task.duration_s * 1000
+            elif task.started_at is not None:
+                ms = (now - task.started_at) * 1000  # Still warming: time so far
+            else:
+                ms = None
+            report[name] = {"state": task.state, "ms": round(ms, 1) if ms is not None else None,
+                            "required": name in self.requires, "attempts": task.attempts, "detail": task.detail}
+        return {"ready": self.ready(), "warmup": "enabled" if self.enabled else "disabled",
+                "finished": self._done.is_set(), "subsystems": report}
+
+
+# Singleton
+warmup = Warmup()
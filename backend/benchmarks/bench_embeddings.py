@@ -0,0 +1,209 @@
+"""
+Benchmark: embedding backends - PyTorch (HuggingFaceEmbeddings) vs ONNX fp32 vs ONNX int8.
+Reports documents/s (embed_documents, as ingestion uses it), single-query latency,
+throughput of 16 concurrent query threads with and without the QueryBatcher, LRU hit
+latency, and drift of each backend against the baseline: mean/min cosine and how many
+of the baseline's top-5 neighbours (over the corpus) are kept.
+
+Model: --model DIR with model.onnx + tokenizer.json (`python -m app.rag.embeddings prepare`).
+Without one, a randomly initialised graph with MiniLM-L6's shape (6 layers, 384 hidden,
+12 heads, 1536 FFN, 30522 vocab) is generated, which gives representative speed but
+drift figures that only bound the quantization error. The baseline is PyTorch when
+langchain_huggingface is installed and a real model is given, else ONNX fp32 (the
+export matches PyTorch to ~1e-6).
+Run from backend/:  python -m benchmarks.bench_embeddings [--model DIR] [--docs 512]
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+import threading
+
+import numpy as np
+
+from app.rag.embeddings import EMBEDDING_MODEL, OnnxEmbeddings, quantize_onnx_model
+from benchmarks.bench_ingest import SENTENCES
+
+WORDS = sorted({w.strip(".,()").lower() for s in SENTENCES for w in s.split()} |
+               {"fractions", "halves", "quarters", "plants", "photosynthesis", "rain", "clouds", "maps",
+                "subtraction", "regroup", "noise", "row", "game", "worksheet", "grade", "class"})
+
+
+def build_minilm_like(path: str, layers: int = 6, hidden: int = 384, heads: int = 12, ffn: int = 1536,
+                      vocab: int = 30522, seed: int = 0):
+    """Random-weight BERT encoder graph + word-level tokenizer.json in `path`."""
+    import onnx
+    import tokenizers
+    from onnx import TensorProto, helper, numpy_helper
+
+    rng = np.random.default_rng(seed)
+    nodes, weights = [], []
+
+    def weight(name, shape, scale=0.05):
+        weights.append(numpy_helper.from_array((rng.normal(size=shape) * scale).astype(np.float32), name))
+        return name
+
+    def const(name, value, dtype=np.float32):
+        weights.append(numpy_helper.from_array(np.array(value, dtype=dtype), name))
+        return name
+
+    def node(op, inputs, name, **attrs):
+        nodes.append(helper.make_node(op, inputs, [name], **attrs))
+        return name
+
+    def layer_norm(x, name):
+        gamma = const(f"{name}.g", np.ones(hidden))
+        beta = const(f"{name}.b", np.zeros(hidden))
+        return node("LayerNormalization", [x, gamma, beta], name, axis=-1, epsilon=1e-12)
+
+    def dense(x, name, n_in, n_out):
+        y = node("MatMul", [x, weight(f"{name}.w", (n_in, n_out))], f"{name}.mm")
+        return node("Add", [y, const(f"{name}.b", np.zeros(n_out))], name)
+
+    head_dim = hidden // heads
+    seq = node("Gather", [node("Shape", ["input_ids"], "shape"), const("one", 1, np.int64)], "seq_len", axis=0)
+    positions = node("Range", [const("zero", 0, np.int64), seq, const("step", 1, np.int64)], "positions")
+    x = node("Add", [node("Gather", [weight("word", (vocab, hidden)), "input_ids"], "word_emb"),
+                     node("Gather", [weight("pos", (512, hidden)), positions], "pos_emb")], "emb_sum")
+    x = layer_norm(node("Add", [x, node("Gather", [weight("type", (2, hidden)), "token_type_ids"], "type_emb")],
+                        "emb"), "emb_ln")
+    mask = node("Cast", ["attention_mask"], "mask_f", to=TensorProto.FLOAT)
+    mask = node("Mul", [node("Sub", [const("f_one", 1.0), mask], "mask_inv"), const("neg", -10000.0)], "mask_bias")
+    mask = node("Unsqueeze", [mask, const("axes", [1, 2], np.int64)], "mask_4d")
+    split = const("split_shape", [0, 0, heads, head_dim], np.int64)
+    merge = const("merge_shape", [0, 0, hidden], np.int64)
+
+    for i in range(layers):
+        p = f"l{i}"
+        q = node("Transpose", [node("Reshape", [dense(x, f"{p}.q", hidden, hidden), split], f"{p}.qr")],
+                 f"{p}.qt", perm=[0, 2, 1, 3])
+        k = node("Transpose", [node("Reshape", [dense(x, f"{p}.k", hidden, hidden), split], f"{p}.kr")],
+                 f"{p}.kt", perm=[0, 2, 3, 1])
+        v = node("Transpose", [node("Reshape", [dense(x, f"{p}.v", hidden, hidden), split], f"{p}.vr")],
+                 f"{p}.vt", perm=[0, 2, 1, 3])
+        scores = node("Mul", [node("MatMul", [q, k], f"{p}.qk"), const(f"{p}.scale", 1 / np.sqrt(head_dim))],
+                      f"{p}.scaled")
+        probs = node("Softmax", [node("Add", [scores, mask], f"{p}.masked")], f"{p}.probs", axis=-1)
+        context = node("Transpose", [node("MatMul", [probs, v], f"{p}.ctx")], f"{p}.ctxt", perm=[0, 2, 1, 3])
+        context = node("Reshape", [context, merge], f"{p}.ctxr")
+        x = layer_norm(node("Add", [x, dense(context, f"{p}.o", hidden, hidden)], f"{p}.res1"), f"{p}.ln1")
+        h = dense(x, f"{p}.ffn1", hidden, ffn)
+        erf = node("Erf", [node("Div", [h, const(f"{p}.sqrt2", np.sqrt(2.0))], f"{p}.hs")], f"{p}.erf")
+        h = node("Mul", [node("Mul", [h, const(f"{p}.half", 0.5)], f"{p}.hh"),
+                         node("Add", [erf, const(f"{p}.one", 1.0)], f"{p}.erf1")], f"{p}.gelu")
+        x = layer_norm(node("Add", [x, dense(h, f"{p}.ffn2", ffn, hidden)], f"{p}.res2"), f"{p}.ln2")
+    nodes.append(helper.make_node("Identity", [x], ["last_hidden_state"]))
+
+    inputs = [helper.make_tensor_value_info(n, TensorProto.INT64, ["batch", "seq"])
+              for n in ("input_ids", "attention_mask", "token_type_ids")]
+    output = helper.make_tensor_value_info("last_hidden_state", TensorProto.FLOAT, ["batch", "seq", hidden])
+    graph = helper.make_graph(nodes, "minilm_like", inputs, [output], weights)
+    onnx.save(helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)], ir_version=8),
+              os.path.join(path, "model.onnx"))
+
+    words = ["[PAD]", "[UNK]"] + WORDS + [f"tok{i}" for i in range(vocab - len(WORDS) - 2)]
+    tokenizer = tokenizers.Tokenizer(tokenizers.models.WordLevel({w: i for i, w in enumerate(words)}, "[UNK]"))
+    tokenizer.normalizer = tokenizers.normalizers.Lowercase()
+    tokenizer.pre_tokenizer = tokenizers.pre_tokenizers.Whitespace()
+    tokenizer.save(os.path.join(path, "tokenizer.json"))
+
+
+def texts(n: int, seed: int = 1, max_sentences: int = 6):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(SENTENCES) for _ in range(rng.randint(1, max_sentences))) for _ in range(n)]
+
+
+def docs_per_s(embedder, docs):
+    embedder.embed_documents(docs[:8])
+    started = time.perf_counter()
+    vectors = embedder.embed_documents(docs)
+    return len(docs) / (time.perf_counter() - started), np.asarray(vectors, dtype=np.float32)
+
+
+def query_ms(embedder, queries):
+    timings = []
+    for q in queries:
+        started = time.perf_counter()
+        embedder.embed_query(q)
+        timings.append(time.perf_counter() - started)
+    return sorted(timings)[len(timings) // 2] * 1000
+
+
+def concurrent_qps(embed_query, queries, threads: int = 16):
+    chunks = [queries[i::threads] for i in range(threads)]
+    workers = [threading.Thread(target=lambda c=c: [embed_query(q) for q in c]) for c in chunks]
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return len(queries) / (time.perf_counter() - started)
+
+
+def drift(vectors, baseline, k: int = 5):
+    cosine = (_unit(vectors) * _unit(baseline)).sum(axis=1)
+    sims, base_sims = _unit(vectors) @ _unit(vectors).T, _unit(baseline) @ _unit(baseline).T
+    overlap = np.mean([len(set(np.argsort(-sims[i])[1:k + 1]) & set(np.argsort(-base_sims[i])[1:k + 1])) / k
+                       for i in range(len(vectors))])
+    return cosine.mean(), cosine.min(), overlap
+
+
+def _unit(v):
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", help="Folder with model.onnx + tokenizer.json (real MiniLM)")
+    parser.add_argument("--docs", type=int, default=512)
+    parser.add_argument("--queries", type=int, default=64)
+    args = parser.parse_args()
+
+    path = args.model
+    if not path:
+        path = tempfile.mkdtemp(prefix="bench_embed_")
+        build_minilm_like(path)
+        print("Model: synthetic MiniLM-L6-shaped graph (random weights)")
+    else:
+        print(f"Model: {path}")
+    if not os.path.exists(os.path.join(path, "model_int8.onnx")):
+        quantize_onnx_model(os.path.join(path, "model.onnx"), os.path.join(path, "model_int8.onnx"))
+
+    backends = {}
+    if args.model:
+        try:
+            from langchain_huggingface import HuggingFaceEmbeddings
+            backends["pytorch"] = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+        except ImportError:
+            pass
+    backends["onnx fp32"] = OnnxEmbeddings(path, model_file="model.onnx", cache_size=0)
+    backends["onnx int8"] = OnnxEmbeddings(path, model_file="model_int8.onnx", cache_size=0)
+    baseline_name = next(iter(backends))
+    docs, queries = texts(args.docs), texts(args.queries, seed=2, max_sentences=1)  # Queries are one sentence
+    print(f"{args.docs} documents, {args.queries} queries, baseline: {baseline_name}\n")
+    print(f"{'backend':<11} {'docs/s':>8} {'speedup':>8} {'query ms':>9} {'16-thread q/s':>14} "
+          f"{'cos mean':>9} {'cos min':>8} {'top-5 kept':>11}")
+
+    results = {}
+    for name, embedder in backends.items():
+        rate, vectors = docs_per_s(embedder, docs)
+        results[name] = (rate, vectors)
+        mean, low, overlap = drift(vectors, results[baseline_name][1])
+        print(f"{name:<11} {rate:>8.1f} {rate / results[baseline_name][0]:>7.2f}x {query_ms(embedder, queries):>9.2f} "
+              f"{concurrent_qps(embedder.embed_query, queries):>14.1f} {mean:>9.4f} {low:>8.4f} {overlap:>11.2f}")
+
+    int8 = backends["onnx int8"]
+    for label, batch in (("short queries", queries), ("mixed lengths", docs[:args.queries * 4])):
+        unbatched = concurrent_qps(lambda q: int8._encode([q]), batch)
+        batched = concurrent_qps(OnnxEmbeddings(path, cache_size=0).embed_query, batch)
+        print(f"\nint8, 16 threads, {label}: {unbatched:.1f} q/s one run per query, "
+              f"{batched:.1f} q/s with the QueryBatcher", end="")
+    print()
+    cached = OnnxEmbeddings(path)
+    cached.embed_query(queries[0])
+    print(f"int8 query, LRU hit: {query_ms(cached, [queries[0]] * 50) * 1000:.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark: curriculum ingestion throughput (docs/s, chunks/s).
+Builds a synthetic textbook tree (class-N/subject/chapter .txt files, plus PDFs when
+fpdf2 and pypdf are installed) and ingests it:
+    - one worker, one chunk per embedding call (how a naive loop would do it)
+    - one worker, batched embedding
+    - a process pool, batched embedding
+    - a re-run of the same tree (everything skipped via the manifest)
+Uses MiniLM when langchain_huggingface is installed; otherwise the hashing stand-in
+embedder, which is so cheap that batching and the pool matter much less than with
+a real model.
+Run from backend/:  python -m benchmarks.bench_ingest [--chapters 60] [--workers 4]
+"""
+import io
+import os
+import shutil
+import argparse
+import tempfile
+from contextlib import redirect_stdout
+
+from app.rag.ingest import ingest
+from app.rag.store import RAGStore
+
+SUBJECTS = ["maths", "evs", "english", "hindi"]
+SENTENCES = ["Ask the children to count the mangoes in the basket.",
+             "A plant needs sunlight, water and air to make its food.",
+             "Draw a number line on the floor with chalk and let students jump along it.",
+             "Rivers carry rain water from the hills down to the sea.",
+             "Read the story aloud, then ask each row to act out one scene."]
+
+
+def embedder_factory():
+    try:
+        import langchain_huggingface  # noqa: F401
+        return "app.rag.embeddings:get_embedder", "MiniLM"
+    except ImportError:
+        return "benchmarks.bench_rag_query:HashingEmbedder", "hashing stand-in"
+
+
+def chapter_text(i: int, paragraphs: int = 40) -> str:
+    return "\n\n".join(" ".join(f"{SENTENCES[(i + p + s) % len(SENTENCES)]} (chapter {i}, part {p})"
+                                for s in range(6)) for p in range(paragraphs))
+
+
+def build_tree(root: str, chapters: int, with_pdfs: bool) -> int:
+    for i in range(chapters):
+        folder = os.path.join(root, f"class-{3 + i % 4}", SUBJECTS[i % len(SUBJECTS)])
+        os.makedirs(folder, exist_ok=True)
+        text = chapter_text(i)
+        if with_pdfs and i % 3 == 0:
+            from fpdf import FPDF
+            pdf = FPDF()
+            pdf.set_font("Helvetica", size=10)
+            for paragraph in text.split("\n\n"):
+                if pdf.page_no() == 0 or pdf.get_y() > 250:
+                    pdf.add_page()
+                pdf.multi_cell(0, 5, paragraph, new_x="LMARGIN", new_y="NEXT")
+            pdf.output(os.path.join(folder, f"chapter_{i}.pdf"))
+        else:
+            with open(os.path.join(folder, f"chapter_{i}.txt"), "w", encoding="utf-8") as f:
+                f.write(text)
+    return chapters
+
+
+def run(label: str, root: str, factory: str, workers: int, batch_size: int, index: str = None):
+    index = index or tempfile.mkdtemp(prefix="bench_ingest_index_")
+    store = RAGStore(index, "bench_curriculum", embedder=object())  # Parent only writes vectors
+    with redirect_stdout(io.StringIO()):  # Per-file progress lines
+        stats = ingest([root], store=store, workers=workers, batch_size=batch_size, embedder=factory)
+    processed = stats["files_ingested"] + stats["files_failed"]
+    seconds = max(stats["seconds"], 1e-9)
+    print(f"{label:<30} {seconds:>7.2f}s {processed / seconds:>9.1f} {stats['chunks_written'] / seconds:>10.0f}"
+          f" {stats['files_skipped']:>8}")
+    return index, stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chapters", type=int, default=60)
+    parser.add_argument("--workers", type=int, default=max(2, min(4, (os.cpu_count() or 2))))
+    args = parser.parse_args()
+
+    try:
+        import fpdf, pypdf  # noqa: F401,E401
+        with_pdfs = True
+    except ImportError:
+        with_pdfs = False
+    factory, label = embedder_factory()
+    root = os.path.join(tempfile.mkdtemp(prefix="bench_ingest_"), "ncert")
+    build_tree(root, args.chapters, with_pdfs)
+    print(f"{args.chapters} chapters ({'every 3rd as PDF' if with_pdfs else 'text only'}), embedder: {label}\n")
+    print(f"{'run':<30} {'time':>8} {'docs/s':>9} {'chunks/s':>10} {'skipped':>8}")
+
+    run("1 worker, unbatched", root, factory, workers=1, batch_size=1)
+    run("1 worker, batched", root, factory, workers=1, batch_size=256)
+    index, _ = run(f"{args.workers} workers, batched", root, factory, workers=args.workers, batch_size=256)
+    run("re-run (manifest)", root, factory, workers=args.workers, batch_size=256, index=index)
+    shutil.rmtree(os.path.dirname(root), ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
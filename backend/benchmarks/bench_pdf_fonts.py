@@ -0,0 +1,73 @@
+"""
+Benchmark: multi-page Unicode handout throughput - per-document add_font() parse vs the cached font prototypes.
+Uses the Noto fonts when installed (python -m app.utils.fonts download); otherwise DejaVu stands in for every
+script so the parse cost is still measured (glyph coverage doesn't matter for timing).
+Run from backend/:  python -m benchmarks.bench_pdf_fonts [--docs 20]
+"""
+import time
+import logging
+import argparse
+from app.utils.fonts import FontCache, SCRIPT_FONTS, font_cache
+from app.utils.pdf_generator import render_pdf
+
+HINDI = "प्रकाश संश्लेषण वह प्रक्रिया है जिसमें पौधे सूर्य के प्रकाश से भोजन बनाते हैं।"
+TAMIL = "ஒளிச்சேர்க்கை என்பது தாவரங்கள் சூரிய ஒளியைப் பயன்படுத்தி உணவு தயாரிக்கும் செயல்முறை."
+ENGLISH = "Photosynthesis is how plants turn sunlight, water and carbon dioxide into food."
+
+
+class ParseEveryTime(FontCache):
+    """The straightforward approach: pdf.add_font() for each document (full TTF parse every time)."""
+
+    def install(self, pdf, script):
+        path = self.path_for(script)
+        if path is None:
+            return None
+        family = f"sahayak-{script}"
+        if family not in pdf.fonts:
+            pdf.add_font(family, "", path)
+        return family
+
+
+def handout(pages: int) -> str:
+    # ~35 lines a page, mixed scripts like a bilingual worksheet
+    lines = []
+    for i in range(pages * 12):
+        lines += [f"{i + 1}. {ENGLISH}", HINDI, TAMIL]
+    return "\n".join(lines)
+
+
+def _fonts(cls):
+    if font_cache.available("devanagari"):
+        return cls()
+    stand_in = {script: ["DejaVuSans.ttf"] for script in SCRIPT_FONTS}
+    return cls(script_fonts=stand_in)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=20)
+    args = parser.parse_args()
+    logging.getLogger("fpdf").setLevel(logging.ERROR)  # Stand-in fonts lack the Indic glyphs
+
+    if not font_cache.available("latin"):
+        print("No TTF fonts installed; nothing to compare")
+        return
+    if not font_cache.available("devanagari"):
+        print("Noto fonts not installed: DejaVu Sans stands in for every script\n")
+
+    print(f"{'pages':>5} {'path':<8} {'docs/s':>8} {'pages/s':>8} {'ms/doc':>8} {'KB':>6}")
+    for pages in (2, 8):
+        text = handout(pages)
+        for name, cls in (("add_font", ParseEveryTime), ("cached", FontCache)):
+            fonts = _fonts(cls)
+            size = len(render_pdf("Warmup", text, fonts=fonts))
+            started = time.perf_counter()
+            for _ in range(args.docs):
+                render_pdf("Photosynthesis / प्रकाश संश्लेषण", text, fonts=fonts)
+            elapsed = time.perf_counter() - started
+            print(f"{pages:>5} {name:<8} {args.docs / elapsed:>8.1f} {args.docs * pages / elapsed:>8.1f}"
+                  f" {elapsed / args.docs * 1000:>8.1f} {size // 1024:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark: template-cached in-memory PPTX rendering vs the legacy per-request path.
+Legacy = fresh Presentation() (re-parses the template package) + save to /tmp + read back,
+which is what /download/ppt did with MediaGenerator.generate_pptx and FileResponse.
+Run from backend/:  python -m benchmarks.bench_pptx_render
+"""
+import os
+import time
+import uuid
+import tempfile
+from pptx import Presentation
+from app.utils.presentation_generator import render_presentation
+
+
+def legacy_generate_pptx(title, slides_data):
+    """The pre-refactor MediaGenerator.generate_pptx + FileResponse read (kept here for comparison only)."""
+    prs = Presentation()
+    slide = prs.slides.add_slide(prs.slide_layouts[0])
+    slide.shapes.title.text = title
+    slide.placeholders[1].text = "Generated by Sahayak.AI"
+    for slide_info in slides_data:
+        slide = prs.slides.add_slide(prs.slide_layouts[1])
+        slide.shapes.title.text = slide_info.get('title', 'Untitled Slide')
+        tf = slide.shapes.placeholders[1].text_frame
+        for item in slide_info.get('content', []):
+            p = tf.add_paragraph()
+            p.text = str(item)
+    path = os.path.join(tempfile.gettempdir(), f"pres_{uuid.uuid4()}.pptx")
+    prs.save(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    os.remove(path)
+    return data
+
+
+def deck(n):
+    return [{"title": f"Key Concept {i}", "content": [f"Point {j} about photosynthesis" for j in range(4)]}
+            for i in range(n)]
+
+
+def bench(fn, slides, runs):
+    fn("Warmup", slides)
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn("Photosynthesis", slides)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000, timings[int(len(timings) * 0.95)] * 1000
+
+
+def main(runs=200):
+    print(f"{'deck':<10} {'path':<10} {'p50 ms':>8} {'p95 ms':>8}")
+    for n in (5, 12):
+        slides = deck(n)
+        rendered = lambda title, s: render_presentation(title, s, with_images=False)
+        for name, fn in (("legacy", legacy_generate_pptx), ("cached", rendered)):
+            p50, p95 = bench(fn, slides, runs)
+            print(f"{n:>2} slides  {name:<10} {p50:>8.2f} {p95:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: recall@k and latency of vector vs BM25 vs hybrid retrieval, with and without
+metadata filters, on a fixed query set.
+The corpus mimics ingested textbooks: chunks of real NCERT chapters (English and Hindi)
+that name their chapter once amid generic classroom vocabulary, plus filler chunks for
+other grades. Each query asks for a chapter by name; its relevant set is that chapter's
+chunks. Uses MiniLM when langchain_huggingface is installed, otherwise the hashing
+stand-in (a bag of words, so it is kinder to exact terms than MiniLM and the real
+vector-only numbers are likely lower).
+Run from backend/:  python -m benchmarks.bench_rag_hybrid [--filler 2000] [--alphas 0.3,0.5,0.7]
+"""
+import random
+import argparse
+import tempfile
+import time
+
+from app.rag.store import RAGStore
+from benchmarks.bench_rag_query import make_embedder, percentiles
+
+# (grade, subject, chapter)
+CHAPTERS = [
+    ("4", "maths", "Jugs and Mugs"), ("4", "maths", "Halves and Quarters"), ("4", "maths", "Tick-Tick-Tick"),
+    ("4", "maths", "The Junk Seller"), ("4", "maths", "Carts and Wheels"), ("4", "maths", "Fields and Fences"),
+    ("5", "maths", "Parts and Wholes"), ("5", "maths", "Shapes and Angles"), ("5", "maths", "Boxes and Sketches"),
+    ("5", "evs", "Super Senses"), ("5", "evs", "Seeds and Seeds"), ("5", "evs", "Mangoes Round the Year"),
+    ("4", "hindi", "मन के भोले-भाले बादल"), ("4", "hindi", "किरमिच की गेंद"), ("4", "hindi", "दोस्त की पोशाक"),
+    ("5", "hindi", "राख की रस्सी"), ("5", "hindi", "फ़सलों के त्योहार"), ("5", "hindi", "खिलौनेवाला"),
+]
+FILLER_EN = ("students teacher class group activity worksheet explain example practice lesson board chalk "
+             "water count share story read write draw measure compare question answer game row recap").split()
+FILLER_HI = "बच्चे शिक्षक कक्षा समूह गतिविधि कहानी पढ़ो लिखो प्रश्न उत्तर खेल अभ्यास चित्र बातचीत".split()
+CHUNKS_PER_CHAPTER = 3
+KS = (1, 3, 5)
+
+
+def corpus(filler: int, seed: int = 7):
+    rng = random.Random(seed)
+    docs, relevant = [], {}
+    for grade, subject, chapter in CHAPTERS:
+        words = FILLER_HI if subject == "hindi" else FILLER_EN
+        relevant[chapter] = set()
+        for part in range(CHUNKS_PER_CHAPTER):
+            body = " ".join(rng.choice(words) for _ in range(60))
+            content = f"{chapter} ({part + 1}). {body}"
+            docs.append({"content": content, "metadata": {"grade": grade, "subject": subject,
+                                                          "topic": chapter.lower(), "type": "textbook"}})
+            relevant[chapter].add(content)
+    for i in range(filler):
+        words = FILLER_HI if i % 4 == 0 else FILLER_EN
+        docs.append({"content": f"Note {i}: " + " ".join(rng.choice(words) for _ in range(60)),
+                     "metadata": {"grade": str(3 + i % 6), "subject": "general", "type": "textbook"}})
+    return docs, relevant
+
+
+def queries():
+    for grade, subject, chapter in CHAPTERS:
+        text = f"{chapter} पाठ की गतिविधि" if subject == "hindi" else f"activity for the chapter {chapter}"
+        yield text, chapter, {"grade": grade, "subject": subject}
+
+
+def evaluate(store: RAGStore, relevant, alpha: float, filtered: bool):
+    recalls = {k: [] for k in KS}
+    timings = []
+    for text, chapter, filters in queries():
+        started = time.perf_counter()
+        hits = store.search(text, k=max(KS), filters=filters if filtered else None, alpha=alpha)
+        timings.append(time.perf_counter() - started)
+        ranked = [h["content"] for h in hits]
+        for k in KS:
+            recalls[k].append(len(relevant[chapter] & set(ranked[:k])) / min(k, len(relevant[chapter])))
+    return {k: sum(v) / len(v) for k, v in recalls.items()}, percentiles(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filler", type=int, default=2000)
+    parser.add_argument("--alphas", default="0.3,0.5,0.7")
+    args = parser.parse_args()
+
+    new_embedder, label = make_embedder()
+    docs, relevant = corpus(args.filler)
+    store = RAGStore(tempfile.mkdtemp(prefix="bench_hybrid_"), "bench_hybrid", embedder=new_embedder())
+    store.upsert(docs)
+    store.search("warm-up", k=1)
+    print(f"{len(docs)} chunks, {len(CHAPTERS)} queries, embedder: {label}")
+    print("recall@k = relevant chunks in the top k / min(k, relevant chunks)\n")
+
+    runs = [("vector", 1.0), ("bm25", 0.0)] + [(f"hybrid a={a}", float(a)) for a in args.alphas.split(",")]
+    header = " ".join(f"{'R@' + str(k):>6}" for k in KS)
+    print(f"{'mode':<16} {'filters':<10} {header} {'p50 ms':>8} {'p95 ms':>8}")
+    for filtered in (False, True):
+        for name, alpha in runs:
+            recall, (p50, p95) = evaluate(store, relevant, alpha, filtered)
+            cells = " ".join(f"{recall[k]:>6.2f}" for k in KS)
+            print(f"{name:<16} {'grade+subj' if filtered else '-':<10} {cells} {p50:>8.2f} {p95:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark: RAG query latency - legacy rebuild-per-query vs the persistent singleton store.
+Legacy = what query_rag() did before: new embedder, embed every document, fresh in-memory
+Chroma collection, then search. Uses MiniLM when langchain_huggingface is installed;
+otherwise a hashing stand-in embedder (which leaves out the multi-second model load the
+legacy path also paid, so the real gap is larger).
+Run from backend/:  python -m benchmarks.bench_rag_query [--docs 200] [--queries 50]
+"""
+import re
+import time
+import zlib
+import argparse
+import tempfile
+
+import chromadb
+from chromadb.config import Settings
+from app.rag.store import RAGStore, SEED_DOCS
+
+QUERIES = ["how to teach subtraction with zero", "class is too noisy", "two grades in one room",
+           "fractions for class 4", "keep students engaged"]
+
+
+class HashingEmbedder:
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+    def embed_query(self, text):
+        vector = [0.0] * 384
+        for word in re.findall(r"\w+", text.lower()):
+            vector[zlib.crc32(word.encode()) % 384] += 1.0
+        return vector
+
+
+def make_embedder():
+    try:
+        from langchain_huggingface import HuggingFaceEmbeddings
+        return lambda: HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2"), "MiniLM"
+    except ImportError:
+        return HashingEmbedder, "hashing stand-in"
+
+
+def corpus(n):
+    topics = ["fractions", "plants", "water cycle", "grammar", "multiplication", "maps", "health", "games"]
+    extra = [{"content": f"Lesson idea {i}: teach {topics[i % len(topics)]} with a local example, group work "
+                         f"and a 5 minute recap quiz (variant {i}).", "metadata": {"topic": topics[i % len(topics)]}}
+             for i in range(n)]
+    return SEED_DOCS + extra
+
+
+def legacy_query(new_embedder, docs, query, k=2):
+    embedder = new_embedder()
+    client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False))
+    name = f"legacy{time.perf_counter_ns()}"
+    collection = client.get_or_create_collection(name, metadata={"hnsw:space": "cosine"})
+    texts = [d["content"] for d in docs]
+    collection.add(ids=[str(i) for i in range(len(texts))], documents=texts,
+                   embeddings=embedder.embed_documents(texts), metadatas=[d["metadata"] for d in docs])
+    result = collection.query(query_embeddings=[embedder.embed_query(query)], n_results=k)
+    client.delete_collection(name)
+    return result
+
+
+def percentiles(timings):
+    timings = sorted(timings)
+    return timings[len(timings) // 2] * 1000, timings[int(len(timings) * 0.95)] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    new_embedder, label = make_embedder()
+    docs = corpus(args.docs)
+    print(f"{len(docs)} documents, embedder: {label}\n")
+    print(f"{'path':<26} {'p50 ms':>9} {'p95 ms':>9}")
+
+    legacy_runs = max(3, args.queries // 10)  # Slow path: fewer runs
+    timings = []
+    for i in range(legacy_runs):
+        started = time.perf_counter()
+        legacy_query(new_embedder, docs, QUERIES[i % len(QUERIES)])
+        timings.append(time.perf_counter() - started)
+    print(f"{'legacy (rebuild per query)':<26} {percentiles(timings)[0]:>9.1f} {percentiles(timings)[1]:>9.1f}")
+
+    path = tempfile.mkdtemp(prefix="bench_rag_")
+    embedder = new_embedder()
+    started = time.perf_counter()
+    RAGStore(path, "bench_knowledge", embedder=embedder).upsert(docs)
+    build_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    store = RAGStore(path, "bench_knowledge", embedder=embedder)  # Restart: open, don't rebuild
+    embedded = store.upsert(docs)
+    reopen_s = time.perf_counter() - started
+
+    timings = []
+    for i in range(args.queries):
+        started = time.perf_counter()
+        store.query(QUERIES[i % len(QUERIES)], k=2)
+        timings.append(time.perf_counter() - started)
+    p50, p95 = percentiles(timings)
+    print(f"{'persistent singleton':<26} {p50:>9.1f} {p95:>9.1f}")
+    print(f"\nindex build (once) {build_s * 1000:.0f}ms; reopen + re-upsert {reopen_s * 1000:.0f}ms "
+          f"({embedded} documents re-embedded)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark: cold-start import time of app.main and of each lazily-loaded subsystem.
+Every measurement runs in a fresh interpreter with `python -X importtime`, so
+module caches from an earlier case can't hide a regression. Exits non-zero if
+app.main is over the budget, so it can gate CI / the Render build.
+Run from backend/:  python -m benchmarks.bench_startup [--budget-ms 400] [--top 15]
+"""
+import os
+import sys
+import argparse
+import subprocess
+from typing import List, Tuple
+
+from app.subsystems import SUBSYSTEMS
+
+STARTUP_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", "400"))
+# Must stay out of `import app.main`: each is only needed by one subsystem
+HEAVY_MODULES = ["litellm", "huggingface_hub", "gradio_client", "fpdf", "pptx", "moviepy", "numpy"]
+
+
+def import_profile(module: str) -> Tuple[List[Tuple[str, int, int, int]], str]:
+    """([(name, self_us, cumulative_us, depth)...], error) for `import module` in a fresh interpreter."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, env={**os.environ, "PYTHONWARNINGS": "ignore"})
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    error = "" if proc.returncode == 0 else (proc.stderr.strip().splitlines() or ["?"])[-1]
+    return rows, error
+
+
+def cumulative_ms(rows, module: str) -> float:
+    return next((c / 1000 for name, _, c, _ in rows if name == module), float("nan"))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=15, help="heaviest top-level imports of app.main to list")
+    args = parser.parse_args()
+
+    rows, error = import_profile("app.main")
+    if error:
+        print(f"import app.main failed: {error}")
+        sys.exit(2)
+    total = cumulative_ms(rows, "app.main")
+
+    # Direct children of app.main (depth 1) are what a change to main.py's imports moves
+    print(f"{'import app.main':<40} {total:>8.1f} ms  (budget {args.budget_ms:.0f})")
+    children = sorted((r for r in rows if r[3] == 1), key=lambda r: -r[2])[:args.top]
+    for name, _, cumulative, _ in children:
+        print(f"  {name:<38} {cumulative / 1000:>8.1f} ms")
+
+    loaded = {name.split(".")[0] for name, _, _, _ in rows}
+    leaked = [m for m in HEAVY_MODULES if m in loaded]
+
+    print(f"\n{'subsystem (first use)':<22} {'module':<34} {'ms':>8}")
+    for name, target in SUBSYSTEMS.items():
+        module = target.split(":")[0]
+        sub_rows, sub_error = import_profile(module)
+        if sub_error:
+            print(f"{name:<22} {module:<34} {'failed':>8}  {sub_error}")
+        else:
+            print(f"{name:<22} {module:<34} {cumulative_ms(sub_rows, module):>8.1f}")
+
+    if leaked:
+        print(f"\nFAIL: heavy modules imported eagerly by app.main: {', '.join(leaked)}")
+    if total > args.budget_ms:
+        print(f"\nFAIL: import app.main took {total:.0f}ms (budget {args.budget_ms:.0f}ms)")
+    if leaked or total > args.budget_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark: single-pass ToolCallScanner vs the legacy regex parser from /chat.
+Run from backend/:  python -m benchmarks.bench_tool_parser
+"""
+import re
+import json
+import time
+from app.tools.tool_parser import extract_tool_call
+
+YT = {"tool_used": "youtube_search", "data": "Gravity for kids", "metadata": {"topic": "Gravity"}}
+
+
+def legacy_parse(content_str):
+    """The pre-refactor logic from chat_handler (kept here for comparison only)."""
+    clean_str = content_str
+    if "```" in clean_str:
+        matches = re.findall(r"```(?:json)?(.*?)```", clean_str, re.DOTALL)
+        if matches:
+            clean_str = matches[0].strip()
+    json_match = re.search(r'\{.*\}', clean_str, re.DOTALL)
+    if json_match:
+        try:
+            parsed = json.loads(json_match.group(0))
+            if "tool_used" in parsed:
+                return parsed
+        except Exception:
+            return None
+    return None
+
+
+# name -> (model output, expected tool call)
+CASES = {
+    "bare_json": (json.dumps(YT), YT),
+    "fenced_json": ("```json\n" + json.dumps(YT, indent=2) + "\n```", YT),
+    "prose_2kb": ("**Fractions** are parts of a whole. " * 60, None),
+    "prefixed_json": ("Here is the JSON: " + json.dumps(YT) + " Hope this helps {teacher}!", YT),
+    "latex_heavy": ("$$ \\frac{1}{2} + \\frac{3}{4} $$ " * 100 + json.dumps(YT), YT),
+    "unclosed_braces_4k": ("{" * 4000, None),
+    "unclosed_braces_16k": ("{" * 16000, None),
+}
+
+
+def bench(fn, text, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(text)
+    return (time.perf_counter() - started) / repeat * 1e6  # microseconds
+
+
+def main():
+    print(f"{'case':<22}{'chars':>8}{'legacy us':>14}{'scanner us':>14}{'legacy ok':>11}{'scanner ok':>12}")
+    for name, (text, expected) in CASES.items():
+        repeat = 3 if "unclosed" in name else 200
+        legacy_us = bench(legacy_parse, text, repeat)
+        scanner_us = bench(extract_tool_call, text, repeat)
+        print(f"{name:<22}{len(text):>8}{legacy_us:>14.1f}{scanner_us:>14.1f}"
+              f"{str(legacy_parse(text) == expected):>11}{str(extract_tool_call(text) == expected):>12}")
+
+
+if __name__ == "__main__":
+    main()
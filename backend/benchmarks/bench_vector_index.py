@@ -0,0 +1,131 @@
+"""
+Benchmark: Chroma vs the memory-mapped NumPy index (float16 / int8).
+Builds the same synthetic index (clustered 384-dim vectors with grade/topic metadata,
+like MiniLM chunk embeddings) in each backend and reports:
+    - build time and size on disk
+    - cold open in a fresh interpreter (imports + open + first query) and the RSS it added
+    - warm query p50/p95, unfiltered and filtered to one grade
+    - recall@10 against exact float32 cosine search
+Run from backend/:  python -m benchmarks.bench_vector_index [--chunks 50000] [--queries 100]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+
+DIM = 384
+K = 10
+GRADES = [str(g) for g in range(3, 9)]
+TOPICS = ["fractions", "plants", "water", "maps", "grammar", "health", "shapes", "time"]
+
+
+def percentiles(timings):
+    timings = sorted(timings)
+    return timings[len(timings) // 2] * 1000, timings[int(len(timings) * 0.95)] * 1000
+
+
+def dataset(n: int, queries: int, seed: int = 3):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(64, DIM)).astype(np.float32)
+    labels = rng.integers(0, len(centers), n)
+    vectors = centers[labels] + 0.6 * rng.normal(size=(n, DIM)).astype(np.float32)
+    metadatas = [{"grade": GRADES[i % len(GRADES)], "topic": TOPICS[labels[i] % len(TOPICS)]} for i in range(n)]
+    probes = vectors[rng.integers(0, n, queries)] + 0.3 * rng.normal(size=(queries, DIM)).astype(np.float32)
+    return vectors, metadatas, probes
+
+
+def open_collection(backend: str, path: str):
+    if backend == "chroma":
+        import chromadb
+        from chromadb.config import Settings
+        client = chromadb.PersistentClient(path=path, settings=Settings(anonymized_telemetry=False))
+        return client.get_or_create_collection("bench_vectors", metadata={"hnsw:space": "cosine"})
+    from app.rag.vector_index import MemmapIndex
+    return MemmapIndex(path, dtype=backend.split("-")[1])
+
+
+def build(backend: str, path: str, vectors, metadatas) -> float:
+    started = time.perf_counter()
+    collection = open_collection(backend, path)
+    for start in range(0, len(vectors), 1000):
+        end = start + 1000
+        collection.upsert(ids=[f"c{i}" for i in range(start, min(end, len(vectors)))],
+                          embeddings=vectors[start:end].tolist(), documents=[f"chunk {i}" for i in
+                                                                             range(start, min(end, len(vectors)))],
+                          metadatas=metadatas[start:end])
+    return time.perf_counter() - started
+
+
+def rss_mb() -> float:
+    """Current resident set (Linux); peak RSS elsewhere."""
+    try:
+        with open("/proc/self/status") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith("VmRSS:")) / 1024
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def probe(backend: str, path: str, query: list) -> dict:
+    """Runs in a fresh interpreter (chromadb is only imported for the chroma backend): a worker's first query."""
+    before = rss_mb()
+    started = time.perf_counter()
+    collection = open_collection(backend, path)
+    collection.query(query_embeddings=[query], n_results=K)
+    return {"open_ms": (time.perf_counter() - started) * 1000, "rss_mb": rss_mb() - before}
+
+
+def cold_open(backend: str, path: str, query) -> dict:
+    out = subprocess.run([sys.executable, "-m", "benchmarks.bench_vector_index", "--probe", backend, path,
+                          json.dumps(query.tolist())], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def disk_mb(path: str) -> float:
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files) / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--backends", default="chroma,numpy-float16,numpy-int8")
+    parser.add_argument("--probe", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.probe:
+        print(json.dumps(probe(args.probe[0], args.probe[1], json.loads(args.probe[2]))))
+        return
+
+    vectors, metadatas, probes = dataset(args.chunks, args.queries)
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    exact = [set(np.argsort(-(unit @ (q / np.linalg.norm(q))))[:K]) for q in probes]
+    print(f"{args.chunks} chunks x {DIM} dims, {args.queries} queries, recall@{K} vs exact float32\n")
+    print(f"{'backend':<15} {'build s':>8} {'disk MB':>8} {'open ms':>8} {'RSS MB':>7} "
+          f"{'p50 ms':>7} {'p95 ms':>7} {'filt p50':>8} {'recall':>7}")
+
+    for backend in args.backends.split(","):
+        path = tempfile.mkdtemp(prefix=f"bench_{backend}_")
+        build_s = build(backend, path, vectors, metadatas)
+        cold = cold_open(backend, path, probes[0])
+        collection = open_collection(backend, path)
+        timings, filtered, hits = [], [], 0
+        for q, truth in zip(probes, exact):
+            started = time.perf_counter()
+            result = collection.query(query_embeddings=[q.tolist()], n_results=K, include=["distances"])
+            timings.append(time.perf_counter() - started)
+            hits += len({int(i[1:]) for i in result["ids"][0]} & truth)
+            started = time.perf_counter()
+            collection.query(query_embeddings=[q.tolist()], n_results=K, where={"grade": "5"}, include=["distances"])
+            filtered.append(time.perf_counter() - started)
+        p50, p95 = percentiles(timings)
+        print(f"{backend:<15} {build_s:>8.1f} {disk_mb(path):>8.1f} {cold['open_ms']:>8.0f} {cold['rss_mb']:>7.0f} "
+              f"{p50:>7.2f} {p95:>7.2f} {percentiles(filtered)[0]:>8.2f} {hits / (K * len(probes)):>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
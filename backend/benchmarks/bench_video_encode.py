@@ -0,0 +1,82 @@
+"""
+Benchmark: "Motion Slide" fallback encoders - MoviePy ImageClip vs direct ffmpeg.
+Each case runs in a fresh interpreter so peak RSS (ours + ffmpeg's) is per case.
+Run from backend/:  python -m benchmarks.bench_video_encode [--runs 3]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+
+CASES = ["moviepy_still", "ffmpeg_still", "ffmpeg_ken_burns"]
+
+
+def _test_image(path: str):
+    """1024x1024 gradient + noise, like an SDXL frame (flat fills would flatter every encoder)."""
+    from PIL import Image
+    gradient = Image.linear_gradient("L").resize((1024, 1024))
+    noise = Image.effect_noise((1024, 1024), 40)
+    Image.merge("RGB", (gradient, noise, gradient.rotate(90))).save(path)
+
+
+def _run_case(case: str, image_path: str, output_path: str):
+    from app.utils.still_video import encode_still, encode_ken_burns, encode_still_moviepy
+
+    started = time.perf_counter()
+    if case == "moviepy_still":
+        encode_still_moviepy(image_path, output_path, duration_s=4, fps=24)
+    elif case == "ffmpeg_still":
+        encode_still(image_path, output_path, duration_s=4, fps=24)
+    else:
+        encode_ken_burns(image_path, output_path, duration_s=4, fps=24)
+    elapsed = time.perf_counter() - started
+
+    # ru_maxrss is KiB on Linux; children = the ffmpeg process(es) we waited for
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    print(json.dumps({"seconds": elapsed, "rss_self_mb": own / 1024, "rss_ffmpeg_mb": children / 1024,
+                      "bytes": os.path.getsize(output_path)}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    parser.add_argument("--image", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:  # Child process
+        _run_case(args.case, args.image, args.out)
+        return
+
+    workdir = tempfile.mkdtemp(prefix="bench_video_")
+    image_path = os.path.join(workdir, "frame.png")
+    _test_image(image_path)
+
+    print(f"{'case':<18} {'best s':>8} {'median s':>9} {'peak RSS MB':>12} {'(py+ffmpeg)':>12} {'KB':>7}")
+    for case in CASES:
+        results = []
+        for run in range(args.runs):
+            out = os.path.join(workdir, f"{case}_{run}.mp4")
+            proc = subprocess.run([sys.executable, "-m", "benchmarks.bench_video_encode", "--case", case,
+                                   "--image", image_path, "--out", out], capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(f"{case:<18} failed: {proc.stderr.strip().splitlines()[-1] if proc.stderr else '?'}")
+                break
+            results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+        if not results:
+            continue
+        seconds = sorted(r["seconds"] for r in results)
+        peak = max(r["rss_self_mb"] + r["rss_ffmpeg_mb"] for r in results)
+        split = f"{max(r['rss_self_mb'] for r in results):.0f}+{max(r['rss_ffmpeg_mb'] for r in results):.0f}"
+        print(f"{case:<18} {seconds[0]:>8.2f} {seconds[len(seconds) // 2]:>9.2f} {peak:>12.0f} {split:>12}"
+              f" {results[0]['bytes'] // 1024:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import os
+import time
+from app.artifact_store import ArtifactStore
+
+
+def _store(tmp_path, **kwargs):
+    kwargs.setdefault("quotas", {"pdf": 300})
+    return ArtifactStore(str(tmp_path), gc_interval_s=0, **kwargs)
+
+
+def test_reserve_commit_is_atomic(tmp_path):
+    store = _store(tmp_path)
+    part = store.reserve("video", "mp4")
+    assert os.path.basename(part).startswith(".")
+    with open(part, "wb") as f:
+        f.write(b"v" * 10)
+    final = store.commit("video", part)
+    assert final.endswith(".mp4") and not os.path.exists(part)
+    assert store.metrics()["kinds"]["video"] == {"files": 1, "bytes": 10, "quota_bytes": None}
+
+
+def test_quota_evicts_oldest_of_that_kind(tmp_path):
+    store = _store(tmp_path)
+    paths = [store.put_bytes("pdf", b"p" * 120, "pdf") for _ in range(3)]
+    video = store.put_bytes("video", b"v" * 1000, "mp4")
+    assert not os.path.exists(paths[0])
+    assert all(os.path.exists(p) for p in paths[1:] + [video])
+    assert store.metrics()["kinds"]["pdf"]["bytes"] == 240
+    assert store.stats["evicted"] == 1
+
+
+def test_gc_expires_old_artifacts_and_abandoned_parts(tmp_path):
+    store = _store(tmp_path, max_age_s=60)
+    done = store.put_bytes("ppt", b"x", "pptx")
+    part = store.reserve("ppt", "pptx")
+    open(part, "wb").close()
+    os.utime(part, (time.time() - 120, time.time() - 120))
+
+    assert store.gc(now=time.time() + 120) == 2
+    assert not os.path.exists(done) and not os.path.exists(part)
+    assert store.metrics()["bytes"] == 0
+
+
+def test_restart_adopts_existing_files(tmp_path):
+    store = _store(tmp_path)
+    store.put_bytes("pdf", b"a" * 100, "pdf")
+    store.reserve("pdf", "pdf")  # Never written: ignored
+    reopened = _store(tmp_path)
+    assert reopened.metrics()["kinds"]["pdf"]["files"] == 1
+
+
+def test_small_documents_served_inline(tmp_path):
+    store = _store(tmp_path)
+    assert store.serve_inline(b"%PDF small")
+    assert store.stats["inline_served"] == 1
@@ -0,0 +1,42 @@
+from app.rag.bm25 import BM25Index, tokenize
+
+DOCS = {
+    "jugs": ("Jugs and Mugs: fill the jug with mugs of water", {"grade": "4", "topic": "measurement"}),
+    "water": ("Water water everywhere: the water cycle and rain", {"grade": "5", "topic": "water"}),
+    "hindi": ("भिन्न संख्याएँ: आधा और चौथाई", {"grade": "4", "topic": "fractions"}),
+}
+
+
+def _index():
+    index = BM25Index()
+    for doc_id, (text, metadata) in DOCS.items():
+        index.add(doc_id, text, metadata)
+    return index
+
+
+def test_tokenize_keeps_indic_words_whole():
+    assert tokenize("भिन्न संख्याएँ, Class-4") == ["भिन्न", "संख्याएँ", "class", "4"]
+
+
+def test_rare_terms_outrank_common_ones():
+    index = _index()
+    assert index.search("mugs of water", k=1)[0][0] == "jugs"
+    assert [d for d, _ in index.search("संख्याएँ", k=3)] == ["hindi"]
+
+
+def test_filters_limit_the_scored_documents():
+    index = _index()
+    assert index.candidates({"grade": "4", "topic": None}) == {"jugs", "hindi"}
+    assert [d for d, _ in index.search("water", k=3, filters={"grade": "4"})] == ["jugs"]
+    assert index.search("water", filters={"grade": "4", "topic": "water"}) == []
+
+
+def test_remove_and_round_trip(tmp_path):
+    index = _index()
+    index.remove("water")
+    assert "water" not in index and "cycle" not in index.postings
+    path = str(tmp_path / "bm25.json")
+    index.save(path)
+    loaded = BM25Index.load(path)
+    assert len(loaded) == 2 and loaded.candidates({"grade": "4"}) == {"jugs", "hindi"}
+    assert loaded.search("jugs") == index.search("jugs")
@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+pytest.importorskip("fastapi")
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.context_packer import ContextPacker
+from app.session_store import SessionStore
+
+
+class FakeLLM:
+    """astream_chat() replaying scripted events; `fail_after` raises after that many deltas."""
+
+    def __init__(self, deltas, success=True, fail_after=None):
+        self.deltas, self.success, self.fail_after = deltas, success, fail_after
+        self.calls = 0
+
+    async def astream_chat(self, messages, system_prompt="", **kwargs):
+        self.calls += 1
+        for i, text in enumerate(self.deltas):
+            if i == self.fail_after:
+                raise RuntimeError("provider connection reset")
+            yield {"type": "delta", "text": text}
+        content = "".join(self.deltas) if self.success else "⚠️ All LLM providers exhausted."
+        yield {"type": "done", "content": content, "model_used": "fake", "success": self.success}
+
+
+@pytest.fixture
+def chat(monkeypatch):
+    store = SessionStore()
+    monkeypatch.setattr(main, "GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(main, "SESSION_STORE", store)
+    monkeypatch.setattr(main, "context_packer", ContextPacker(store, refresh_turns=99))
+    client = TestClient(main.app)  # No `with`: the warm-up lifespan isn't needed here
+
+    def post(llm, text="Explain gravity"):
+        monkeypatch.setattr(main.subsystems, "get", lambda name: llm)
+        response = client.post("/chat/stream", json={"text": text, "user_id": "sunita"})
+        return response, _frames(response.text)
+
+    post.store = store
+    return post
+
+
+def _frames(body):
+    frames = []
+    for raw in body.split("\n\n"):
+        if not raw:
+            continue
+        event, data = raw.split("\n")
+        assert event.startswith("event: ") and data.startswith("data: ")
+        frames.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return frames
+
+
+def test_prose_is_forwarded_as_deltas_then_final(chat):
+    response, frames = chat(FakeLLM(["Gravity ", "pulls things ", "down."]))
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text.endswith("\n\n")
+    deltas = [payload["text"] for event, payload in frames if event == "delta"]
+    assert "".join(deltas) == "Gravity pulls things down."
+    assert frames[-1] == ("final", {"tool_used": "text", "data": "Gravity pulls things down."})
+    assert [(t.role, t.content) for t in chat.store.turns("sunita")] == [
+        ("user", "Explain gravity"), ("assistant", "Gravity pulls things down.")]
+
+
+def test_tool_call_json_is_held_back(chat):
+    call = {"tool_used": "mermaid", "data": "graph TD\nA-->B", "metadata": {"topic": "Water cycle"}}
+    text = json.dumps(call)
+    _, frames = chat(FakeLLM([text[:10], text[10:25], text[25:]]))
+    assert [event for event, _ in frames] == ["final"]
+    assert frames[0][1] == call
+
+
+def test_provider_exhaustion_ends_with_failed_final(chat):
+    _, frames = chat(FakeLLM([], success=False))
+    assert frames == [("final", {"tool_used": "text", "data": "⚠️ All LLM providers exhausted.",
+                                 "metadata": {"model_used": "none"}})]
+    assert [t.role for t in chat.store.turns("sunita")] == ["user"]
+
+
+def test_mid_stream_error_sends_error_frame_and_records_turn_once(chat):
+    llm = FakeLLM(["Gravity ", "pulls"], fail_after=1)
+    _, frames = chat(llm)
+    assert frames[0] == ("delta", {"text": "Gravity "})
+    assert frames[-1] == ("final", {"tool_used": "text", "data": main.API_LIMIT_MESSAGE, "metadata": {}})
+    assert llm.calls == 1
+    assert [t.role for t in chat.store.turns("sunita")] == ["user"]
@@ -0,0 +1,91 @@
+from app.session_store import SessionStore
+from app.context_packer import ContextPacker, estimate_tokens
+
+
+def _store_with(turns):
+    store = SessionStore()
+    for role, text in turns:
+        store.append("sunita", role, text)
+    return store
+
+
+def test_estimate_tokens_counts_utf8_bytes():
+    assert estimate_tokens("abcd" * 10) == 10
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("नमस्ते") > estimate_tokens("hello")
+
+
+def test_pack_fills_budget_newest_first():
+    store = _store_with([("user", "a" * 400), ("assistant", "b" * 400), ("user", "c" * 40)])
+    packer = ContextPacker(store, budget_tokens=120, refresh_turns=99)
+
+    messages = packer.pack("sunita")
+    # 'c' (10 tokens) + 'b' (100 tokens) fit; 'b' would lead, so it's dropped to start on a user turn
+    assert [m["content"][0] for m in messages] == ["c"]
+
+
+def test_newest_turn_always_included():
+    store = _store_with([("user", "x" * 4000)])
+    messages = ContextPacker(store, budget_tokens=10).pack("sunita")
+    assert len(messages) == 1
+
+
+def test_token_counts_are_cached_on_turns():
+    calls = []
+
+    def counting(text):
+        calls.append(text)
+        return 1
+
+    store = _store_with([("user", "hi"), ("assistant", "hello"), ("user", "fractions?")])
+    packer = ContextPacker(store, budget_tokens=100, count_tokens=counting)
+    packer.pack("sunita")
+    packer.pack("sunita")
+    assert len(calls) == 3
+    assert all(turn.tokens == 1 for turn in store.turns("sunita"))
+
+
+def test_summary_prefixes_window_and_covers_evicted_turns():
+    store = _store_with([("user", "My name is Sunita, I teach class 4."), ("assistant", "Namaste Sunita!"),
+                         ("user", "q" * 400), ("assistant", "r" * 400), ("user", "Help with subtraction")])
+    store.set_summary("sunita", "Sunita teaches class 4.", upto_seq=2)
+    packer = ContextPacker(store, budget_tokens=40, refresh_turns=99)
+
+    messages = packer.pack("sunita")
+    assert messages[0]["role"] == "system"
+    assert "Sunita teaches class 4." in messages[0]["content"]
+    assert messages[-1]["content"] == "Help with subtraction"
+
+
+def test_refresh_not_scheduled_outside_event_loop():
+    store = _store_with([("user", "a" * 400)] * 6 + [("user", "latest")])
+    packer = ContextPacker(store, budget_tokens=5, refresh_turns=2)
+    packer.pack("sunita")  # No running loop: must not raise or mark a refresh in flight
+    assert packer.stats["summaries_started"] == 0
+
+
+class _RecordingPacker(ContextPacker):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.scheduled = []
+
+    def _schedule_refresh(self, user_id, previous, evicted):
+        self.scheduled.append([t.seq for t in evicted])
+
+
+def test_turns_dropped_by_the_ring_are_summarized():
+    # 30 short turns all fit the token window, but the ring only keeps 20
+    store = SessionStore(max_turns=20)
+    for i in range(30):
+        store.append("sunita", "user" if i % 2 == 0 else "assistant", f"turn {i}")
+    packer = _RecordingPacker(store, budget_tokens=3000, refresh_turns=4)
+
+    messages = packer.pack("sunita")
+    assert len(messages) == 20
+    assert packer.scheduled == [list(range(1, 11))]
+
+    store.set_summary("sunita", "Early turns.", upto_seq=10)
+    assert store.dropped("sunita") == []
+    packer.scheduled.clear()
+    packer.pack("sunita")
+    assert packer.scheduled == []
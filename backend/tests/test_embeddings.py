@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("onnxruntime")
+onnx = pytest.importorskip("onnx")
+tokenizers = pytest.importorskip("tokenizers")
+from onnx import TensorProto, helper, numpy_helper
+
+from app.rag.embeddings import OnnxEmbeddings, QueryBatcher, quantize_onnx_model
+
+VOCAB = ["[PAD]", "[UNK]", "chalk", "board", "fractions", "halves", "plants", "water", "rain", "maps"]
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    """Token-embedding-only 'transformer' + word-level tokenizer, in the layout of a real export."""
+    table = np.random.default_rng(0).normal(size=(len(VOCAB), 16)).astype(np.float32)
+    graph = helper.make_graph(
+        [helper.make_node("Gather", ["table", "input_ids"], ["last_hidden_state"])], "tiny",
+        [helper.make_tensor_value_info("input_ids", TensorProto.INT64, ["batch", "seq"]),
+         helper.make_tensor_value_info("attention_mask", TensorProto.INT64, ["batch", "seq"])],
+        [helper.make_tensor_value_info("last_hidden_state", TensorProto.FLOAT, ["batch", "seq", 16])],
+        [numpy_helper.from_array(table, "table")])
+    onnx.save(helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)], ir_version=8), str(tmp_path / "model.onnx"))
+
+    tokenizer = tokenizers.Tokenizer(tokenizers.models.WordLevel({w: i for i, w in enumerate(VOCAB)}, "[UNK]"))
+    tokenizer.pre_tokenizer = tokenizers.pre_tokenizers.Whitespace()
+    tokenizer.save(str(tmp_path / "tokenizer.json"))
+    return tmp_path, table
+
+
+def test_mean_pooling_ignores_padding(model_dir):
+    path, table = model_dir
+    embedder = OnnxEmbeddings(str(path))  # No model_int8.onnx yet: falls back to the fp32 model
+    short, long = embedder.embed_documents(["chalk", "chalk board fractions halves"])
+    assert np.allclose(short, table[2] / np.linalg.norm(table[2]), atol=1e-6)
+    assert np.allclose(long, embedder.embed_documents(["chalk board fractions halves"])[0], atol=1e-6)
+    expected = table[2:6].mean(axis=0)
+    assert np.allclose(long, expected / np.linalg.norm(expected), atol=1e-6)
+
+
+def test_concurrent_queries_are_batched_and_cached(model_dir):
+    path, _ = model_dir
+    embedder = OnnxEmbeddings(str(path), query_wait_ms=50)
+    texts = ["chalk", "board", "fractions", "halves", "plants", "water", "rain", "maps"]
+    results = {}
+    threads = [threading.Thread(target=lambda t=t: results.update({t: embedder.embed_query(t)})) for t in texts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert embedder._batcher.stats["batches"] < len(texts)
+    assert all(np.allclose(results[t], v, atol=1e-6) for t, v in zip(texts, embedder.embed_documents(texts)))
+
+    embedder.embed_query("chalk")
+    assert embedder.stats["cache_hits"] == 1 and embedder._batcher.stats["requests"] == len(texts)
+
+
+def test_int8_model_stays_close_to_fp32(model_dir):
+    path, _ = model_dir
+    fp32 = OnnxEmbeddings(str(path), model_file="model.onnx")
+    quantize_onnx_model(str(path / "model.onnx"), str(path / "model_int8.onnx"))
+    int8 = OnnxEmbeddings(str(path))
+    assert int8.model_path.endswith("model_int8.onnx")
+    texts = ["chalk board", "plants need water and rain", "fractions halves maps"]
+    drift = [np.dot(a, b) for a, b in zip(fp32.embed_documents(texts), int8.embed_documents(texts))]
+    assert min(drift) > 0.99
+
+
+def test_batcher_propagates_errors():
+    def encode(texts):
+        raise RuntimeError("model crashed")
+    with pytest.raises(RuntimeError, match="model crashed"):
+        QueryBatcher(encode, wait_ms=0).submit("chalk").result(timeout=5)
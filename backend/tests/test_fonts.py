@@ -0,0 +1,136 @@
+import os
+import pytest
+
+pytest.importorskip("fpdf")
+from app.utils.fonts import SCRIPT_FONTS, FontCache, detect_scripts, dominant_script, download_noto_fonts
+from app.utils.pdf_generator import render_pdf
+
+DEJAVU = "/usr/share/fonts/truetype/dejavu"
+needs_dejavu = pytest.mark.skipif(not os.path.exists(os.path.join(DEJAVU, "DejaVuSans.ttf")),
+                                  reason="DejaVu fonts not installed")
+
+
+def _cache():
+    # DejaVu Serif stands in for an Indic font: we're testing caching and selection, not glyph coverage
+    return FontCache(search_dirs=[DEJAVU], script_fonts={"latin": ["DejaVuSans.ttf"],
+                                                         "devanagari": ["DejaVuSerif.ttf"]})
+
+
+def test_script_detection():
+    assert detect_scripts("Photosynthesis") == set()
+    assert detect_scripts("नमस्ते and வணக்கம்") == {"devanagari", "tamil"}
+    assert dominant_script("Class 4: पौधे भोजन बनाते हैं") == "devanagari"
+    assert dominant_script("Hello (नमस्ते) everyone, welcome back") == "devanagari"
+    assert dominant_script("12 + 7 = 19") == "latin"
+
+
+@needs_dejavu
+def test_fonts_parsed_once_per_process():
+    fonts = _cache()
+    for _ in range(3):
+        render_pdf("Fractions", "Half of 8 is 4.\nनमस्ते", fonts=fonts)
+    assert fonts.stats["parsed"] == 2       # latin + devanagari, once each
+    assert fonts.stats["cloned"] == 6
+    assert fonts.stats["slow_path"] == 0
+
+
+@needs_dejavu
+def test_only_scripts_in_the_document_are_embedded():
+    fonts = _cache()
+    latin_only = render_pdf("Fractions", "Half of 8 is 4.", fonts=fonts)
+    mixed = render_pdf("Fractions", "Half of 8 is 4.\nनमस्ते बच्चों", fonts=fonts)
+    assert b"DejaVuSerif" not in latin_only
+    assert b"DejaVuSerif" in mixed
+
+
+@needs_dejavu
+def test_one_file_serving_several_scripts():
+    # Each clone needs its own descriptor: output stamps it with a per-document object id
+    fonts = FontCache(search_dirs=[DEJAVU], script_fonts={s: ["DejaVuSans.ttf"] for s in ("latin", "devanagari", "tamil")})
+    data = render_pdf("Mixed", "Hello\nनमस्ते\nவணக்கம்", fonts=fonts)
+    assert data.startswith(b"%PDF")
+    assert fonts.stats["parsed"] == 1
+
+
+@needs_dejavu
+def test_subsets_do_not_leak_between_documents():
+    warm = _cache()
+    render_pdf("Alphabet", "".join(chr(c) for c in range(0x41, 0x17F)) * 5, fonts=warm)
+    after_big = render_pdf("Hi", "abc", fonts=warm)
+    fresh = render_pdf("Hi", "abc", fonts=_cache())
+    assert abs(len(after_big) - len(fresh)) < 64  # Same glyph subset; only timestamps differ
+    assert len(fresh) < 30_000                     # Subset, not the 700KB font
+
+
+def test_without_any_font_falls_back_to_latin1():
+    data = render_pdf("Namaste", "नमस्ते café", fonts=FontCache(search_dirs=[]))
+    assert data.startswith(b"%PDF")
+
+
+class _Response:
+    def __init__(self, content, status=200):
+        self.content, self.status_code = content, status
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+def test_download_fetches_each_missing_font_once(tmp_path, monkeypatch):
+    requests = pytest.importorskip("requests")
+    urls = []
+    monkeypatch.setattr(requests, "get", lambda url, timeout: urls.append(url) or _Response(b"\x00\x01\x00\x00glyf"))
+    (tmp_path / "NotoSansTamil-Regular.ttf").write_bytes(b"already here")
+
+    downloaded = download_noto_fonts(str(tmp_path))
+    assert len(downloaded) == len(SCRIPT_FONTS) - 1 and "NotoSansTamil-Regular.ttf" not in downloaded
+    assert "/NotoSansDevanagari/hinted/ttf/NotoSansDevanagari-Regular.ttf" in " ".join(urls)
+    assert FontCache(search_dirs=[str(tmp_path)]).missing() == []
+    assert download_noto_fonts(str(tmp_path)) == []  # Idempotent: the build can re-run it
+
+
+def test_download_rejects_non_font_responses(tmp_path, monkeypatch):
+    requests = pytest.importorskip("requests")
+    monkeypatch.setattr(requests, "get", lambda url, timeout: _Response(b"<!DOCTYPE html>"))
+    with pytest.raises(ValueError):
+        download_noto_fonts(str(tmp_path))
+    assert not any(tmp_path.iterdir())  # Nothing half-written for path_for() to pick up
+
+
+@needs_dejavu
+def test_warm_warns_about_scripts_without_a_font(capsys):
+    fonts = _cache()
+    fonts.script_fonts = {**fonts.script_fonts, "tamil": ["NotoSansTamil-Regular.ttf"]}
+    assert fonts.warm() == ["latin", "devanagari"]
+    assert fonts.missing() == ["tamil"]
+    assert "No font for tamil" in capsys.readouterr().out
+
+
+@needs_dejavu
+def test_indic_text_turns_on_shaping(monkeypatch):
+    import app.utils.pdf_generator as pdf_generator
+    shaped = []
+    monkeypatch.setattr(pdf_generator, "text_shaping_available", lambda: True)
+    monkeypatch.setattr(pdf_generator.EducationalPDF, "set_text_shaping", lambda self, on=True, **kw: shaped.append(on))
+    render_pdf("Fractions", "Half of 8 is 4.", fonts=_cache())
+    assert shaped == []
+    render_pdf("भिन्न", "आधा और चौथाई", fonts=_cache())
+    assert shaped == [True]
+
+
+@needs_dejavu
+def test_shaped_indic_pdf_renders():
+    pytest.importorskip("uharfbuzz")
+    assert render_pdf("भिन्न", "क्षत्रिय और द्विज", fonts=_cache()).startswith(b"%PDF")
+
+
+@needs_dejavu
+def test_media_warmup_degraded_without_shaping(monkeypatch):
+    import app.utils.fonts as fonts_module
+    import app.warmup as warmup_module
+    monkeypatch.setattr(warmup_module.subsystems, "get", lambda name: None)
+    monkeypatch.setattr(fonts_module, "font_cache", _cache())  # Every script has a font
+    monkeypatch.setattr(fonts_module, "text_shaping_available", lambda: False)
+    state, detail = warmup_module._warm_media()
+    assert state == warmup_module.DEGRADED and detail == {"fonts": ["latin", "devanagari"], "missing": [],
+                                                         "shaping": False}
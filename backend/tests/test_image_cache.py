@@ -0,0 +1,69 @@
+import os
+import time
+import threading
+import pytest
+from app.utils.image_cache import ImageCache, image_key
+
+
+def _renderer(calls, payload=b"x" * 100, delay=0.0):
+    def render(prompt, output_path):
+        calls.append(prompt)
+        time.sleep(delay)
+        with open(output_path, "wb") as f:
+            f.write(payload)
+        return output_path
+    return render
+
+
+def test_key_ignores_whitespace_only():
+    assert image_key("a  red\napple ") == image_key("a red apple")
+    assert image_key("a red apple") != image_key("a green apple")
+
+
+def test_second_request_is_a_hit(tmp_path):
+    calls = []
+    cache = ImageCache(str(tmp_path), max_bytes=10_000, render=_renderer(calls))
+    key, path = cache.get_or_create("solar system")
+    assert cache.get_or_create("solar  system") == (key, path)
+    assert calls == ["solar system"]
+    assert cache.metrics()["hits"] == 1
+
+
+def test_concurrent_misses_generate_once(tmp_path):
+    calls = []
+    cache = ImageCache(str(tmp_path), max_bytes=10_000, render=_renderer(calls, delay=0.1))
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_create("volcano"))) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert len(set(results)) == 1
+
+
+def test_lru_eviction_by_size(tmp_path):
+    calls = []
+    cache = ImageCache(str(tmp_path), max_bytes=250, render=_renderer(calls))
+    _, first = cache.get_or_create("a")
+    cache.get_or_create("b")
+    cache.get_or_create("a")          # Touch: "b" is now least recent
+    _, _ = cache.get_or_create("c")   # 300 bytes > 250: evict "b"
+    assert os.path.exists(first)
+    assert not os.path.exists(cache.path_for(image_key("b")))
+    assert cache.metrics()["evictions"] == 1
+
+
+def test_index_survives_restart_and_failures_are_not_cached(tmp_path):
+    calls = []
+    ImageCache(str(tmp_path), max_bytes=10_000, render=_renderer(calls)).get_or_create("river")
+
+    def broken(prompt, output_path):
+        raise RuntimeError("rate limited")
+
+    reopened = ImageCache(str(tmp_path), max_bytes=10_000, render=broken)
+    reopened.get_or_create("river")   # Served from disk
+    with pytest.raises(RuntimeError):
+        reopened.get_or_create("mountain")
+    assert not any(name.endswith(".tmp") for name in os.listdir(tmp_path))
+    assert reopened.lookup(image_key("mountain")) is None
@@ -0,0 +1,102 @@
+import os
+import re
+import json
+import zlib
+
+import pytest
+
+pytest.importorskip("chromadb")
+from app.rag.ingest import chunk_text, infer_metadata, ingest
+from app.rag.store import RAGStore
+
+
+class HashedWords:
+    """Deterministic stand-in for MiniLM (hashed word counts)."""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+    def embed_query(self, text):
+        vector = [0.0] * 64
+        for word in re.findall(r"\w+", text.lower()):
+            vector[zlib.crc32(word.encode()) % 64] += 1.0
+        return vector
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _corpus(tmp_path):
+    root = tmp_path / "ncert"
+    _write(str(root / "class-4" / "maths" / "fractions.txt"), "Fold a chapati in half.\n\nTwo halves make one whole.")
+    _write(str(root / "class-5" / "evs" / "water_cycle.md"), "Water evaporates, forms clouds and falls as rain.")
+    return root
+
+
+def _run(tmp_path, root, **kwargs):
+    store = RAGStore(str(tmp_path / "index"), "curriculum", embedder=HashedWords())
+    return store, ingest([str(root)], store=store, workers=1, embedder=HashedWords, **kwargs)
+
+
+def test_metadata_from_folder_layout():
+    meta = infer_metadata("ncert/class-4/maths/fractions_and_decimals.pdf", {"board": "CBSE", "grade": None})
+    assert meta == {"source": "ncert/class-4/maths/fractions_and_decimals.pdf", "topic": "fractions and decimals",
+                    "grade": "4", "subject": "maths", "board": "CBSE"}
+
+
+def test_chunks_respect_size_and_overlap():
+    text = " ".join(f"Sentence number {i} about plants." for i in range(200))
+    chunks = chunk_text(text, size=300, overlap=60)
+    assert all(len(c) <= 300 + 60 for c in chunks)
+    assert chunks[1].split()[0] in chunks[0][-80:]  # Starts with the tail of the previous chunk
+
+
+def test_rerun_only_processes_changed_files(tmp_path):
+    root = _corpus(tmp_path)
+    store, first = _run(tmp_path, root)
+    assert first["files_ingested"] == 2 and store.count() == first["chunks_written"]
+    hit = store.query("chapati halves", k=1)[0]
+    assert hit["metadata"]["grade"] == "4" and hit["metadata"]["subject"] == "maths"
+
+    _write(str(root / "class-4" / "maths" / "fractions.txt"), "Fold a roti into quarters.")
+    store, second = _run(tmp_path, root)
+    assert second["files_skipped"] == 1 and second["files_ingested"] == 1
+    assert second["chunks_deleted"] >= 1  # The old chapati chunk is gone
+    assert "chapati" not in json.dumps(store.collection.get()["documents"])
+
+
+def test_prune_removes_deleted_files(tmp_path):
+    root = _corpus(tmp_path)
+    _run(tmp_path, root)
+    os.remove(str(root / "class-5" / "evs" / "water_cycle.md"))
+    store, stats = _run(tmp_path, root, prune=True)
+    assert stats["chunks_deleted"] == 1
+    assert all(m["subject"] == "maths" for m in store.collection.get()["metadatas"])
+
+
+def test_pdf_pages_and_broken_files(tmp_path):
+    pytest.importorskip("pypdf")
+    fpdf = pytest.importorskip("fpdf")
+    root = tmp_path / "board"
+    pdf = fpdf.FPDF()
+    for page in ("Photosynthesis makes food in leaves.", "Roots take in water from the soil."):
+        pdf.add_page()
+        pdf.set_font("Helvetica", size=12)
+        pdf.cell(0, 10, page)
+    os.makedirs(str(root / "class-7" / "science"))
+    pdf.output(str(root / "class-7" / "science" / "plants.pdf"))
+    _write(str(root / "class-7" / "science" / "corrupt.pdf"), "not a pdf")
+
+    store, stats = _run(tmp_path, root)
+    assert stats["files_ingested"] == 1 and stats["files_failed"] == 1
+    assert sorted(m["page"] for m in store.collection.get()["metadatas"]) == [1, 2]
+
+
+def test_in_process_ingest_leaves_thread_settings_alone(tmp_path, monkeypatch):
+    for name in ("OMP_NUM_THREADS", "EMBEDDING_THREADS", "TOKENIZERS_PARALLELISM"):
+        monkeypatch.delenv(name, raising=False)
+    _run(tmp_path, _corpus(tmp_path))  # workers=1 runs in a thread of this (the app's) process
+    assert not {"OMP_NUM_THREADS", "EMBEDDING_THREADS", "TOKENIZERS_PARALLELISM"} & set(os.environ)
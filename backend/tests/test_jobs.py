@@ -0,0 +1,86 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app.jobs import JobQueue, QueueFull
+from app.artifact_store import ArtifactStore
+
+
+def _write_file(prompt, output_path):
+    with open(output_path, "w") as f:
+        f.write(prompt)
+    return time.time()
+
+
+def _fail(prompt, output_path):
+    raise RuntimeError("ModelScope down")
+
+
+def _queue(tmp_path, worker, **kwargs):
+    return JobQueue(workers={"video": worker}, store=ArtifactStore(str(tmp_path), gc_interval_s=0),
+                    executor=ThreadPoolExecutor(max_workers=1), **kwargs)
+
+
+def _wait(queue, job):
+    job.future.exception(timeout=5)
+    deadline = time.time() + 5
+    while job.status == "queued" and time.time() < deadline:
+        time.sleep(0.005)  # Done-callbacks run just after waiters are woken
+    return queue.status(job)
+
+
+def test_submit_returns_immediately_then_completes(tmp_path):
+    gate = threading.Event()
+
+    def slow(prompt, output_path):
+        gate.wait(5)
+        return _write_file(prompt, output_path)
+
+    queue = _queue(tmp_path, slow)
+    job = queue.submit("video", "water cycle")
+    assert queue.status(job)["status"] in ("queued", "running")
+
+    gate.set()
+    status = _wait(queue, job)
+    assert status["status"] == "done"
+    assert not os.path.basename(job.output_path).startswith(".")  # Published from the .part file
+    assert status["progress"] == 1.0
+    assert status["result_url"] == f"/jobs/{job.id}/result"
+    assert open(job.output_path).read() == "water cycle"
+
+
+def test_failed_job_reports_error(tmp_path):
+    queue = _queue(tmp_path, _fail)
+    job = queue.submit("video", "x")
+    status = _wait(queue, job)
+    assert status["status"] == "failed"
+    assert status["error"] == "ModelScope down"
+    assert queue.metrics()["failed"] == 1
+    assert os.listdir(tmp_path / "video") == []  # .part file discarded
+
+
+def test_queue_depth_limit(tmp_path):
+    gate = threading.Event()
+    queue = _queue(tmp_path, lambda p, o: gate.wait(5) and _write_file(p, o), max_pending=2)
+    jobs = [queue.submit("video", "a"), queue.submit("video", "b")]
+    with pytest.raises(QueueFull):
+        queue.submit("video", "c")
+    assert queue.status(jobs[1])["queue_position"] == 1
+
+    gate.set()
+    for job in jobs:
+        _wait(queue, job)
+    queue.submit("video", "d")  # Room again once work drains
+    assert queue.metrics()["rejected"] == 1
+
+
+def test_finished_jobs_expire_with_their_files(tmp_path):
+    queue = _queue(tmp_path, _write_file, ttl_s=60)
+    job = queue.submit("video", "x")
+    _wait(queue, job)
+    assert os.path.exists(job.output_path)
+
+    queue.cleanup(now=time.time() + 120)
+    assert queue.get(job.id) is None
+    assert not os.path.exists(job.output_path)
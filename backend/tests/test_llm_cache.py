@@ -0,0 +1,79 @@
+import time
+from app.llm_cache import LLMResponseCache, cache_key
+
+SYSTEM = "You are Sahayak."
+OK = {"content": "Use the money exchange analogy.", "model_used": "Groq Llama-3.3-70B", "success": True}
+
+
+def _ask(text):
+    return [{"role": "user", "content": text}]
+
+
+def test_cache_key_normalizes_whitespace_and_case():
+    assert cache_key(_ask("How to teach  Fractions?"), SYSTEM, 0.7) == cache_key(_ask(" how to teach fractions? "), SYSTEM, 0.7)
+    assert cache_key(_ask("fractions"), SYSTEM, 0.7) != cache_key(_ask("fractions"), SYSTEM, 0.1)
+
+
+def test_exact_hit_and_metrics():
+    cache = LLMResponseCache(semantic=False)
+    assert cache.lookup(_ask("fractions"), SYSTEM, 0.7) is None
+    cache.store(_ask("fractions"), SYSTEM, 0.7, OK)
+
+    hit = cache.lookup(_ask("Fractions"), SYSTEM, 0.7)
+    assert hit["content"] == OK["content"]
+    assert hit["cached"] == "exact"
+    metrics = cache.metrics()
+    assert metrics["exact_hits"] == 1 and metrics["misses"] == 1
+
+
+def test_failures_are_not_cached():
+    cache = LLMResponseCache(semantic=False)
+    cache.store(_ask("fractions"), SYSTEM, 0.7, {"content": "exhausted", "success": False})
+    assert cache.lookup(_ask("fractions"), SYSTEM, 0.7) is None
+
+
+def test_ttl_expiry():
+    cache = LLMResponseCache(ttl_s=0.01, semantic=False)
+    cache.store(_ask("fractions"), SYSTEM, 0.7, OK)
+    time.sleep(0.02)
+    assert cache.lookup(_ask("fractions"), SYSTEM, 0.7) is None
+    assert cache.metrics()["expired"] == 1
+
+
+def test_lru_eviction_respects_entry_and_byte_caps():
+    cache = LLMResponseCache(max_entries=2, semantic=False)
+    for topic in ["a", "b"]:
+        cache.store(_ask(topic), SYSTEM, 0.7, OK)
+    cache.lookup(_ask("a"), SYSTEM, 0.7)  # 'a' becomes most recent
+    cache.store(_ask("c"), SYSTEM, 0.7, OK)
+
+    assert cache.lookup(_ask("b"), SYSTEM, 0.7) is None
+    assert cache.lookup(_ask("a"), SYSTEM, 0.7) is not None
+    assert cache.metrics()["evictions"] == 1
+
+    tiny = LLMResponseCache(max_bytes=600, semantic=False)
+    tiny.store(_ask("a"), SYSTEM, 0.7, OK)
+    tiny.store(_ask("b"), SYSTEM, 0.7, OK)
+    assert tiny.metrics()["bytes"] <= 600
+
+
+def test_semantic_tier_serves_near_duplicate_first_turn():
+    vectors = {
+        "how to teach fractions": [1.0, 0.0, 0.1],
+        "how do i teach fractions": [0.98, 0.0, 0.12],
+        "classroom noise": [0.0, 1.0, 0.0],
+    }
+    cache = LLMResponseCache(semantic=True, threshold=0.95, embedder=lambda text: vectors[text])
+    cache.store(_ask("How to teach fractions"), SYSTEM, 0.7, OK)
+
+    hit = cache.lookup(_ask("How do I teach fractions"), SYSTEM, 0.7)
+    assert hit is not None and hit["cached"] == "semantic"
+    assert cache.lookup(_ask("Classroom noise"), SYSTEM, 0.7) is None
+
+
+def test_semantic_tier_ignores_follow_up_turns():
+    cache = LLMResponseCache(semantic=True, threshold=0.5, embedder=lambda text: [1.0, 0.0])
+    history = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"},
+               {"role": "user", "content": "fractions"}]
+    cache.store(history, SYSTEM, 0.7, OK)
+    assert cache.metrics()["semantic_entries"] == 0
@@ -0,0 +1,193 @@
+import os
+import time
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")  # No cost-map fetch thread racing the import
+
+import app.llm_factory as llm_module
+from app.llm_factory import LLMFactory
+from app.provider_health import MAX_COOLDOWN, ProviderHealthRegistry
+
+MODELS = [{"model": "groq/llama-3.3-70b-versatile", "name": "big", "api_key": "k1", "hedge_after_s": None},
+          {"model": "groq/llama-3.1-8b-instant", "name": "small", "api_key": "k1", "hedge_after_s": None}]
+
+
+def _factory(monkeypatch, acompletion):
+    monkeypatch.setattr(llm_module, "provider_health", ProviderHealthRegistry())
+    monkeypatch.setattr(llm_module, "acompletion", acompletion)
+    factory = LLMFactory.__new__(LLMFactory)
+    factory.available_models = [dict(m) for m in MODELS]
+    factory._semaphore = None
+    return factory
+
+
+def _reply(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def test_achat_falls_back_to_next_provider_on_error(monkeypatch):
+    tried = []
+
+    async def acompletion(**kwargs):
+        tried.append(kwargs["model"])
+        if "70b" in kwargs["model"]:
+            raise RuntimeError("Connection reset by peer")
+        return _reply("Namaste!")
+
+    factory = _factory(monkeypatch, acompletion)
+    result = asyncio.run(factory.achat([{"role": "user", "content": "hi"}], cache=False, hedge=False))
+    assert result == {"content": "Namaste!", "model_used": "small", "success": True}
+    assert tried == ["groq/llama-3.3-70b-versatile", "groq/llama-3.1-8b-instant"]
+
+
+def test_achat_reports_exhaustion_when_every_provider_fails(monkeypatch):
+    async def acompletion(**kwargs):
+        raise RuntimeError(f"503 from {kwargs['model']}")
+
+    factory = _factory(monkeypatch, acompletion)
+    result = asyncio.run(factory.achat([{"role": "user", "content": "hi"}], cache=False, hedge=False))
+    assert result["success"] is False and result["model_used"] == "none"
+    assert "exhausted" in result["content"] and "503 from groq/llama-3.1-8b-instant" in result["content"]
+
+
+def test_achat_caps_calls_in_flight(monkeypatch):
+    in_flight, peak = 0, 0
+
+    async def acompletion(**kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.02)
+        in_flight -= 1
+        return _reply("ok")
+
+    factory = _factory(monkeypatch, acompletion)
+    monkeypatch.setattr(llm_module, "LLM_MAX_CONCURRENCY", 3)
+
+    async def burst():
+        return await asyncio.gather(*(factory.achat([{"role": "user", "content": f"q{i}"}], cache=False, hedge=False)
+                                      for i in range(12)))
+
+    results = asyncio.run(burst())
+    assert all(r["success"] for r in results)
+    assert peak == 3
+
+
+def test_json_mode_sets_response_format(monkeypatch):
+    calls = []
+
+    async def acompletion(**kwargs):
+        calls.append(kwargs)
+        return _reply('{"slides": []}')
+
+    factory = _factory(monkeypatch, acompletion)
+    asyncio.run(factory.achat([{"role": "user", "content": "outline as JSON"}], cache=False, json_mode=True))
+    asyncio.run(factory.achat([{"role": "user", "content": "hi"}], cache=False))
+    assert calls[0]["response_format"] == {"type": "json_object"} and calls[0]["drop_params"]
+    assert "response_format" not in calls[1]
+
+
+def test_abandoned_stream_frees_half_open_probe(monkeypatch):
+    async def acompletion(stream=False, **kwargs):
+        async def chunks():
+            for word in ("Plants ", "make ", "food"):
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word))])
+        return chunks()
+
+    factory = _factory(monkeypatch, acompletion)
+    factory.available_models = factory.available_models[:1]
+    health = llm_module.provider_health
+    health.record_failure("big", "429 rate limit", now=time.monotonic() - MAX_COOLDOWN - 1)  # Cooldown over
+
+    async def read_one_delta_then_disconnect():
+        stream = factory.astream_chat([{"role": "user", "content": "photosynthesis"}], cache=False)
+        assert (await stream.__anext__())["type"] == "delta"  # This call is the half-open probe
+        assert health.get("big").probe_in_flight
+        await stream.aclose()  # What Starlette does when the client goes away
+
+    asyncio.run(read_one_delta_then_disconnect())
+    assert not health.get("big").probe_in_flight
+    assert health.acquire("big")
+
+
+def _timed_acompletion(delays, failures=(), log=None):
+    """Fake acompletion: per-model delay; models in `failures` raise after it. Logs (event, model, t)."""
+    log = [] if log is None else log
+    started = time.perf_counter()
+
+    async def acompletion(**kwargs):
+        model = kwargs["model"]
+        log.append(("start", model, time.perf_counter() - started))
+        try:
+            await asyncio.sleep(delays[model])
+        except asyncio.CancelledError:
+            log.append(("cancelled", model, time.perf_counter() - started))
+            raise
+        if model in failures:
+            raise RuntimeError(f"Connection reset by {model}")
+        return _reply(f"answer from {model}")
+    return acompletion, log
+
+
+BIG, SMALL = MODELS[0]["model"], MODELS[1]["model"]
+
+
+def _hedging_factory(monkeypatch, acompletion, budget=0.1):
+    factory = _factory(monkeypatch, acompletion)
+    factory.available_models[0]["hedge_after_s"] = budget
+    return factory
+
+
+def _ask(factory):
+    return asyncio.run(factory.achat([{"role": "user", "content": "hi"}], cache=False, hedge=True, prefer=BIG))
+
+
+def test_hedge_fires_only_after_budget(monkeypatch):
+    acompletion, log = _timed_acompletion({BIG: 0.02, SMALL: 0.01})
+    factory = _hedging_factory(monkeypatch, acompletion)
+    assert _ask(factory)["model_used"] == "big"
+    assert [model for _, model, _ in log] == [BIG]  # Answered inside its budget: no backup
+    assert llm_module.provider_health.get("big").hedges_fired == 0
+
+    acompletion, log = _timed_acompletion({BIG: 0.5, SMALL: 0.01})
+    factory = _hedging_factory(monkeypatch, acompletion)
+    _ask(factory)
+    backup_start = next(t for event, model, t in log if event == "start" and model == SMALL)
+    assert backup_start >= 0.1
+
+
+def test_hedge_first_success_wins_and_loser_is_cancelled(monkeypatch):
+    acompletion, log = _timed_acompletion({BIG: 1.0, SMALL: 0.05})
+    factory = _hedging_factory(monkeypatch, acompletion)
+    health = llm_module.provider_health
+    health.record_failure("big", "429 rate limit", now=time.monotonic() - MAX_COOLDOWN - 1)  # Next call is a probe
+
+    started = time.perf_counter()
+    result = _ask(factory)
+    assert result["model_used"] == "small" and result["content"] == f"answer from {SMALL}"
+    assert time.perf_counter() - started < 0.5
+    assert ("cancelled", BIG) in [(event, model) for event, model, _ in log]
+    assert not health.get("big").probe_in_flight
+    assert health.get("big").hedges_fired == 1 and health.get("big").hedges_won == 1
+
+
+def test_primary_failure_inside_budget_falls_through(monkeypatch):
+    acompletion, log = _timed_acompletion({BIG: 0.01, SMALL: 0.01}, failures={BIG})
+    factory = _hedging_factory(monkeypatch, acompletion)
+    assert _ask(factory)["model_used"] == "small"
+    assert [model for event, model, _ in log if event == "start"] == [BIG, SMALL]
+    assert llm_module.provider_health.get("big").hedges_fired == 0  # A fallback, not a hedge
+
+
+def test_hedge_raises_backup_error_when_both_fail(monkeypatch):
+    acompletion, _ = _timed_acompletion({BIG: 0.3, SMALL: 0.01}, failures={BIG, SMALL})
+    factory = _hedging_factory(monkeypatch, acompletion)
+    messages = [{"role": "user", "content": "hi"}]
+    primary, backup = factory.available_models
+
+    with pytest.raises(RuntimeError, match=f"Connection reset by {SMALL}"):
+        asyncio.run(factory._hedged_attempt(primary, iter([backup]), messages, 0.7))
+    assert "exhausted" in _ask(factory)["content"]
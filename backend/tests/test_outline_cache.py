@@ -0,0 +1,79 @@
+import json
+import asyncio
+
+from app.outline_cache import OutlineCache, outline_key, parse_outline
+from app.utils.persistent_cache import PersistentTTLCache
+
+SLIDES = [{"title": "Introduction", "content": ["Plants make food"]}, {"title": "Chlorophyll"}]
+
+
+class FakeLLM:
+    def __init__(self, content=json.dumps({"slides": SLIDES}), success=True, delay=0.0):
+        self.content, self.success, self.delay = content, success, delay
+        self.calls = 0
+
+    async def achat(self, messages, **kwargs):
+        self.calls += 1
+        self.kwargs = kwargs
+        await asyncio.sleep(self.delay)
+        return {"content": self.content, "model_used": "fake", "success": self.success}
+
+
+def _outlines(tmp_path, llm):
+    return OutlineCache(PersistentTTLCache("outlines", max_age_s=60, path=str(tmp_path / "o.sqlite3")), llm)
+
+
+def test_key_normalizes_title_audience_and_language():
+    assert outline_key("  Photosynthesis! ", "Students", "English") == outline_key("photosynthesis", "students", "english")
+    assert outline_key("Photosynthesis", "Students", "Hindi") != outline_key("Photosynthesis", "Students", "English")
+    assert outline_key("Photosynthesis", "Teachers", "English") != outline_key("Photosynthesis", "Students", "English")
+
+
+def test_parse_outline_shapes():
+    assert parse_outline(json.dumps(SLIDES))[1]["content"] == []
+    assert parse_outline(json.dumps({"deck": SLIDES}))[0]["title"] == "Introduction"
+
+
+def test_parse_outline_unwraps_fenced_and_prose_replies():
+    fenced = "```json\n" + json.dumps({"slides": SLIDES}) + "\n```"
+    prose = "Sure! Here is the outline: " + json.dumps(SLIDES) + " Let me know if you need [more] slides."
+    assert parse_outline(fenced)[0]["title"] == "Introduction"
+    assert [s["title"] for s in parse_outline(prose)] == ["Introduction", "Chlorophyll"]
+
+
+def test_generation_requests_json_mode(tmp_path):
+    llm = FakeLLM(content="Outline:\n```\n" + json.dumps({"slides": SLIDES}) + "\n```")
+    slides, _ = asyncio.run(_outlines(tmp_path, llm).get("Photosynthesis"))
+    assert llm.kwargs["json_mode"] is True
+    assert slides[0]["title"] == "Introduction" and llm.calls == 1
+
+
+def test_repeat_download_makes_no_llm_call_even_after_restart(tmp_path):
+    llm = FakeLLM()
+    slides, cached = asyncio.run(_outlines(tmp_path, llm).get("Photosynthesis"))
+    assert not cached and slides[0]["title"] == "Introduction"
+
+    again, cached = asyncio.run(_outlines(tmp_path, llm).get("photosynthesis"))  # New process, same file
+    assert cached and again == slides
+    assert llm.calls == 1
+
+
+def test_concurrent_first_downloads_share_one_call(tmp_path):
+    llm = FakeLLM(delay=0.05)
+    outlines = _outlines(tmp_path, llm)
+
+    async def burst():
+        return await asyncio.gather(*(outlines.get("Gravity") for _ in range(5)))
+
+    results = asyncio.run(burst())
+    assert llm.calls == 1
+    assert all(slides == results[0][0] for slides, _ in results)
+
+
+def test_failures_fall_back_and_are_not_cached(tmp_path):
+    for llm in (FakeLLM(success=False), FakeLLM(content="not json")):
+        outlines = _outlines(tmp_path, llm)
+        slides, _ = asyncio.run(outlines.get("Fractions"))
+        assert "fallback" in str(slides)
+        asyncio.run(outlines.get("Fractions"))
+        assert llm.calls == 2
@@ -0,0 +1,71 @@
+import io
+import zipfile
+import pytest
+
+pptx = pytest.importorskip("pptx")
+from pptx import Presentation
+from app.utils.presentation_generator import render_presentation, new_presentation
+from app.utils.media_generator import MediaGenerator
+
+SLIDES = [
+    {"title": "Gravity", "content": ["[IMAGE_SEARCH: Gravity diagram for kids]", "Things fall down", "Apples too"]},
+    {"title": "Orbits", "content": "The Moon circles Earth"},
+]
+
+
+def _png():
+    Image = pytest.importorskip("PIL.Image")
+    buffer = io.BytesIO()
+    Image.new("RGB", (400, 300), (200, 120, 40)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _texts(deck):
+    return [[shape.text_frame.text for shape in slide.shapes if shape.has_text_frame] for slide in deck.slides]
+
+
+def test_renders_valid_deck_without_markers():
+    data = render_presentation("Physics", SLIDES, with_images=False)
+    deck = Presentation(io.BytesIO(data))
+    texts = _texts(deck)
+    assert texts[0] == ["Physics", "Generated by Sahayak.AI"]
+    assert texts[1][0] == "Gravity"
+    assert "IMAGE_SEARCH" not in texts[1][1]
+    assert "Things fall down" in texts[1][1]
+
+
+def test_template_copies_are_independent():
+    for title in ("One", "Two", "Three"):
+        data = render_presentation(title, SLIDES, with_images=False)
+        names = zipfile.ZipFile(io.BytesIO(data)).namelist()
+        assert len(names) == len(set(names))  # No parts leaked in from an earlier deck
+        assert len(Presentation(io.BytesIO(data)).slides) == 3
+    assert len(new_presentation().slides) == 0
+
+
+def test_reading_a_deck_does_not_corrupt_later_decks():
+    # The old deep-copied template lost its slides after any property read
+    first = new_presentation()
+    assert len(first.slides) == 0 and first.slide_width
+    first.slides.add_slide(first.slide_layouts[0])
+    for title in ("After", "Again"):
+        data = render_presentation(title, SLIDES, with_images=False)
+        names = zipfile.ZipFile(io.BytesIO(data)).namelist()
+        assert names.count("ppt/slides/slide1.xml") == 1
+        assert len(Presentation(io.BytesIO(data)).slides) == 3
+    assert len(new_presentation().slides) == 0
+
+
+def test_images_are_embedded():
+    data = render_presentation("Physics", SLIDES, images=[_png(), None])
+    deck = Presentation(io.BytesIO(data))
+    pictures = [[s for s in slide.shapes if s.shape_type == 13] for slide in deck.slides]  # 13 = PICTURE
+    assert [len(p) for p in pictures] == [0, 1, 0]
+    assert pictures[1][0].left + pictures[1][0].width <= deck.slide_width
+
+
+def test_media_generator_delegates(tmp_path):
+    data = MediaGenerator.generate_pptx("Physics", SLIDES, with_images=False)
+    assert data[:2] == b"PK"
+    path = MediaGenerator.generate_pptx("Physics", SLIDES, str(tmp_path / "deck.pptx"), with_images=False)
+    assert len(Presentation(path).slides) == 3
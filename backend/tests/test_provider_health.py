@@ -0,0 +1,118 @@
+from app.provider_health import (
+    ProviderHealthRegistry, classify_error, CLOSED, OPEN, HALF_OPEN, MIN_SAMPLES, EARLY_PROBE_INTERVAL
+)
+
+MODELS = [{"name": "primary"}, {"name": "secondary"}, {"name": "tertiary"}]
+
+
+def test_classify_error():
+    assert classify_error("litellm.RateLimitError: Error code: 429") == "rate_limit"
+    assert classify_error("AuthenticationError: invalid api_key") == "auth"
+    assert classify_error("Connection reset by peer") == "error"
+
+
+def test_rate_limit_opens_circuit_and_skips_provider():
+    registry = ProviderHealthRegistry()
+    registry.record_failure("primary", "429 Too Many Requests", now=100.0)
+
+    assert registry.get("primary").state == OPEN
+    assert [m["name"] for m in registry.rank(MODELS, now=101.0)] == ["secondary", "tertiary"]
+
+
+def test_half_open_admits_single_probe_then_closes():
+    registry = ProviderHealthRegistry()
+    registry.record_failure("primary", "rate limit exceeded", now=0.0)
+    cooldown = registry.get("primary").cooldown
+
+    later = cooldown + 1
+    assert registry.rank(MODELS, now=later)[0]["name"] == "primary"
+    assert registry.acquire("primary", now=later) is True
+    assert registry.get("primary").state == HALF_OPEN
+    assert registry.acquire("primary", now=later) is False  # Probe already in flight
+
+    registry.record_success("primary", 0.2)
+    assert registry.get("primary").state == CLOSED
+
+
+def test_failed_probe_backs_off_exponentially():
+    registry = ProviderHealthRegistry()
+    registry.record_failure("primary", "429", now=0.0)
+    first = registry.get("primary").cooldown
+
+    registry.acquire("primary", now=first + 1)
+    registry.record_failure("primary", "429", now=first + 1)
+    assert registry.get("primary").cooldown == first * 2
+
+
+def test_generic_errors_need_threshold():
+    registry = ProviderHealthRegistry()
+    registry.record_failure("primary", "timeout", now=0.0)
+    assert registry.get("primary").state == CLOSED
+    registry.record_failure("primary", "timeout", now=0.0)
+    registry.record_failure("primary", "timeout", now=0.0)
+    assert registry.get("primary").state == OPEN
+
+
+def test_rank_prefers_faster_sampled_provider():
+    registry = ProviderHealthRegistry()
+    for _ in range(MIN_SAMPLES):
+        registry.record_success("primary", 2.0)
+        registry.record_success("tertiary", 0.3)
+
+    # Sampled providers by cost, unsampled ones keep config order after them
+    assert [m["name"] for m in registry.rank(MODELS, now=0.0)] == ["tertiary", "primary", "secondary"]
+
+
+def test_all_open_still_probes_soonest():
+    registry = ProviderHealthRegistry()
+    registry.record_failure("primary", "429", now=0.0)
+    registry.record_failure("secondary", "invalid api_key", now=0.0)
+    registry.record_failure("tertiary", "429", now=5.0)
+
+    assert registry.rank(MODELS, now=6.0, allow_probe=False) == []
+    assert [m["name"] for m in registry.rank(MODELS, now=6.0)] == ["primary"]
+
+
+def test_early_probe_is_rate_limited_and_keeps_the_cooldown():
+    registry = ProviderHealthRegistry()
+    for name in ("primary", "secondary", "tertiary"):
+        registry.record_failure(name, "429", now=0.0)
+    primary = registry.get("primary")
+    reopens_at = primary.reopens_at()
+
+    assert [m["name"] for m in registry.rank(MODELS, now=1.0)] == ["primary"]
+    assert registry.acquire("primary", now=1.0) is True
+    registry.record_failure("primary", "429", now=2.0)  # The probe failed: backoff doubles
+    assert primary.cooldown == 2 * registry.get("secondary").cooldown
+
+    # A full outage pays for at most one probe per interval, not one per request
+    assert registry.rank(MODELS, now=3.0) == []
+    assert registry.rank(MODELS, now=1.0 + EARLY_PROBE_INTERVAL) != []
+
+    # Cooldowns are never rewritten, so /health/providers stays truthful
+    secondary = registry.get("secondary")
+    assert secondary.opened_at == 0.0 and secondary.reopens_at() == reopens_at
+    assert secondary.snapshot(now=3.0)["cooldown_remaining_s"] == reopens_at - 3.0
+
+
+def test_hedge_budget_tracks_p90_within_bounds():
+    registry = ProviderHealthRegistry()
+    assert registry.hedge_budget("primary", default=3.0, floor=0.5, ceiling=8.0) == 3.0
+
+    for latency in [0.1] * 9 + [1.2]:
+        registry.record_success("primary", latency)
+    assert registry.hedge_budget("primary", default=3.0, floor=0.5, ceiling=8.0) == 1.2
+
+    for _ in range(50):
+        registry.record_success("primary", 0.1)
+    assert registry.hedge_budget("primary", default=3.0, floor=0.5, ceiling=8.0) == 0.5
+
+
+def test_release_frees_half_open_probe():
+    registry = ProviderHealthRegistry()
+    registry.record_failure("primary", "429", now=0.0)
+    later = registry.get("primary").cooldown + 1
+    assert registry.acquire("primary", now=later) is True
+
+    registry.release("primary")  # e.g. probe lost a hedge race and was cancelled
+    assert registry.acquire("primary", now=later) is True
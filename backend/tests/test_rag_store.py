@@ -0,0 +1,125 @@
+import re
+import zlib
+
+import pytest
+
+pytest.importorskip("chromadb")
+from app.rag.store import RAGStore, SEED_DOCS, doc_id
+
+DIM = 64
+
+
+class BagOfWords:
+    """Deterministic stand-in for MiniLM: hashed word counts. Counts embedding calls."""
+
+    def __init__(self):
+        self.embedded = 0
+
+    def _vector(self, text):
+        vector = [0.0] * DIM
+        for word in re.findall(r"\w+", text.lower()):
+            vector[zlib.crc32(word.encode()) % DIM] += 1.0
+        return vector
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+def test_reopening_the_index_does_not_re_embed(tmp_path):
+    first = BagOfWords()
+    store = RAGStore(str(tmp_path), "knowledge", embedder=first)
+    store.ensure_seeded()
+    assert first.embedded == len(SEED_DOCS)
+
+    second = BagOfWords()
+    reopened = RAGStore(str(tmp_path), "knowledge", embedder=second)  # Like a process restart
+    reopened.ensure_seeded()
+    assert reopened.count() == len(SEED_DOCS)
+    assert second.embedded == 0
+
+
+def test_upsert_is_incremental_by_content_hash(tmp_path):
+    embedder = BagOfWords()
+    store = RAGStore(str(tmp_path), "knowledge", embedder=embedder)
+    fractions = {"content": "Teach fractions by folding a chapati into halves and quarters.", "metadata": {}}
+    assert store.upsert(SEED_DOCS + [fractions, dict(fractions)]) == len(SEED_DOCS) + 1
+    assert store.upsert(SEED_DOCS + [fractions]) == 0
+    assert embedder.embedded == len(SEED_DOCS) + 1
+    assert doc_id(fractions["content"]) in store.collection.get(include=[])["ids"]
+
+
+def test_query_ranks_and_filters(tmp_path):
+    store = RAGStore(str(tmp_path), "knowledge", embedder=BagOfWords())
+    store.ensure_seeded()
+    top = store.query("students are noisy, how do I get eyes on me", k=1)[0]
+    assert top["metadata"]["topic"] == "discipline"
+
+    only_pedagogy = store.query("students are noisy", k=3, where={"type": "pedagogy"})
+    assert [r["metadata"]["topic"] for r in only_pedagogy] == ["subtraction"]
+
+
+CHAPTERS = [
+    {"content": "Jugs and Mugs: estimate how many mugs of water fill a jug, then measure it.",
+     "metadata": {"topic": "measurement", "grade": "4", "type": "pedagogy"}},
+    {"content": "भिन्न: रोटी को दो बराबर हिस्सों में मोड़कर आधा समझाइए।",
+     "metadata": {"topic": "fractions", "grade": "4", "type": "pedagogy"}},
+    {"content": "Measure water in the classroom: use a bottle and a glass to compare volumes.",
+     "metadata": {"topic": "measurement", "grade": "5", "type": "pedagogy"}},
+]
+
+
+@pytest.mark.parametrize("backend", ["chroma", "numpy"])
+def test_hybrid_search_finds_exact_terms_and_pushes_filters_down(tmp_path, backend):
+    store = RAGStore(str(tmp_path), "knowledge", embedder=BagOfWords(), backend=backend)
+    store.ensure_seeded()
+    store.upsert(CHAPTERS)
+
+    top = store.search("Jugs and Mugs chapter activity", k=1)[0]
+    assert top["content"].startswith("Jugs and Mugs") and top["lexical"] == 1.0
+    assert store.search("भिन्न कैसे पढ़ाएँ", k=1, alpha=0.0)[0]["metadata"]["topic"] == "fractions"
+
+    grade5 = store.search("measure water", k=3, filters={"grade": "5", "type": "pedagogy"})
+    assert [r["metadata"]["grade"] for r in grade5] == ["5"]
+    assert store.search("measure water", k=3, filters={"grade": "9"}) == []
+
+
+def test_keyword_index_survives_restarts_and_deletes(tmp_path):
+    store = RAGStore(str(tmp_path), "knowledge", embedder=BagOfWords())
+    store.upsert(CHAPTERS)
+    store.save_lexical()
+    store.delete([doc_id(CHAPTERS[0]["content"])])  # Not saved: simulates a killed ingest run
+
+    reopened = RAGStore(str(tmp_path), "knowledge", embedder=BagOfWords())
+    assert len(reopened.lexical) == 2 and reopened.stats["lexical_rebuilds"] == 1
+    assert all("Jugs" not in r["content"] for r in reopened.search("Jugs and Mugs", k=3))
+
+    reopened.save_lexical()
+    again = RAGStore(str(tmp_path), "knowledge", embedder=BagOfWords())
+    assert len(again.lexical) == 2 and again.stats["lexical_rebuilds"] == 0
+
+
+def test_filters_behave_the_same_on_every_backend(tmp_path):
+    docs = [{"content": "Use bottle caps to count tens and ones.", "metadata": {"grade": 5, "topic": "place value"}},
+            {"content": "Count tens with bundles of sticks.", "metadata": {"grade": "4", "topic": "place value"}},
+            {"content": "Count the days until the school fair.", "metadata": {"grade": "5", "type": "activity"}}]
+    results = {}
+    for backend in ("chroma", "numpy"):
+        store = RAGStore(str(tmp_path / backend), "knowledge", embedder=BagOfWords(), backend=backend)
+        store.upsert(docs)
+        for alpha in (0.0, 0.5, 1.0):
+            typed = store.search("count tens", k=5, filters={"grade": 5}, alpha=alpha)
+            text = store.search("count tens", k=5, filters={"grade": "5", "type": None}, alpha=alpha)
+            assert typed == text
+            results[backend, alpha] = sorted(r["content"] for r in typed)
+            assert all(r["metadata"]["grade"] == "5" for r in typed)
+        with pytest.raises(ValueError, match="Cannot filter on 'chapter'"):
+            store.search("count tens", filters={"chapter": "2"})
+        with pytest.raises(ValueError, match="Cannot filter on 'chapter'"):
+            store.lexical.candidates({"chapter": "2"})
+    assert results["chroma", 1.0] == results["numpy", 1.0] == sorted(d["content"] for d in docs
+                                                                     if str(d["metadata"]["grade"]) == "5")
+    assert results["chroma", 0.0] == results["numpy", 0.0]
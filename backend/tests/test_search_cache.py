@@ -0,0 +1,73 @@
+import time
+import threading
+from app.utils.persistent_cache import PersistentTTLCache
+from app.utils.singleflight import SingleFlight
+
+
+def test_persistent_cache_survives_reopen(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = PersistentTTLCache("video_search", max_age_s=60, path=path)
+    cache.set("gravity for kids|4", [{"title": "Gravity"}])
+
+    reopened = PersistentTTLCache("video_search", max_age_s=60, path=path)
+    value, age = reopened.get("gravity for kids|4")
+    assert value == [{"title": "Gravity"}]
+    assert 0 <= age < 5
+
+
+def test_persistent_cache_expires(tmp_path):
+    cache = PersistentTTLCache("video_search", max_age_s=0.01, path=str(tmp_path / "c.sqlite3"))
+    cache.set("k", {"v": 1})
+    time.sleep(0.02)
+    assert cache.get("k") is None
+    assert len(cache) == 0
+
+
+def test_singleflight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    upstream_calls = []
+    gate = threading.Event()
+
+    def slow_search():
+        upstream_calls.append(1)
+        gate.wait(1)
+        return ["video"]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("gravity", slow_search))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join()
+
+    assert len(upstream_calls) == 1
+    assert results == [["video"]] * 8
+    assert flight.stats["coalesced"] == 7
+    assert not flight.in_flight("gravity")
+
+
+def test_singleflight_propagates_errors_to_waiters():
+    flight = SingleFlight()
+    gate = threading.Event()
+    errors = []
+
+    def failing():
+        gate.wait(1)
+        raise RuntimeError("DDGS down")
+
+    def caller():
+        try:
+            flight.do("q", failing)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=caller) for _ in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert errors == ["DDGS down"] * 3
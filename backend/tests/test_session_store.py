@@ -0,0 +1,69 @@
+import time
+from app.session_store import SessionStore, Turn
+
+
+def test_history_is_a_bounded_ring():
+    store = SessionStore(max_turns=4)
+    for i in range(10):
+        store.append("sunita", "user", f"message {i}")
+
+    assert [m["content"] for m in store.history("sunita")] == ["message 6", "message 7", "message 8", "message 9"]
+    assert store.history("sunita", limit=2)[-1] == {"role": "user", "content": "message 9"}
+    assert store.metrics()["turns_dropped"] == 6
+
+
+def test_large_turns_are_compressed_and_round_trip():
+    lesson = "### Slide\n- Photosynthesis uses sunlight.\n" * 200 + "नमस्ते"
+    turn = Turn("assistant", lesson)
+    assert turn.compressed
+    assert turn.size < len(lesson.encode("utf-8"))
+    assert turn.content == lesson
+
+
+def test_idle_sessions_expire():
+    store = SessionStore(ttl_s=0.01)
+    store.append("old", "user", "hi")
+    time.sleep(0.02)
+    store.append("new", "user", "hello")
+
+    assert "old" not in store
+    assert store.history("old") == []
+    assert store.metrics()["ttl_evictions"] == 1
+
+
+def test_global_budget_evicts_least_recently_used():
+    store = SessionStore(max_bytes=400)
+    store.append("a", "user", "x" * 100)
+    store.append("b", "user", "y" * 100)
+    store.history("a")  # 'a' is now most recently used
+    store.append("c", "user", "z" * 100)
+
+    assert "b" not in store
+    assert "a" in store and "c" in store
+    assert store.metrics()["bytes"] <= 400
+
+
+def test_session_cap_and_clear():
+    store = SessionStore(max_sessions=2)
+    for user in ["a", "b", "c"]:
+        store.append(user, "user", "hi")
+    assert len(store) == 2
+
+    store.clear("c")
+    assert "c" not in store
+
+
+def test_ring_drops_are_kept_until_summarized():
+    store = SessionStore(max_turns=4)
+    for i in range(6):
+        store.append("u", "user", f"m{i}")
+    assert [t.content for t in store.dropped("u")] == ["m0", "m1"]
+    held = store.metrics()["bytes"]
+
+    store.set_summary("u", "", upto_seq=1)
+    assert [t.content for t in store.dropped("u")] == ["m1"]
+    assert store.metrics()["bytes"] < held
+
+    for i in range(6, 12):  # Summaries a whole ring behind: the oldest are let go
+        store.append("u", "user", f"m{i}")
+    assert len(store.dropped("u")) == 4 and store.metrics()["turns_lost"] == 3
@@ -0,0 +1,49 @@
+import time
+from app.utils.slide_images import resolve_slide_images, slide_image_source, strip_image_markers
+
+DECK = [
+    {"title": "Gravity", "content": ["[IMAGE_SEARCH: Gravity physics diagram for kids]", "Things fall down"]},
+    {"title": "Orbits [IMAGE_SEARCH: Moon orbit]", "content": "The Moon circles Earth"},
+    {"title": "Apples", "content": ["![apple](https://example.org/apple.png)", "Newton's apple"]},
+    {"title": "Recap", "content": ["No picture here"]},
+    {"title": "Explicit", "content": [], "image": "Solar system"},
+]
+
+
+def test_sources_from_markers_urls_and_explicit_key():
+    assert [slide_image_source(s) for s in DECK] == [
+        "Gravity physics diagram for kids", "Moon orbit", "https://example.org/apple.png", None, "Solar system"]
+    assert strip_image_markers("Orbits [IMAGE_SEARCH: Moon orbit]") == "Orbits"
+
+
+def test_lookups_run_concurrently():
+    def slow_fetch(source):
+        time.sleep(0.2)
+        return source.encode()
+
+    sources = [slide_image_source(s) for s in DECK]
+    started = time.perf_counter()
+    images = resolve_slide_images(sources, fetch=slow_fetch, max_workers=8)
+    assert time.perf_counter() - started < 0.5   # ~one lookup, not four in series
+    assert images[0] == b"Gravity physics diagram for kids"
+    assert images[3] is None
+
+
+def test_deadline_and_failures_leave_slides_without_images():
+    def fetch(source):
+        if source == "slow":
+            time.sleep(1)
+        if source == "broken":
+            raise RuntimeError("DDGS down")
+        return b"img"
+
+    started = time.perf_counter()
+    images = resolve_slide_images(["fast", "slow", "broken", "fast"], fetch=fetch, deadline_s=0.2)
+    assert time.perf_counter() - started < 0.6
+    assert images == [b"img", None, None, b"img"]
+
+
+def test_duplicate_queries_fetched_once():
+    calls = []
+    resolve_slide_images(["tiger", "tiger", None], fetch=lambda s: calls.append(s) or b"x")
+    assert calls == ["tiger"]
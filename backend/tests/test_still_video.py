@@ -0,0 +1,32 @@
+import os
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+from app.utils.still_video import find_ffmpeg, encode_still, encode_ken_burns, ken_burns_frames
+
+
+def _image(tmp_path, size=(1024, 768)):
+    path = str(tmp_path / "frame.png")
+    Image.linear_gradient("L").resize(size).convert("RGB").save(path)
+    return path
+
+
+def test_ken_burns_frames_are_raw_rgb_and_move(tmp_path):
+    with Image.open(_image(tmp_path)) as image:
+        frames = list(ken_burns_frames(image, 24, size=(320, 240)))
+    assert len(frames) == 24
+    assert all(len(f) == 320 * 240 * 3 for f in frames)
+    assert frames[0] != frames[-1]
+
+
+needs_ffmpeg = pytest.mark.skipif(find_ffmpeg() is None, reason="ffmpeg not available")
+
+
+@needs_ffmpeg
+@pytest.mark.parametrize("encode", [encode_still, encode_ken_burns])
+def test_encoders_produce_mp4(tmp_path, encode):
+    out = str(tmp_path / "out.mp4")
+    encode(_image(tmp_path), out, duration_s=1, fps=12)
+    with open(out, "rb") as f:
+        assert f.read(12)[4:8] == b"ftyp"
+    assert os.path.getsize(out) > 0
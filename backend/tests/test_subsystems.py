@@ -0,0 +1,37 @@
+import sys
+import subprocess
+
+import pytest
+
+from app.subsystems import SubsystemRegistry
+
+
+def test_loaded_on_first_use_and_only_once():
+    registry = SubsystemRegistry({"codec": "json:dumps", "missing": "app.no_such_module:thing"})
+    assert registry.status()["codec"]["loaded"] is False
+
+    import json
+    assert registry.get("codec") is json.dumps
+    assert registry.get("codec") is json.dumps
+    assert registry.status()["codec"]["loaded"] is True
+
+
+def test_failed_load_is_reported_and_retried():
+    registry = SubsystemRegistry({"missing": "app.no_such_module:thing"})
+    with pytest.raises(ImportError):
+        registry.get("missing")
+    assert "ModuleNotFoundError" in registry.status()["missing"]["error"]
+    assert registry.warm() == {"missing": False}
+
+    registry.register("missing", "json:loads")
+    assert registry.warm(["missing"]) == {"missing": True}
+    assert registry.status()["missing"]["error"] is None
+
+
+def test_importing_main_stays_light():
+    pytest.importorskip("fastapi")
+    heavy = ("litellm", "huggingface_hub", "gradio_client", "fpdf", "pptx", "moviepy")
+    code = f"import sys, app.main; print('eager:', *(m for m in {heavy!r} if m in sys.modules))"
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.splitlines()[-1] == "eager:"
@@ -0,0 +1,104 @@
+"""
+Shape + fuzz suite for app/tools/tool_parser.py.
+SAMPLES mirrors what the FALLBACK_MODELS actually send back.
+"""
+import json
+import time
+import random
+import pytest
+from app.tools.tool_parser import ToolCallScanner, extract_json, extract_tool_call, parse_llm_output
+
+YT = {"tool_used": "youtube_search", "data": "Gravity for kids", "metadata": {"topic": "Gravity", "audience_level": "child"}}
+MERMAID = {"tool_used": "mermaid", "data": "graph TD\n  A[Conflict] --> B{Calm Down?}\n  B -- Yes --> C[Discuss]", "metadata": {"topic": "Conflict"}}
+
+SAMPLES = [
+    # Groq Llama-3.3-70B: plain markdown prose with LaTeX, no tool
+    ("70b_prose", "**Newton's Law**: $$ F = ma $$ and $$ \\frac{1}{2}mv^2 $$. Use a ball {demo}.", None),
+    # Groq Llama-3.3-70B: bare JSON
+    ("70b_json", json.dumps(YT), YT),
+    # Groq Llama-3.1-8B (JSON-only instruction): fenced json block
+    ("8b_fenced", "```json\n" + json.dumps(YT, indent=2) + "\n```", YT),
+    # Claude-3-Haiku: chatty prefix + JSON + trailing note with braces
+    ("haiku_prefixed", "Here is the JSON: " + json.dumps(MERMAID) + "\nLet me know if {anything} else.", MERMAID),
+    # OpenRouter Llama-3-8B: raw newlines inside the JSON string (invalid strict JSON)
+    ("openrouter_raw_newlines", '{"tool_used": "document", "data": "Line one\nLine two", "metadata": {}}',
+     {"tool_used": "document", "data": "Line one\nLine two", "metadata": {}}),
+    # Gemma-7B: LaTeX backslashes inside the JSON string
+    ("gemma_latex", '{"tool_used": "text", "data": "Area = \\pi r^2 and \\frac{a}{b}"}',
+     {"tool_used": "text", "data": "Area = \\pi r^2 and \\frac{a}{b}"}),
+    # Mermaid fence before the tool block must not be mistaken for it
+    ("mermaid_fence_first", "```mermaid\ngraph TD\n A{\"Start\"} --> B{End}\n```\n" + json.dumps(YT), YT),
+    # Several brace groups, tool JSON last
+    ("many_braces", "Sets {1,2} and {3} then {\"not\": \"a tool\"} finally " + json.dumps(YT), YT),
+    # Stray unclosed brace in prose before the tool JSON
+    ("stray_open_brace", "Remember: { is a brace. " + json.dumps(YT), YT),
+    # Fenced block holding JSON whose string contains a fence
+    ("fence_in_string", "```json\n" + json.dumps({"tool_used": "mermaid", "data": "```mermaid\ngraph TD\n```"}) + "\n```",
+     {"tool_used": "mermaid", "data": "```mermaid\ngraph TD\n```"}),
+    # JSON without tool_used is just text
+    ("json_no_tool", '{"answer": 42}', None),
+]
+
+
+@pytest.mark.parametrize("name,text,expected", SAMPLES, ids=[s[0] for s in SAMPLES])
+def test_model_output_shapes(name, text, expected):
+    assert extract_tool_call(text) == expected
+
+
+@pytest.mark.parametrize("name,text,expected", SAMPLES, ids=[s[0] for s in SAMPLES])
+def test_incremental_feed_matches_one_shot(name, text, expected):
+    rng = random.Random(name)
+    for _ in range(20):
+        scanner = ToolCallScanner()
+        i = 0
+        while i < len(text):
+            step = rng.randint(1, 7)
+            scanner.feed(text[i:i + step])
+            i += step
+        assert scanner.finish() == expected
+
+
+def test_parse_llm_output_falls_back_to_text():
+    assert parse_llm_output("Namaste! How can I help?") == {"tool_used": "text", "data": "Namaste! How can I help?"}
+    assert parse_llm_output(json.dumps(YT)) == YT
+
+
+def test_opens_structured():
+    scanner = ToolCallScanner()
+    assert scanner.opens_structured is None
+    scanner.feed("  \n")
+    assert scanner.opens_structured is None
+    scanner.feed("```json")
+    assert scanner.opens_structured is True
+    prose = ToolCallScanner()
+    prose.feed("Namaste")
+    assert prose.opens_structured is False
+
+
+def test_fuzz_never_raises():
+    rng = random.Random(1234)
+    alphabet = ['{', '}', '"', '\\', '`', '```', '\n', 'a', ' ', ':', ',', 'tool_used', '```mermaid\n', json.dumps(YT)]
+    for _ in range(500):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 60)))
+        result = extract_tool_call(text)
+        assert result is None or "tool_used" in result
+
+
+@pytest.mark.parametrize("pathological", [
+    "{" * 20000,
+    "{\"" * 10000,
+    "`" * 20000,
+    "\\frac{" * 5000,
+    "{" + "a" * 50000,
+])
+def test_pathological_inputs_stay_fast(pathological):
+    started = time.perf_counter()
+    assert extract_tool_call(pathological + json.dumps(YT)) in (None, YT)
+    assert time.perf_counter() - started < 1.0
+
+
+def test_extract_json_from_wrapped_text():
+    assert extract_json('{"a": 1}') == {"a": 1}
+    assert extract_json('Here:\n```json\n[{"title": "x"}]\n```') == [{"title": "x"}]
+    assert extract_json('Note {braces} first, then {"slides": []} done') == {"slides": []}
+    assert extract_json("no json here") is None
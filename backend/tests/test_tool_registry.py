@@ -0,0 +1,84 @@
+import time
+import asyncio
+from app.tools.registry import ToolRegistry, tool_registry
+
+
+def test_prompt_section_lists_every_master_prompt_tool():
+    section = tool_registry.prompt_section()
+    for name in ["mermaid", "image_prompt", "video_prompt", "youtube_search", "presentation",
+                 "document", "csv", "docx", "excel"]:
+        assert f'"{name}"' in section
+    assert section.startswith("JSON Schema:")
+
+
+def test_frontend_tools_pass_through():
+    call = {"tool_used": "mermaid", "data": "graph TD\nA-->B"}
+    assert asyncio.run(tool_registry.run(dict(call))) == call
+
+
+def test_blocking_executor_runs_off_loop_and_respects_deadline():
+    registry = ToolRegistry()
+    registry.register("slow", "Slow tool", executor=lambda data, meta: time.sleep(0.5) or "late", deadline_s=0.05)
+    registry.register("fast", "Fast tool", executor=lambda data, meta: data.upper(), deadline_s=1)
+
+    timed_out = asyncio.run(registry.run({"tool_used": "slow", "data": "original"}))
+    assert timed_out["data"] == "original"
+    assert registry.stats["timeouts"] == 1
+    assert asyncio.run(registry.run({"tool_used": "fast", "data": "gravity"}))["data"] == "GRAVITY"
+
+
+def test_errors_keep_original_data():
+    def broken(data, meta):
+        raise RuntimeError("DDGS down")
+
+    registry = ToolRegistry()
+    registry.register("broken", "Broken", executor=broken)
+    assert asyncio.run(registry.run({"tool_used": "broken", "data": "q"}))["data"] == "q"
+    assert registry.stats["errors"] == 1
+
+
+def test_multiple_tool_calls_run_concurrently():
+    registry = ToolRegistry(max_workers=4)
+    registry.register("search", "Search", executor=lambda data, meta: time.sleep(0.2) or [data], deadline_s=2)
+    response = {"tool_used": "search", "data": "a",
+                "tool_calls": [{"tool_used": "search", "data": "b"}, {"tool_used": "search", "data": "c"}]}
+
+    started = time.perf_counter()
+    asyncio.run(registry.run(response))
+    assert time.perf_counter() - started < 0.5
+    assert [response["data"]] + [c["data"] for c in response["tool_calls"]] == [["a"], ["b"], ["c"]]
+
+
+def test_async_executor_not_sent_to_thread_pool():
+    async def lookup(data, meta):
+        await asyncio.sleep(0)
+        return f"async:{data}"
+
+    registry = ToolRegistry()
+    tool = registry.register("async_tool", "Async", executor=lookup)
+    assert tool.blocking is False
+    assert asyncio.run(registry.run({"tool_used": "async_tool", "data": "x"}))["data"] == "async:x"
+
+
+def test_prompt_section_documents_tool_calls():
+    assert '"tool_calls"' in tool_registry.prompt_section()
+
+
+def test_null_or_malformed_tool_calls_are_ignored():
+    registry = ToolRegistry()
+    registry.register("upper", "Upper", executor=lambda data, meta: data.upper())
+    assert asyncio.run(registry.run({"tool_used": "upper", "data": "a", "tool_calls": None}))["data"] == "A"
+    response = asyncio.run(registry.run({"tool_used": "upper", "data": "a", "tool_calls": {"tool_used": "upper"}}))
+    assert response == {"tool_used": "upper", "data": "A"}
+
+
+def test_model_reply_with_several_tool_calls_executes_each():
+    from app.tools.tool_parser import parse_llm_output
+    registry = ToolRegistry()
+    registry.register("mermaid", "Diagram")
+    registry.register("search", "Search", executor=lambda data, meta: [f"video about {data}"])
+    reply = ('Here you go {"tool_used": "mermaid", "data": "graph TD\\nA-->B", "tool_calls": ['
+             '{"tool_used": "search", "data": "gravity"}, {"tool_used": "search", "data": "orbits"}, "junk"]}')
+    response = asyncio.run(registry.run(parse_llm_output(reply)))
+    assert response["data"] == "graph TD\nA-->B"
+    assert [c["data"] for c in response["tool_calls"][:2]] == [["video about gravity"], ["video about orbits"]]
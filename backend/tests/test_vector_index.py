@@ -0,0 +1,82 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.rag import vector_index
+from app.rag.vector_index import MemmapIndex
+
+DIM = 32
+
+
+def _data(n, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, DIM)).astype(np.float32)
+    ids = [f"doc{i}" for i in range(n)]
+    metadatas = [{"grade": str(4 + i % 2), "topic": ["fractions", "plants", "maps"][i % 3]} for i in range(n)]
+    return ids, vectors, [f"text {i}" for i in range(n)], metadatas
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_top_k_matches_exact_cosine(tmp_path, dtype):
+    ids, vectors, texts, metadatas = _data(500)
+    index = MemmapIndex(str(tmp_path), dtype=dtype)
+    index.upsert(ids, vectors.tolist(), texts, metadatas)
+
+    query = vectors[7] + 0.1
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    exact = unit @ (query / np.linalg.norm(query))
+    result = index.query([query.tolist()], n_results=5)
+    assert result["ids"][0][0] == "doc7"
+    assert len(set(result["ids"][0]) & {ids[i] for i in np.argsort(-exact)[:5]}) >= 4
+    assert abs(result["distances"][0][0] - (1 - exact[7])) < 0.02
+    assert result["documents"][0][0] == "text 7" and result["metadatas"][0][0]["grade"] == "5"
+
+
+def test_where_filters_use_metadata_columns(tmp_path):
+    ids, vectors, texts, metadatas = _data(300)
+    index = MemmapIndex(str(tmp_path))
+    index.upsert(ids, vectors, texts, metadatas)
+
+    where = {"$and": [{"grade": "4"}, {"topic": "maps"}]}
+    hits = index.query([vectors[0]], n_results=200, where=where)
+    assert hits["ids"][0] and all(m == {"grade": "4", "topic": "maps"} for m in hits["metadatas"][0])
+    assert len(hits["ids"][0]) == 50
+    assert index.query([vectors[0]], n_results=3, where={"grade": "9"})["ids"] == [[]]
+    assert index.get(where={"topic": {"$eq": "plants"}}, limit=5, offset=10)["ids"][0] == "doc31"
+    with pytest.raises(ValueError, match="Cannot filter on 'chapter'"):  # Same rule as BM25 / RAGStore
+        index.query([vectors[0]], where={"chapter": "1"})
+    typed = {"$and": [{"grade": 4}, {"topic": "maps"}]}
+    assert index.query([vectors[0]], n_results=200, where=typed)["ids"] == hits["ids"]
+
+
+def test_upsert_delete_and_reopen(tmp_path):
+    ids, vectors, texts, metadatas = _data(20)
+    index = MemmapIndex(str(tmp_path))
+    index.upsert(ids, vectors, texts, metadatas)
+    index.upsert(["doc3"], [vectors[5]], ["replaced"], [{"grade": "4"}])
+    index.delete(["doc0", "doc1", "missing"])
+    assert index.count() == 18
+
+    with open(os.path.join(str(tmp_path), "vectors.0"), "ab") as f:
+        f.write(b"\x01" * 100)  # A crashed append: ignored, then cut by the next writer
+    reopened = MemmapIndex(str(tmp_path))
+    assert reopened.count() == 18
+    assert reopened.get(ids=["doc3", "doc0"])["documents"] == ["replaced"]
+    reopened.upsert(["doc99"], [vectors[9]], ["new"], [None])
+    assert reopened.query([vectors[9]], n_results=2)["ids"][0][:2] in (["doc9", "doc99"], ["doc99", "doc9"])
+
+
+def test_compaction_is_seen_by_open_readers(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_index, "COMPACT_MIN_DEAD", 1)
+    ids, vectors, texts, metadatas = _data(40)
+    writer = MemmapIndex(str(tmp_path))
+    writer.upsert(ids, vectors, texts, metadatas)
+    reader = MemmapIndex(str(tmp_path))
+    assert reader.count() == 40
+
+    writer.delete(ids[:30])
+    assert writer.metrics()["generation"] == 1 and writer.metrics()["rows"] == 10
+    assert reader.count() == 10
+    assert reader.query([vectors[35]], n_results=1)["ids"] == [["doc35"]]
+    assert sorted(os.listdir(str(tmp_path))) == sorted([f"{n}.1" for n in writer._file_names()] + ["header.json"])
@@ -0,0 +1,119 @@
+import time
+
+import pytest
+
+import app.warmup as warmup_module
+from app.warmup import Warmup, READY, DEGRADED, FAILED, SKIPPED
+
+
+def _sleeping(seconds, state=READY):
+    def task():
+        time.sleep(seconds)
+        return state, None
+    return task
+
+
+def _broken():
+    raise RuntimeError("no keys")
+
+
+def test_tasks_warm_concurrently_and_report_durations():
+    warmup = Warmup({"a": _sleeping(0.2), "b": _sleeping(0.2), "c": _sleeping(0.2, DEGRADED)},
+                    requires=["a", "c"], enabled=True)
+    assert not warmup.ready()  # Cold
+
+    started = time.perf_counter()
+    warmup.start()
+    assert warmup.status()["ready"] is False  # start() doesn't block
+    assert warmup.wait(timeout=2)
+    assert time.perf_counter() - started < 0.5
+
+    status = warmup.status()
+    assert status["ready"] is True
+    assert status["subsystems"]["c"]["state"] == DEGRADED
+    assert all(entry["ms"] >= 150 for entry in status["subsystems"].values())
+
+
+def test_only_required_failures_block_readiness():
+    warmup = Warmup({"llm": _sleeping(0), "video": _broken}, requires=["llm"], enabled=True, retry_s=0)
+    warmup.start()
+    warmup.wait(timeout=2)
+    assert warmup.ready()
+    assert "no keys" in warmup.status()["subsystems"]["video"]["detail"]
+
+    blocked = Warmup({"llm": _broken, "embeddings": lambda: (SKIPPED, None)}, requires=["llm", "embeddings"],
+                     enabled=True, retry_s=0)
+    blocked.start()
+    blocked.wait(timeout=2)
+    assert not blocked.ready()
+
+
+def test_failed_task_is_retried_until_usable():
+    outcomes = iter([RuntimeError("provider down"), RuntimeError("provider down")])
+
+    def flaky():
+        error = next(outcomes, None)
+        if error:
+            raise error
+        return READY, None
+
+    warmup = Warmup({"llm": flaky}, requires=["llm"], enabled=True, retry_s=0.05)
+    warmup.start()
+    warmup.wait(timeout=2)
+    assert warmup.status()["subsystems"]["llm"]["state"] in (FAILED, "warming")
+    deadline = time.perf_counter() + 2
+    while not warmup.ready() and time.perf_counter() < deadline:
+        time.sleep(0.02)
+    assert warmup.ready() and warmup.status()["subsystems"]["llm"]["attempts"] == 3
+
+
+class _Keys:
+    available_models = [{"name": "groq"}, {"name": "claude"}]
+
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+
+    def validate_keys(self):
+        return self.outcomes
+
+
+def test_llm_quota_exhaustion_is_degraded_not_failed(monkeypatch):
+    def warm(outcomes):
+        monkeypatch.setattr(warmup_module.subsystems, "get", lambda name: _Keys(outcomes))
+        return warmup_module._warm_llm()[0]
+
+    monkeypatch.setattr(warmup_module, "WARMUP_VALIDATE_KEYS", True)
+    assert warm({"groq": "ok", "claude": "ok"}) == READY
+    assert warm({"groq": "rate_limit", "claude": "ok"}) == DEGRADED
+    assert warm({"groq": "rate_limit", "claude": "rate_limit"}) == DEGRADED
+    with pytest.raises(RuntimeError):
+        warm({"groq": "auth", "claude": "auth"})
+
+
+def test_disabled_warmup_is_always_ready():
+    warmup = Warmup({"llm": _broken}, requires=["llm"], enabled=False)
+    warmup.start()
+    assert warmup.ready() and warmup.status()["subsystems"]["llm"]["state"] == "cold"
+
+
+def test_ready_endpoint_returns_503_until_warm(monkeypatch):
+    pytest.importorskip("fastapi")
+    from fastapi.testclient import TestClient
+    import app.main as main
+
+    gate = Warmup({"llm": _sleeping(0.3)}, requires=["llm"], enabled=True)
+    monkeypatch.setattr(main, "warmup", gate)
+    with TestClient(main.app) as client:  # Runs the startup hook
+        assert client.get("/ready").status_code == 503
+        assert client.get("/health").status_code == 200
+        gate.wait(timeout=2)
+        body = client.get("/ready").json()
+        assert body["ready"] and body["subsystems"]["llm"]["state"] == READY
+
+
+def test_rag_warmup_is_opt_in(monkeypatch):
+    import sys
+    monkeypatch.setattr(warmup_module, "WARMUP_RAG", False)
+    monkeypatch.delitem(sys.modules, "app.rag.store", raising=False)
+    assert warmup_module._warm_rag()[0] == SKIPPED
+    assert "app.rag.store" not in sys.modules  # No index or embedder loaded in the web worker
@@ -477,6 +477,88 @@ textInput.addEventListener('keypress', (e) => {
     if (e.key === 'Enter') sendMessage();
 });
 
+// Helper: HTML for one tool result (the main call or an extra entry under "tool_calls")
+function renderToolHTML(tool, content, metadata) {
+    let displayHTML = "";
+
+    if (tool === 'text') {
+        displayHTML = content;
+    }
+    else if (tool === 'mermaid') {
+        displayHTML = `<div class="mermaid">${content}</div>`;
+    }
+    else if (tool === 'youtube_search') {
+        const results = Array.isArray(content) ? content : [];
+        let galleryHTML = `<div class="video-gallery">`;
+        if (results.length === 0) galleryHTML += `No videos found for: ${content}`;
+
+        results.forEach(vid => {
+            const thumb = vid.thumbnail || "https://img.youtube.com/vi/default.jpg";
+            galleryHTML += `
+            <div class="video-card" onclick="window.open('${vid.link}', '_blank')">
+                <div class="video-thumb">
+                    <img src="${thumb}">
+                    <div class="video-duration">${vid.duration || 'VIDEO'}</div>
+                </div>
+                <div class="video-info">
+                    <div class="video-title" title="${vid.title}">${vid.title}</div>
+                    <div class="video-channel">${vid.channel || 'YouTube'}</div>
+                </div>
+            </div>`;
+        });
+        galleryHTML += `</div>`;
+        displayHTML = galleryHTML;
+    }
+    else if (tool === 'image_prompt') {
+        displayHTML = `**Generating Image...**\n*${content}*`;
+        fetchAndAppendImage(content);
+    }
+    else if (tool === 'document') {
+        // Fix for Leakage: Show a clean Card instead of raw JSON
+        const title = metadata.topic || "Research Document";
+        // We use 'content' as the Summary text if provided, or generic
+        const summary = (content.length > 200) ? "Content generated successfully." : content;
+
+        displayHTML = `
+        <div class="doc-card" style="background: #f8fafc; border: 1px solid #e2e8f0; padding: 15px; border-radius: 8px; margin-top: 10px;">
+            <h4 style="color: #475569; margin: 0 0 10px 0;"><i class="fa-solid fa-file-pdf" style="color: #ef4444;"></i> ${title}</h4>
+            <p style="font-size: 0.9rem; color: #64748b;">${summary}</p>
+            <button class="download-btn" onclick="downloadPDF('${title.replace(/'/g, "\\'")}', \`${content.replace(/`/g, "\\`").replace(/\$/g, "")}\`)" style="margin-top: 10px; padding: 8px 16px; background: #3b82f6; color: white; border: none; border-radius: 4px; cursor: pointer;">
+                <i class="fa-solid fa-download"></i> Download Content
+            </button>
+        </div>`;
+    }
+    else if (tool === 'csv') {
+        const title = metadata.topic || "Data";
+        displayHTML = `**CSV Data Ready: ${title}**\n[DOWNLOAD_CSV: ${title}]`;
+    }
+    else if (tool === 'presentation') {
+        const title = metadata.topic || "Presentation";
+        const summary = content.length > 100 ? "Slide deck ready." : content;
+        displayHTML = `
+        <div class="doc-card" style="background: #fff7ed; border: 1px solid #fed7aa; padding: 15px; border-radius: 8px; margin-top: 10px;">
+            <h4 style="color: #9a3412; margin: 0 0 10px 0;"><i class="fa-solid fa-file-powerpoint" style="color: #f97316;"></i> ${title}</h4>
+            <p style="font-size: 0.9rem; color: #9a3412;">${summary}</p>
+            <div style="font-size: 0.8rem; color: #fb923c; margin-bottom: 5px;">(Contains multiple slides)</div>
+            <button class="download-btn" onclick="downloadPDF('${title.replace(/'/g, "\\'")}', \`${content.replace(/`/g, "\\`").replace(/\$/g, "")}\`)" style="margin-top: 10px; padding: 8px 16px; background: #f97316; color: white; border: none; border-radius: 4px; cursor: pointer;">
+                <i class="fa-solid fa-download"></i> Download Slides
+            </button>
+        </div>`;
+    }
+
+    return displayHTML;
+}
+
+// Helper: Re-render Mermaid diagrams after dynamic injection
+function renderMermaid(msgDiv) {
+    try {
+        mermaid.run({ nodes: msgDiv.querySelectorAll('.mermaid') });
+        console.log("Mermaid diagram rendered successfully.");
+    } catch (e) {
+        console.error("Mermaid rendering error:", e);
+    }
+}
+
 async function sendMessage(textOverride) {
     // Priority: Argument -> Input Value -> Return
     const text = textOverride || textInput.value.trim();
@@ -487,13 +569,22 @@ async function sendMessage(textOverride) {
     const loadingId = addLoadingIndicator();
 
     try {
-        const response = await fetch('/chat', { // New Endpoint
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ text: text })
-        });
-
-        const data = await response.json();
+        let data;
+        try {
+            // Streaming endpoint: prose appears token-by-token in the loading bubble
+            data = await streamChat(text, loadingId);
+        } catch (streamError) {
+            // Once /chat/stream has accepted the request the turn is recorded and the model
+            // is running: retrying on /chat would store the message twice and call it again
+            if (!streamError.beforeAccepted) throw streamError;
+            console.warn("Streaming unavailable, falling back to /chat:", streamError);
+            const response = await fetch('/chat', { // New Endpoint
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ text: text })
+            });
+            data = await response.json();
+        }
         removeMessage(loadingId);
 
         // --- GROQ JSON HANDLER ---
@@ -535,85 +626,19 @@ async function sendMessage(textOverride) {
         }
 
         const agentName = (metadata.audience_level === 'teacher') ? 'Pedagogy' : 'Sahayak';
-        let displayHTML = "";
-
-        if (tool === 'text') {
-            displayHTML = content;
-        }
-        else if (tool === 'mermaid') {
-            displayHTML = `<div class="mermaid">${content}</div>`;
-        }
-        else if (tool === 'youtube_search') {
-            const results = Array.isArray(content) ? content : [];
-            let galleryHTML = `<div class="video-gallery">`;
-            if (results.length === 0) galleryHTML += `No videos found for: ${content}`;
-
-            results.forEach(vid => {
-                const thumb = vid.thumbnail || "https://img.youtube.com/vi/default.jpg";
-                galleryHTML += `
-                <div class="video-card" onclick="window.open('${vid.link}', '_blank')">
-                    <div class="video-thumb">
-                        <img src="${thumb}">
-                        <div class="video-duration">${vid.duration || 'VIDEO'}</div>
-                    </div>
-                    <div class="video-info">
-                        <div class="video-title" title="${vid.title}">${vid.title}</div>
-                        <div class="video-channel">${vid.channel || 'YouTube'}</div>
-                    </div>
-                </div>`;
-            });
-            galleryHTML += `</div>`;
-            displayHTML = galleryHTML;
-        }
-        else if (tool === 'image_prompt') {
-            displayHTML = `**Generating Image...**\n*${content}*`;
-            fetchAndAppendImage(content);
-        }
-        else if (tool === 'document') {
-            // Fix for Leakage: Show a clean Card instead of raw JSON
-            const title = metadata.topic || "Research Document";
-            // We use 'content' as the Summary text if provided, or generic
-            const summary = (content.length > 200) ? "Content generated successfully." : content;
-
-            displayHTML = `
-            <div class="doc-card" style="background: #f8fafc; border: 1px solid #e2e8f0; padding: 15px; border-radius: 8px; margin-top: 10px;">
-                <h4 style="color: #475569; margin: 0 0 10px 0;"><i class="fa-solid fa-file-pdf" style="color: #ef4444;"></i> ${title}</h4>
-                <p style="font-size: 0.9rem; color: #64748b;">${summary}</p>
-                <button class="download-btn" onclick="downloadPDF('${title.replace(/'/g, "\\'")}', \`${content.replace(/`/g, "\\`").replace(/\$/g, "")}\`)" style="margin-top: 10px; padding: 8px 16px; background: #3b82f6; color: white; border: none; border-radius: 4px; cursor: pointer;">
-                    <i class="fa-solid fa-download"></i> Download Content
-                </button>
-            </div>`;
-        }
-        else if (tool === 'csv') {
-            const title = metadata.topic || "Data";
-            displayHTML = `**CSV Data Ready: ${title}**\n[DOWNLOAD_CSV: ${title}]`;
-        }
-        else if (tool === 'presentation') {
-            const title = metadata.topic || "Presentation";
-            const summary = content.length > 100 ? "Slide deck ready." : content;
-            displayHTML = `
-            <div class="doc-card" style="background: #fff7ed; border: 1px solid #fed7aa; padding: 15px; border-radius: 8px; margin-top: 10px;">
-                <h4 style="color: #9a3412; margin: 0 0 10px 0;"><i class="fa-solid fa-file-powerpoint" style="color: #f97316;"></i> ${title}</h4>
-                <p style="font-size: 0.9rem; color: #9a3412;">${summary}</p>
-                <div style="font-size: 0.8rem; color: #fb923c; margin-bottom: 5px;">(Contains multiple slides)</div>
-                <button class="download-btn" onclick="downloadPDF('${title.replace(/'/g, "\\'")}', \`${content.replace(/`/g, "\\`").replace(/\$/g, "")}\`)" style="margin-top: 10px; padding: 8px 16px; background: #f97316; color: white; border: none; border-radius: 4px; cursor: pointer;">
-                    <i class="fa-solid fa-download"></i> Download Slides
-                </button>
-            </div>`;
-        }
+        const displayHTML = renderToolHTML(tool, content, metadata);
 
         // Render
         const msgDiv = addMessage(displayHTML, 'ai', true, agentName);
-
-        // Re-render Mermaid diagrams after dynamic injection
-        if (tool === 'mermaid') {
-            try {
-                mermaid.run({ nodes: msgDiv.querySelectorAll('.mermaid') });
-                console.log("Mermaid diagram rendered successfully.");
-            } catch (e) {
-                console.error("Mermaid rendering error:", e);
-            }
-        }
+        if (tool === 'mermaid') renderMermaid(msgDiv);
+
+        // Extra tools from the same answer (e.g. a diagram AND real videos), one bubble each
+        const extraCalls = Array.isArray(data.tool_calls) ? data.tool_calls : [];
+        extraCalls.forEach(call => {
+            if (!call || typeof call.tool_used !== 'string') return;
+            const extraDiv = addMessage(renderToolHTML(call.tool_used, call.data, call.metadata || metadata), 'ai', true, agentName);
+            if (call.tool_used === 'mermaid') renderMermaid(extraDiv);
+        });
 
         // Speak
         if (tool === 'text') speakText(content);
@@ -627,6 +652,64 @@ async function sendMessage(textOverride) {
     }
 }
 
+// Helper: Stream /chat/stream (Server-Sent Events)
+// 'delta' events are painted into the loading bubble as they arrive.
+// Resolves with the 'final' event payload (same shape as /chat).
+// Errors thrown before the server accepted the request carry beforeAccepted = true.
+async function streamChat(text, loadingId) {
+    const notAccepted = (error) => Object.assign(error, { beforeAccepted: true });
+    let response;
+    try {
+        response = await fetch('/chat/stream', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ text: text })
+        });
+    } catch (networkError) {
+        throw notAccepted(networkError);
+    }
+    if (!response.ok || !response.body) throw notAccepted(new Error(`Stream HTTP ${response.status}`));
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let streamedText = '';
+    let finalData = null;
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let eventName = 'message';
+            let payload = '';
+            rawEvent.split('\n').forEach(line => {
+                if (line.startsWith('event:')) eventName = line.slice(6).trim();
+                else if (line.startsWith('data:')) payload += line.slice(5).trim();
+            });
+            if (!payload) continue;
+
+            const parsed = JSON.parse(payload);
+            if (eventName === 'delta') {
+                streamedText += parsed.text;
+                const bubble = document.querySelector(`#${loadingId} .message-content`);
+                if (bubble) bubble.textContent = streamedText;
+                chatContainer.scrollTop = chatContainer.scrollHeight;
+            } else if (eventName === 'final') {
+                finalData = parsed;
+            }
+        }
+    }
+
+    if (!finalData) throw new Error("Stream ended without a final event");
+    return finalData;
+}
+
 // Helper: Quick PDF Download (Client-Side)
 function downloadPDF(filename, text) {
     const element = document.createElement('a');
@@ -677,10 +760,26 @@ async function fetchAndAppendVideo(prompt) {
     chatContainer.scrollTop = chatContainer.scrollHeight;
 
     try {
-        const res = await fetch(`/generate/video?prompt=${encodeURIComponent(prompt)}`);
-        if (!res.ok) throw new Error("Video Gen Failed");
-        const blob = await res.blob();
-        const url = URL.createObjectURL(blob);
+        // Submit as a background job, then poll until the encode finishes
+        const submit = await fetch('/jobs/video', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ prompt: prompt })
+        });
+        if (!submit.ok) throw new Error("Video Gen Failed");
+        let job = await submit.json();
+        const status = loadingDiv.querySelector('.message-content');
+
+        while (job.status === 'queued' || job.status === 'running') {
+            await new Promise(r => setTimeout(r, 2000));
+            const poll = await fetch(`/jobs/${job.job_id}`);
+            if (!poll.ok) throw new Error("Video Gen Failed");
+            job = await poll.json();
+            const pct = Math.round((job.progress || 0) * 100);
+            status.innerHTML = `<i class="fa-solid fa-video fa-bounce"></i> Filming "${prompt.substring(0, 20)}..." ${pct}%`;
+        }
+        if (job.status !== 'done') throw new Error(job.error || "Video Gen Failed");
+        const url = job.result_url;
 
         const video = document.createElement('video');
         video.src = url;